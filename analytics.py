@@ -0,0 +1,249 @@
+"""Analytics queries served from the summary tables kept by migration 4.
+
+    python analytics.py [--repair]
+
+checks the summary tables against a from-scratch recomputation, and with
+--repair rebuilds any rows that disagree.
+"""
+import math
+import sys
+
+from database import snapshot, transaction
+
+CAPACITY_COLUMNS = ('sku_id', 'sku_name', 'total_capacity', 'used_capacity')
+SALES_COLUMNS = ('product_name', 'total_sold')
+
+# Read the trigger-maintained summaries: one row per SKU / product returned
+CAPACITY_QUERY = '''
+    SELECT
+        s.id AS sku_id,
+        s.name AS sku_name,
+        s.capacity AS total_capacity,
+        COALESCE(u.used_capacity, 0) AS used_capacity
+    FROM
+        skus s
+    LEFT JOIN
+        sku_usage u ON u.sku_id = s.id
+    ORDER BY
+        s.id
+'''
+
+SALES_QUERY = '''
+    SELECT
+        p.name AS product_name,
+        COALESCE(SUM(t.total_sold), 0) AS total_sold
+    FROM
+        products p
+    LEFT JOIN
+        product_sold t ON t.product_id = p.id
+    GROUP BY
+        p.name
+    ORDER BY
+        p.name
+'''
+
+TIMESERIES_COLUMNS = ('bucket', 'quantity', 'revenue', 'sales')
+
+# Start date of the bucket holding sale_date; weeks start on Monday
+BUCKETS = {
+    'day': 'sale_date',
+    'week': "date(sale_date, 'weekday 0', '-6 days')",
+    'month': "strftime('%Y-%m-01', sale_date)",
+}
+
+
+def timeseries_query(bucket, start=None, end=None, product_id=None, supplier_id=None):
+    """Build the /sales/timeseries query over the daily sales rollups.
+
+    start and end are inclusive ISO dates. Unfiltered requests read one
+    sales_daily_total row per day; product and supplier filters read the
+    per-product sales_daily rows through its (product_id, sale_date) index or
+    primary key, so the cost follows the days in range, never the sales.
+    """
+    where = []
+    params = []
+    filters = (('sale_date >= ?', start), ('sale_date <= ?', end))
+    if product_id is None and supplier_id is None:
+        table = 'sales_daily_total'
+    else:
+        table = 'sales_daily'
+        filters += (
+            ('product_id = ?', product_id),
+            ('product_id IN (SELECT id FROM products WHERE supplier_id = ?)', supplier_id),
+        )
+    for clause, value in filters:
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    sql = f'''
+        SELECT {BUCKETS[bucket]} AS bucket, SUM(quantity), SUM(revenue), SUM(sales)
+        FROM {table}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        GROUP BY bucket
+        ORDER BY bucket
+    '''
+    return sql, params
+
+
+SUPPLIER_REVENUE_COLUMNS = ('supplier_id', 'supplier_name', 'units', 'revenue', 'sales')
+TOP_PRODUCTS_COLUMNS = ('product_id', 'product_name', 'units', 'revenue', 'sales')
+STOCK_VALUE_COLUMNS = ('location', 'products', 'units', 'stock_value')
+
+# Reports aggregate the raw tables and run on the analytics engine, so their
+# SQL sticks to what SQLite and DuckDB both accept.
+STOCK_VALUE_QUERY = '''
+    SELECT
+        k.location AS location,
+        COUNT(*) AS products,
+        SUM(p.quantity) AS units,
+        SUM(p.quantity * p.price) AS stock_value
+    FROM
+        products p
+    JOIN
+        skus k ON k.id = p.sku_id
+    GROUP BY
+        k.location
+    ORDER BY
+        stock_value DESC, location
+'''
+
+
+def _sale_dates(start, end):
+    """WHERE clause and params for an inclusive sale_date range."""
+    where = []
+    params = []
+    for clause, value in (('sa.sale_date >= ?', start), ('sa.sale_date <= ?', end)):
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    return ('WHERE ' + ' AND '.join(where) if where else ''), params
+
+
+def supplier_revenue_query(start=None, end=None):
+    where, params = _sale_dates(start, end)
+    sql = f'''
+        SELECT
+            p.supplier_id AS supplier_id,
+            s.name AS supplier_name,
+            SUM(sa.quantity) AS units,
+            SUM(sa.price) AS revenue,
+            COUNT(*) AS sales
+        FROM
+            sales sa
+        JOIN
+            products p ON p.id = sa.product_id
+        LEFT JOIN
+            suppliers s ON s.id = p.supplier_id
+        {where}
+        GROUP BY
+            p.supplier_id, s.name
+        ORDER BY
+            revenue DESC, supplier_id
+    '''
+    return sql, params
+
+
+def top_products_query(start=None, end=None, limit=10):
+    where, params = _sale_dates(start, end)
+    sql = f'''
+        SELECT
+            sa.product_id AS product_id,
+            p.name AS product_name,
+            SUM(sa.quantity) AS units,
+            SUM(sa.price) AS revenue,
+            COUNT(*) AS sales
+        FROM
+            sales sa
+        LEFT JOIN
+            products p ON p.id = sa.product_id
+        {where}
+        GROUP BY
+            sa.product_id, p.name
+        ORDER BY
+            revenue DESC, product_id
+        LIMIT ?
+    '''
+    return sql, params + [limit]
+
+
+# (summary table, key columns, value columns, recomputation from the base table)
+SUMMARIES = (
+    ('sku_usage', ('sku_id',), ('used_capacity',), '''
+        SELECT sku_id, SUM(COALESCE(quantity, 0)) FROM products WHERE sku_id IS NOT NULL GROUP BY sku_id
+    '''),
+    ('product_sold', ('product_id',), ('total_sold',), '''
+        SELECT product_id, SUM(COALESCE(quantity, 0)) FROM orders WHERE product_id IS NOT NULL GROUP BY product_id
+    '''),
+    ('sales_daily', ('sale_date', 'product_id'), ('quantity', 'revenue', 'sales'), '''
+        SELECT date(sale_date), product_id, SUM(COALESCE(quantity, 0)), SUM(COALESCE(price, 0)), COUNT(*)
+        FROM sales
+        WHERE date(sale_date) IS NOT NULL AND product_id IS NOT NULL
+        GROUP BY date(sale_date), product_id
+    '''),
+    ('sales_daily_total', ('sale_date',), ('quantity', 'revenue', 'sales'), '''
+        SELECT date(sale_date), SUM(COALESCE(quantity, 0)), SUM(COALESCE(price, 0)), COUNT(*)
+        FROM sales
+        WHERE date(sale_date) IS NOT NULL AND product_id IS NOT NULL
+        GROUP BY date(sale_date)
+    '''),
+)
+
+
+def _same(stored, expected):
+    # Running REAL sums drift from a fresh SUM() in the last few bits
+    return all(
+        math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6) if isinstance(a, float) or isinstance(b, float) else a == b
+        for a, b in zip(stored, expected)
+    )
+
+
+def _describe(columns, values):
+    return values[0] if len(columns) == 1 else dict(zip(columns, values))
+
+
+def check_consistency(conn, repair=False):
+    """Recompute every summary from scratch and compare it with the stored one.
+
+    Returns a list of mismatches as dicts; with repair=True the stored values
+    are corrected in the same transaction. Keys missing on either side count
+    as zero. Only a repair takes the write lock; a plain check reads a snapshot
+    and leaves writers alone.
+    """
+    mismatches = []
+    with transaction(conn) if repair else snapshot(conn):
+        for table, keys, values, recompute in SUMMARIES:
+            width = len(keys)
+            zero = (0,) * len(values)
+            expected = {row[:width]: row[width:] for row in conn.execute(recompute)}
+            stored = {row[:width]: row[width:] for row in conn.execute(
+                f"SELECT {', '.join(keys + values)} FROM {table}"
+            )}
+            for item in expected.keys() | stored.keys():
+                if not _same(stored.get(item, zero), expected.get(item, zero)):
+                    mismatches.append({
+                        'table': table,
+                        **dict(zip(keys, item)),
+                        'stored': _describe(values, stored.get(item, zero)),
+                        'expected': _describe(values, expected.get(item, zero)),
+                    })
+                    if repair:
+                        placeholders = ', '.join('?' for _ in keys + values)
+                        conn.execute(
+                            f"INSERT OR REPLACE INTO {table} ({', '.join(keys + values)}) VALUES ({placeholders})",
+                            item + expected.get(item, zero),
+                        )
+    return mismatches
+
+
+if __name__ == "__main__":
+    import migrations
+    from database import connect
+
+    conn = connect()
+    migrations.migrate(conn)
+    mismatches = check_consistency(conn, repair='--repair' in sys.argv)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{len(mismatches)} mismatches" + (" repaired" if mismatches and '--repair' in sys.argv else ""))
+    conn.close()
+    sys.exit(1 if mismatches and '--repair' not in sys.argv else 0)
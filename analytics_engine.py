@@ -0,0 +1,185 @@
+"""Read-only engine for reporting queries, kept apart from the OLTP pool.
+
+Analytics and report routes run here instead of on the request pool, on their
+own small executor and their own connections, so a long aggregation never
+holds a pooled connection or a DB executor thread that a sale is waiting for.
+
+Two backends run the same SQL:
+
+* duckdb - DuckDB with the database file attached read-only through its
+  sqlite extension; vectorized and multi-threaded, for wide aggregations.
+* sqlite - plain SQLite connections opened with mode=ro.
+
+INVENTORY_ANALYTICS_ENGINE=auto (the default) uses DuckDB when the duckdb
+package and its sqlite extension are available and SQLite otherwise.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import config
+import database
+import slowlog
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional; reports then run on SQLite
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'duckdb', 'sqlite')
+
+
+def _fetchall(conn, sql, params):
+    return conn.execute(sql, params).fetchall()
+
+
+def _explain_duckdb(conn, sql, params):
+    # A fresh cursor, so the pending result of the slow statement survives
+    cursor = conn.cursor()
+    try:
+        cursor.execute("USE inventory")
+        return [line for _, plan in cursor.execute(f"EXPLAIN {sql}", params).fetchall() for line in plan.splitlines()]
+    finally:
+        cursor.close()
+
+
+class _TimedDuckDB:
+    """A DuckDB cursor that reports slow statements, like database.Cursor does."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._timing = None
+
+    def execute(self, sql, params=()):
+        started = time.perf_counter()
+        self._cursor.execute(sql, params)
+        self._timing = slowlog.Timing(
+            slowlog.slow_queries, _explain_duckdb, self._cursor, sql, params, time.perf_counter() - started,
+        )
+        return self
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        if self._timing is not None:
+            self._timing.add(time.perf_counter() - started)
+        return result
+
+    def fetchone(self):
+        return self._fetch('fetchone')
+
+    def fetchmany(self, size=1):
+        return self._fetch('fetchmany', size)
+
+    def fetchall(self):
+        return self._fetch('fetchall')
+
+    def close(self):
+        self._cursor.close()
+
+
+class AnalyticsEngine:
+    """Runs read-only queries on a dedicated executor.
+
+    Offers the run(fn, *args) / fetchall(sql, params) interface of
+    database.AsyncConnection, so helpers such as listing.fetch_all() and
+    versions.check_etag() work unchanged on top of it.
+    """
+
+    def __init__(self, path, backend='auto', threads=2):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown analytics engine {backend!r}; expected one of {', '.join(BACKENDS)}")
+        self.path = path
+        self.requested = backend
+        self.threads = threads
+        self.backend = None
+        self._executor = None
+        self._duckdb = None
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Pick the backend and start the executor; the database must exist."""
+        if self.requested in ('auto', 'duckdb'):
+            try:
+                self._duckdb = self._open_duckdb()
+                self.backend = 'duckdb'
+            except Exception as exc:
+                if self.requested == 'duckdb':
+                    raise
+                logger.info("DuckDB analytics unavailable (%s); using read-only SQLite", exc)
+        if self.backend is None:
+            self.backend = 'sqlite'
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="analytics")
+
+    def _open_duckdb(self):
+        if duckdb is None:
+            raise RuntimeError("duckdb is not installed")
+        conn = duckdb.connect()
+        try:
+            conn.execute("INSTALL sqlite")
+            conn.execute("LOAD sqlite")
+            path = str(Path(self.path).resolve()).replace("'", "''")
+            conn.execute(f"ATTACH '{path}' AS inventory (TYPE sqlite, READ_ONLY)")
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _connection(self):
+        # One connection per executor thread; neither backend shares one safely
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.backend == 'duckdb':
+                conn = self._duckdb.cursor()
+                conn.execute("USE inventory")
+                if slowlog.slow_queries.enabled:
+                    conn = _TimedDuckDB(conn)
+            else:
+                conn = sqlite3.connect(
+                    f"{Path(self.path).resolve().as_uri()}?mode=ro",
+                    uri=True,
+                    timeout=config.BUSY_TIMEOUT_MS / 1000,
+                    check_same_thread=False,
+                    factory=database.Connection,
+                )
+                conn.execute(f"PRAGMA cache_size = -{config.CACHE_SIZE_KIB}")
+                conn.execute(f"PRAGMA mmap_size = {config.MMAP_SIZE}")
+                conn.timed = slowlog.slow_queries.enabled
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, fn, args):
+        return fn(self._connection(), *args)
+
+    async def run(self, fn, *args):
+        """Call fn(conn, *args) on an analytics connection and return its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self._call, fn, args))
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(_fetchall, sql, params)
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        if self._duckdb is not None:
+            self._duckdb.close()
+            self._duckdb = None
+        self._local = threading.local()
+        self.backend = None
@@ -1,23 +1,468 @@
+"""Client for the inventory API.
+
+Client is synchronous and built on requests; AsyncClient offers the same
+calls for asyncio and needs httpx. Both keep connections alive in a pool,
+time out every request, and retry idempotent requests with exponential
+backoff when the connection fails or the server answers 429, 502, 503 or
+504. GET responses that carry an ETag are cached, and repeating the
+request sends If-None-Match, so an unchanged list costs a 304 and no body.
+
+    with Client() as client:
+        products = client.list("products", supplier_id=3)
+        orders = client.get_many("orders", [1, 5, 9])
+
+fetch_products(), fetch_skus(), fetch_orders() and fetch_suppliers() use a
+shared default Client.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import parse_qsl, urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+try:
+    import httpx
+except ImportError:  # httpx is optional; only AsyncClient needs it
+    httpx = None
+
+BASE_URL = "http://localhost:8000"
+
+# Collection and item paths of each entity
+LIST_PATHS = {
+    "products": "/products",
+    "skus": "/skus",
+    "orders": "/orders/",
+    "suppliers": "/suppliers/",
+}
+ITEM_PATHS = {
+    "products": "/products/{}",
+    "skus": "/skus/{}",
+    "orders": "/orders/{}",
+    "suppliers": "/suppliers/{}",
+}
+
+# Largest page and ids= batch the server accepts (listing.MAX_PAGE_SIZE)
+MAX_PAGE_SIZE = 1000
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Headers that change a response's representation, and so its cache entry
+_VARY = ("accept", "x-row-format")
+
+# get_many() matches rows up by id, whatever the server's default row format
+_KEYED = {"X-Row-Format": "dict"}
+
+Reply = namedtuple("Reply", "status headers data")
+
+
+class APIError(Exception):
+    """A request that failed: an error status (status set) or no answer at all (status None)."""
+
+    def __init__(self, status, detail, method=None, url=None):
+        super().__init__(f"{status}: {detail}" if status is not None else detail)
+        self.status = status
+        self.detail = detail
+        self.method = method
+        self.url = url
+
+
+def _detail(data, reason):
+    if isinstance(data, dict) and "detail" in data:
+        return data["detail"]
+    return reason
+
+
+def _decode(content):
+    return json.loads(content) if content else None
+
+
+def _next_params(link):
+    """Query params of the rel="next" target in a Link header, or None on the last page."""
+    for part in (link or "").split(","):
+        target, _, rest = part.partition(";")
+        if 'rel="next"' in rest:
+            return dict(parse_qsl(urlsplit(target.strip().strip("<>")).query))
+    return None
+
+
+def _not_sent(exc):
+    """True when requests failed before the request left, like httpx's ConnectError and ConnectTimeout."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    # Refused, unreachable or unresolvable; a connection that drops after the
+    # request went out ("Connection aborted") is a ConnectionError too, but may
+    # have been applied
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(exc, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def _parse_events(lines, state):
+    """Yield (event, data, id) from server-sent event lines; state["last_id"] tracks the id."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data), state["last_id"]
+            event, data = "message", []
+        elif not line.startswith(":"):
+            name, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if name == "event":
+                event = value
+            elif name == "data":
+                data.append(value)
+            elif name == "id":
+                state["last_id"] = value
+
+
+class _BaseClient:
+    def __init__(self, base_url, retries, backoff, cache_size):
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_size = cache_size
+        # cache key -> (etag, status, headers, body bytes), least recently used first
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._closed = False
+
+    def _cache_key(self, path, params, headers):
+        vary = tuple((name, value) for name, value in sorted((headers or {}).items()) if name.lower() in _VARY)
+        return path, tuple(sorted((params or {}).items())), vary
+
+    def _cached(self, key):
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _store(self, key, etag, status, headers, content):
+        with self._cache_lock:
+            self._cache[key] = (etag, status, headers, content)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _retry_delay(self, method, attempt, status=None, retry_after=None, sent=True):
+        """Seconds to wait before retrying, or None when the request must not be retried.
+
+        A request that never reached the server (sent False) is safe to
+        retry whatever its method.
+        """
+        if attempt >= self.retries or (sent and method not in IDEMPOTENT_METHODS):
+            return None
+        if status is not None and status not in RETRY_STATUSES:
+            return None
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), 30.0)
+            except ValueError:
+                pass
+        # Full jitter keeps a crowd of clients from retrying in step
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def _prepare(self, method, path, params, headers):
+        """(cache key or None, headers with If-None-Match when a cached copy exists)."""
+        if method != "GET" or not self.cache_size:
+            return None, None, headers
+        key = self._cache_key(path, params, headers)
+        entry = self._cached(key)
+        if entry is not None:
+            headers = dict(headers or {}, **{"If-None-Match": entry[0]})
+        return key, entry, headers
+
+    def _finish(self, method, url, key, entry, status, headers, content, reason):
+        if status == 304 and entry is not None:
+            return Reply(entry[1], entry[2], _decode(entry[3]))
+        data = _decode(content) if content else None
+        if status >= 400:
+            raise APIError(status, _detail(data, reason), method, url)
+        etag = headers.get("etag")
+        if key is not None and etag:
+            self._store(key, etag, status, headers, content)
+        return Reply(status, headers, data)
+
+    @staticmethod
+    def _chunks(ids):
+        ids = list(dict.fromkeys(ids))
+        return [ids[start:start + MAX_PAGE_SIZE] for start in range(0, len(ids), MAX_PAGE_SIZE)]
+
+    @staticmethod
+    def _align(ids, rows):
+        by_id = {row["id"]: row for row in rows}
+        return [by_id.get(entity_id) for entity_id in ids]
+
+
+class Client(_BaseClient):
+    """Synchronous client over one pooled requests.Session; safe to share between threads."""
+
+    def __init__(self, base_url=BASE_URL, timeout=(3.05, 30), retries=3, backoff=0.1, pool_size=10, cache_size=256):
+        super().__init__(base_url, retries, backoff, cache_size)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send(self, method, path, params=None, json=None, headers=None):
+        """Make a request, retrying and caching as described above, and return a Reply.
+
+        Raises APIError for an error status, or once retries are exhausted.
+        """
+        url = self.base_url + path
+        key, entry, headers = self._prepare(method, path, params, headers)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, params=params, json=json, headers=headers,
+                                                timeout=self.timeout)
+            except requests.RequestException as exc:
+                delay = self._retry_delay(method, attempt, sent=not _not_sent(exc))
+                if delay is None:
+                    raise APIError(None, str(exc) or type(exc).__name__, method, url) from exc
+            else:
+                delay = None
+                if response.status_code in RETRY_STATUSES:
+                    delay = self._retry_delay(method, attempt, response.status_code, response.headers.get("retry-after"))
+                if delay is None:
+                    return self._finish(method, url, key, entry, response.status_code, response.headers,
+                                        response.content, response.reason)
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, path, params=None, headers=None):
+        return self.send("GET", path, params, headers=headers).data
+
+    def post(self, path, json=None, params=None, headers=None):
+        return self.send("POST", path, params, json, headers).data
+
+    def put(self, path, json=None, params=None, headers=None):
+        return self.send("PUT", path, params, json, headers).data
+
+    def delete(self, path, params=None, headers=None):
+        return self.send("DELETE", path, params, headers=headers).data
+
+    def fetch(self, entity, entity_id):
+        """One row as a dict."""
+        return self.get(ITEM_PATHS[entity].format(entity_id))
+
+    def list(self, entity, headers=None, **params):
+        """Every row of entity matching the filters in params, following pages of MAX_PAGE_SIZE."""
+        return [row for row in self.iter(entity, headers=headers, **params)]
+
+    def iter(self, entity, page_size=MAX_PAGE_SIZE, headers=None, **params):
+        """Rows of entity one page at a time, following the server's rel="next" links.
+
+        The links carry the cursor, so this works for any row format and fields=;
+        headers (X-Row-Format, Accept) pick the format of every page.
+        """
+        params = dict(params, limit=page_size)
+        while params is not None:
+            reply = self.send("GET", LIST_PATHS[entity], params, headers=headers)
+            yield from reply.data
+            params = _next_params(reply.headers.get("link"))
+
+    def get_many(self, entity, ids):
+        """Rows for ids, in the same order, None for ids that do not exist.
+
+        Asks for up to MAX_PAGE_SIZE rows per request with ids=, instead of
+        one request per row.
+        """
+        rows = []
+        for chunk in self._chunks(ids):
+            rows.extend(self.get(LIST_PATHS[entity], {"ids": ",".join(map(str, chunk))}, _KEYED))
+        return self._align(ids, rows)
+
+    def events(self, since=None, entities=None):
+        """Yield (event, data, id) from GET /events until the client is closed.
+
+        Reconnects with backoff when the stream drops, resuming after the
+        last id received.
+        """
+        state = {"last_id": str(since) if since is not None else None}
+        params = {"entities": ",".join(entities)} if entities else None
+        # A session of its own, so the stream never holds a connection the pool needs
+        session = requests.Session()
+        attempt = 0
+        try:
+            while not self._closed:
+                headers = {"Last-Event-ID": state["last_id"]} if state["last_id"] is not None else None
+                try:
+                    # The server sends a keep-alive every 15 s, so a minute of silence is a dead connection
+                    with session.get(self.base_url + "/events", params=params, headers=headers, stream=True,
+                                     timeout=(self.timeout[0], 60)) as response:
+                        if response.status_code >= 400:
+                            raise APIError(response.status_code, response.reason, "GET", response.url)
+                        response.encoding = "utf-8"
+                        attempt = 0
+                        yield from _parse_events(response.iter_lines(decode_unicode=True), state)
+                except (requests.RequestException, APIError):
+                    if self._closed:
+                        return
+                time.sleep(random.uniform(0, min(30, self.backoff * 10 * 2 ** attempt)))
+                attempt += 1
+        finally:
+            session.close()
+
+    def close(self):
+        self._closed = True
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncClient(_BaseClient):
+    """The same calls for asyncio, over one pooled httpx.AsyncClient.
+
+    Requests beyond max_connections queue on a semaphore for a free
+    connection rather than failing, so thousands can be gathered at once.
+    (Left to queue inside httpx's pool instead, each waiter costs every
+    other one, and a fan-out of thousands slows to a crawl.)
+    """
+
+    def __init__(self, base_url=BASE_URL, timeout=(3.05, 30), retries=3, backoff=0.1, max_connections=100,
+                 cache_size=256):
+        if httpx is None:
+            raise RuntimeError("AsyncClient needs httpx; pip install httpx")
+        super().__init__(base_url, retries, backoff, cache_size)
+        self.timeout = timeout
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0], pool=None),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def send(self, method, path, params=None, json=None, headers=None):
+        key, entry, headers = self._prepare(method, path, params, headers)
+        attempt = 0
+        while True:
+            try:
+                async with self._slots:
+                    response = await self.http.request(method, path, params=params, json=json, headers=headers)
+            except httpx.HTTPError as exc:
+                delay = self._retry_delay(method, attempt, sent=not isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout)))
+                if delay is None:
+                    raise APIError(None, str(exc) or type(exc).__name__, method, self.base_url + path) from exc
+            else:
+                delay = None
+                if response.status_code in RETRY_STATUSES:
+                    delay = self._retry_delay(method, attempt, response.status_code, response.headers.get("retry-after"))
+                if delay is None:
+                    return self._finish(method, str(response.url), key, entry, response.status_code, response.headers,
+                                        response.content, response.reason_phrase)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, path, params=None, headers=None):
+        return (await self.send("GET", path, params, headers=headers)).data
+
+    async def post(self, path, json=None, params=None, headers=None):
+        return (await self.send("POST", path, params, json, headers)).data
+
+    async def put(self, path, json=None, params=None, headers=None):
+        return (await self.send("PUT", path, params, json, headers)).data
+
+    async def delete(self, path, params=None, headers=None):
+        return (await self.send("DELETE", path, params, headers=headers)).data
+
+    async def fetch(self, entity, entity_id):
+        return await self.get(ITEM_PATHS[entity].format(entity_id))
+
+    async def list(self, entity, headers=None, **params):
+        return [row async for row in self.iter(entity, headers=headers, **params)]
+
+    async def iter(self, entity, page_size=MAX_PAGE_SIZE, headers=None, **params):
+        params = dict(params, limit=page_size)
+        while params is not None:
+            reply = await self.send("GET", LIST_PATHS[entity], params, headers=headers)
+            for row in reply.data:
+                yield row
+            params = _next_params(reply.headers.get("link"))
+
+    async def get_many(self, entity, ids):
+        """Rows for ids, in order, None where missing; the batches are requested concurrently."""
+        pages = await asyncio.gather(*(self.get(LIST_PATHS[entity], {"ids": ",".join(map(str, chunk))}, _KEYED)
+                                       for chunk in self._chunks(ids)))
+        return self._align(ids, [row for page in pages for row in page])
+
+    async def events(self, since=None, entities=None):
+        state = {"last_id": str(since) if since is not None else None}
+        params = {"entities": ",".join(entities)} if entities else None
+        attempt = 0
+        while not self._closed:
+            headers = {"Last-Event-ID": state["last_id"]} if state["last_id"] is not None else None
+            try:
+                async with self.http.stream("GET", "/events", params=params, headers=headers,
+                                            timeout=httpx.Timeout(60, connect=self.timeout[0], pool=None)) as response:
+                    if response.status_code >= 400:
+                        raise APIError(response.status_code, response.reason_phrase, "GET", str(response.url))
+                    attempt = 0
+                    # One event's lines at a time, ending with the blank line
+                    buffer = []
+                    async for line in response.aiter_lines():
+                        buffer.append(line)
+                        if not line:
+                            for item in _parse_events(buffer, state):
+                                yield item
+                            buffer = []
+            except (httpx.HTTPError, APIError):
+                if self._closed:
+                    return
+            await asyncio.sleep(random.uniform(0, min(30, self.backoff * 10 * 2 ** attempt)))
+            attempt += 1
+
+    async def close(self):
+        self._closed = True
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """A process-wide Client for BASE_URL, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Client()
+        return _default
+
+
+def fetch_products(**params):
+    return default_client().list("products", **params)
+
+
+def fetch_skus(**params):
+    return default_client().list("skus", **params)
+
+
+def fetch_orders(**params):
+    return default_client().list("orders", **params)
+
 
-def fetch_products():
-    url = "http://localhost:8000/products"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Failed to fetch products")
-        return []
-
-def fetch_skus():
-    url = "http://localhost:8000/skus"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Failed to fetch products")
-        return []
-
-def fetch_orders():
-    # Implement logic to fetch orders from the API
-    pass
+def fetch_suppliers(**params):
+    return default_client().list("suppliers", **params)
@@ -0,0 +1,55 @@
+"""10k single POST /products/ calls versus one POST /products/bulk.
+
+    python benchmarks/bench_bulk.py --items 10000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def product(i):
+    return {"sku_id": i % 10 + 1, "name": f"Bulk {i}", "price": 1.5, "quantity": 10, "supplier_id": i % 5 + 1}
+
+
+async def run(args):
+    import httpx
+
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        for i in range(args.items):
+            (await client.post("/products/", json=product(i))).raise_for_status()
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post("/products/bulk", json=[product(i) for i in range(args.items)])
+        response.raise_for_status()
+        batched = time.perf_counter() - started
+        assert len(response.json()["results"]) == args.items
+
+    print(f"{args.items} single inserts: {single:8.3f} s ({args.items / single:9.0f} items/s)")
+    print(f"{args.items} bulk insert:    {batched:8.3f} s ({args.items / batched:9.0f} items/s)")
+    print(f"speed-up: {single / batched:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
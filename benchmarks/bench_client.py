@@ -0,0 +1,127 @@
+"""What api.Client and api.AsyncClient save over a fresh connection per call.
+
+Starts `python main.py` on a throwaway database with --products products and
+fetches --fetches of them in five ways:
+
+- a new requests.get() per product, as api.py used to
+- Client.fetch() over one kept-alive pool
+- AsyncClient.fetch() for all of them at once
+- Client.get_many() and AsyncClient.get_many(), batched by ids=
+
+It then lists every product twice with Client.list(). The second listing
+is answered from the ETag cache with 304s.
+
+    python benchmarks/bench_client.py --fetches 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def populate(path, products):
+    import migrations
+    from database import connect, transaction
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    with transaction(conn):
+        conn.execute("INSERT INTO suppliers (name, email) VALUES ('Supplier', 'supplier@example.com')")
+        conn.execute("INSERT INTO skus (name, location, capacity) VALUES ('SKU', 'Location', 1000000000)")
+        conn.executemany(
+            "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (1, ?, 2.5, 1000, 1)",
+            ((f"Product {i}",) for i in range(products)),
+        )
+    conn.close()
+
+
+def wait_until_up(base_url, process, timeout=30):
+    import requests
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if requests.get(f"{base_url}/products/1", timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def timed(label, fn, count):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:40s} {elapsed * 1000:9.1f} ms  {count / elapsed:9.0f} rows/s")
+
+
+def run(base_url, args):
+    import requests
+
+    import api
+
+    ids = random.Random(args.seed).sample(range(1, args.products + 1), args.fetches)
+
+    def fresh_connections():
+        for product_id in ids:
+            requests.get(f"{base_url}/products/{product_id}", timeout=30).json()
+
+    client = api.Client(base_url)
+    timed("requests.get per product (old api.py)", fresh_connections, len(ids))
+    timed("Client.fetch per product", lambda: [client.fetch("products", product_id) for product_id in ids], len(ids))
+    timed("Client.get_many", lambda: client.get_many("products", ids), len(ids))
+
+    async def fan_out():
+        async with api.AsyncClient(base_url, max_connections=args.connections) as async_client:
+            await asyncio.gather(*(async_client.fetch("products", product_id) for product_id in ids))
+
+    async def batched():
+        async with api.AsyncClient(base_url, max_connections=args.connections) as async_client:
+            await async_client.get_many("products", ids)
+
+    timed(f"AsyncClient.fetch x{len(ids)} gathered", lambda: asyncio.run(fan_out()), len(ids))
+    timed("AsyncClient.get_many", lambda: asyncio.run(batched()), len(ids))
+
+    timed("Client.list, cold", lambda: client.list("products"), args.products)
+    timed("Client.list, unchanged (304s)", lambda: client.list("products"), args.products)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--fetches", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=20, help="AsyncClient pool size")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        populate(path, args.products)
+        env = dict(os.environ, INVENTORY_DB=path, INVENTORY_PORT=str(args.port), INVENTORY_HOST="127.0.0.1",
+                   INVENTORY_SLOW_QUERY_LOG=os.path.join(tmp, "slow-queries.log"))
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(base_url, server)
+            run(base_url, args)
+        finally:
+            server.send_signal(signal.SIGINT)
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Body size and client decode time of each row format for a /products page.
+
+    python benchmarks/bench_columnar.py --rows 100000
+
+Decoding ends with one NumPy-ready vector per column, which is what the BI
+jobs and charts want: JSON rows are parsed and transposed, the columns layout
+is parsed, packed buffers are viewed with numpy.frombuffer, and Arrow is read
+with pyarrow. Formats whose client library is missing are skipped.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def decode_rows(body, columns):
+    rows = json.loads(body)
+    return {name: [row[name] for row in rows] for name in columns}
+
+
+def decode_tuples(body, columns):
+    return dict(zip(columns, map(list, zip(*json.loads(body)))))
+
+
+def decode_columns(body, columns):
+    return json.loads(body)
+
+
+def decode_packed_numpy(body, columns):
+    import numpy
+
+    length = int.from_bytes(body[:4], 'little')
+    header = json.loads(body[4:4 + length])
+    vectors = {}
+    for column in header['columns']:
+        if column['type'] == 'utf8':
+            offsets = numpy.frombuffer(body, '<i4', header['rows'] + 1, column['offsets'][0])
+            start = column['data'][0]
+            vectors[column['name']] = [body[start + a:start + b].decode() for a, b in zip(offsets[:-1], offsets[1:])]
+        else:
+            dtype = '<f8' if column['type'] == 'float64' else '<i8'
+            vectors[column['name']] = numpy.frombuffer(body, dtype, header['rows'], column['values'][0])
+    return vectors
+
+
+def decode_arrow(body, columns):
+    import pyarrow.ipc
+
+    return pyarrow.ipc.open_stream(body).read_all()
+
+
+def numeric_only(columns):
+    return tuple(name for name in columns if name != 'name')
+
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import columnar
+    import listing
+    import serialization
+
+    all_columns = listing.TABLE_COLUMNS['products']
+    all_rows = [(i, i % 10 + 1, f"Product {i}", 9.99, i % 500, i % 5 + 1) for i in range(1, args.rows + 1)]
+    # The numeric projection (?fields=...) is the case zero-copy decoding is for
+    numeric = numeric_only(all_columns)
+    numeric_rows = [tuple(value for name, value in zip(all_columns, row) if name != 'name') for row in all_rows]
+
+    decoders = [
+        ('dict', decode_rows),
+        ('tuple', decode_tuples),
+        ('columns', decode_columns),
+        ('packed', decode_packed_numpy),
+        ('arrow', decode_arrow),
+    ]
+    for label, columns, rows in (('all columns', all_columns, all_rows), ('numeric columns', numeric, numeric_rows)):
+        print(f"{args.rows} rows, {label}:")
+        for row_format, decode in decoders:
+            if row_format == 'arrow' and columnar.pyarrow is None:
+                print(f"  {row_format:8s} skipped (pyarrow not installed)")
+                continue
+            try:
+                body = serialization.encode_rows(columns, rows, row_format)
+                encode_time = best_of(args.repeat, serialization.encode_rows, columns, rows, row_format)
+                decode_time = best_of(args.repeat, decode, body, columns)
+            except ImportError as exc:
+                print(f"  {row_format:8s} skipped ({exc.name} not installed)")
+                continue
+            print(f"  {row_format:8s} {len(body):10d} bytes   encode {encode_time * 1000:7.1f} ms"
+                  f"   decode {decode_time * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Latency of GET /products/{id} while /sales-analytics runs concurrently.
+
+Builds a throwaway database with a large orders table, drives the app in-process
+through httpx's ASGI transport and prints latency percentiles for the product
+lookups, first on an idle server and then under analytics load.
+
+    python benchmarks/bench_event_loop.py --orders 300000 --requests 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def populate(path, orders):
+    import migrations
+    import seed
+    from database import connect, transaction
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    seed.seed(conn)
+    rows = ((random.randint(1, 10), random.randint(1, 5), "Load Test", "load@example.com") for _ in range(orders))
+    with transaction(conn):
+        conn.executemany(
+            "INSERT INTO orders (product_id, quantity, customer_name, customer_email) VALUES (?, ?, ?, ?)", rows
+        )
+    conn.close()
+
+
+async def measure(client, count, concurrency):
+    latencies = []
+
+    async def worker():
+        for _ in range(count // concurrency):
+            started = time.perf_counter()
+            response = await client.get(f"/products/{random.randint(1, 10)}")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def run(args):
+    import httpx
+
+    import main
+
+    populate(os.environ["INVENTORY_DB"], args.orders)
+    transport = httpx.ASGITransport(app=main.app)
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        idle = await measure(client, args.requests, args.concurrency)
+
+        stop = asyncio.Event()
+
+        async def analytics():
+            while not stop.is_set():
+                (await client.get("/sales-analytics")).raise_for_status()
+
+        pollers = [asyncio.create_task(analytics()) for _ in range(args.analytics)]
+        await asyncio.sleep(0.05)
+        loaded = await measure(client, args.requests, args.concurrency)
+        stop.set()
+        await asyncio.gather(*pollers)
+
+    for label, samples in (("idle", idle), ("with /sales-analytics", loaded)):
+        print(
+            f"GET /products/{{id}} {label:>22}: "
+            f"p50 {percentile(samples, 50):7.2f} ms  "
+            f"p95 {percentile(samples, 95):7.2f} ms  "
+            f"p99 {percentile(samples, 99):7.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=300000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--analytics", type=int, default=2, help="concurrent analytics pollers")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
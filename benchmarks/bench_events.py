@@ -0,0 +1,129 @@
+"""Fan-out latency of GET /events, and what it saves over re-polling a table.
+
+Starts the app under uvicorn on a throwaway database with --products
+products, opens --subscribers /events streams (plus one deliberately slow
+reader), then sells one unit each of --writes distinct products. Reports how
+long each stock change took to reach the subscribers, the bytes a subscriber
+received, and the size of a single full GET /products poll.
+
+    python benchmarks/bench_events.py --subscribers 100 --writes 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def populate(path, products):
+    import migrations
+    from database import connect, transaction
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    with transaction(conn):
+        conn.executemany(
+            "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?)",
+            ((i % 10 + 1, f"Product {i}", 2.5, 10 ** 6, i % 5 + 1) for i in range(products)),
+        )
+    conn.close()
+
+
+async def subscribe(client, sent, latencies, writes, stats, delay=0.0):
+    import json
+
+    received = 0
+    async with client.stream("GET", "/events", params={"entities": "products"}) as response:
+        buffer = ""
+        async for chunk in response.aiter_text():
+            stats["bytes"] += len(chunk)
+            buffer += chunk
+            while "\n\n" in buffer:
+                event, buffer = buffer.split("\n\n", 1)
+                if "event: change" not in event:
+                    continue
+                change = json.loads(event.rsplit("data: ", 1)[1])
+                if change["id"] in sent and latencies is not None:
+                    latencies.append((time.perf_counter() - sent[change["id"]]) * 1000)
+                received += 1
+            if delay:
+                await asyncio.sleep(delay)
+            if received >= writes:
+                return received
+    return received
+
+
+async def run(args):
+    import httpx
+    import uvicorn
+
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=args.subscribers + 16)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=None, limits=limits) as client:
+        sent, latencies = {}, []
+        stats = [{"bytes": 0} for _ in range(args.subscribers + 1)]
+        subscribers = [
+            asyncio.create_task(subscribe(client, sent, latencies, args.writes, stats[i]))
+            for i in range(args.subscribers)
+        ]
+        slow = asyncio.create_task(subscribe(client, sent, None, args.writes, stats[-1], delay=args.slow_delay))
+        while main.change_feed.subscribers < args.subscribers + 1:
+            await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        for product_id in range(1, args.writes + 1):
+            sent[product_id] = time.perf_counter()
+            response = await client.post("/sales/", json={"product_id": product_id, "quantity": 1, "price": 2.5})
+            response.raise_for_status()
+            await asyncio.sleep(1 / args.rate)
+        write_time = time.perf_counter() - started
+        await asyncio.wait_for(asyncio.gather(*subscribers), 60)
+        slow_received = await asyncio.wait_for(slow, 120)
+
+        poll = await client.get("/products", params={"limit": 1000})
+        poll_bytes = len(poll.content) * -(-args.products // 1000)
+
+    server.should_exit = True
+    await serving
+
+    print(f"{args.writes} stock changes in {write_time:.1f} s to {args.subscribers} subscribers")
+    print(f"delivery latency: p50 {percentile(latencies, 50):.1f} ms  p99 {percentile(latencies, 99):.1f} ms")
+    print(f"bytes per subscriber: {stats[0]['bytes']} ({stats[0]['bytes'] / args.writes:.0f} per change)")
+    print(f"one full poll of {args.products} products: {poll_bytes} bytes")
+    print(f"slow subscriber received {slow_received} changes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=200, help="writes per second")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds the slow reader sleeps per chunk")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+        os.environ.setdefault("INVENTORY_SLOW_QUERY_LOG", os.path.join(tmp, "slow-queries.log"))
+        populate(os.environ["INVENTORY_DB"], args.products)
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Overhead of request, database and encode metrics on a hot read.
+
+Times GET /products/{id} against an app built without the metrics middleware
+and one built with it, on the same throwaway database, then scrapes /metrics
+once. Database and encode timings are recorded in both runs.
+
+    python benchmarks/bench_metrics.py --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def populate(path):
+    import migrations
+    import seed
+    from database import connect
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    seed.seed(conn)
+    conn.close()
+
+
+async def drive(app, args):
+    import httpx
+
+    latencies = []
+
+    async def client_loop(client):
+        for _ in range(args.requests // args.concurrency):
+            started = time.perf_counter()
+            response = await client.get(f"/products/{random.randint(1, 5)}")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    transport = httpx.ASGITransport(app=app)
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+        rate = len(latencies) / (time.perf_counter() - started)
+        started = time.perf_counter()
+        scrape = await client.get("/metrics")
+        scrape_ms = (time.perf_counter() - started) * 1000
+    return latencies, rate, scrape, scrape_ms
+
+
+async def run(args):
+    import config
+    import main
+
+    populate(os.environ["INVENTORY_DB"])
+    for enabled in (False, True):
+        config.METRICS_ENABLED = enabled
+        app = main.create_app()
+        latencies, rate, scrape, scrape_ms = await drive(app, args)
+        label = "metrics on " if enabled else "metrics off"
+        print(f"{label}: {rate:8.0f} req/s  p50 {percentile(latencies, 50):6.2f} ms  "
+              f"p99 {percentile(latencies, 99):6.2f} ms")
+        if enabled:
+            print(f"/metrics scrape: {len(scrape.content)} bytes in {scrape_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
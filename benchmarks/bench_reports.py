@@ -0,0 +1,150 @@
+"""Report latency per analytics backend, and sale latency while reports run.
+
+Fills a throwaway database with --sales sales, times each /reports query on
+every backend that can start here, then measures POST /sales/ latency while
+report pollers run, first with the reports on the request pool (as the
+analytics routes used to run) and then on the separate analytics engine.
+
+    python benchmarks/bench_reports.py --sales 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def populate(path, products, sales):
+    import migrations
+    from database import connect, transaction
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    with transaction(conn):
+        conn.executemany("INSERT INTO suppliers (name, email) VALUES (?, ?)",
+                         ((f"Supplier {i}", f"s{i}@example.com") for i in range(50)))
+        conn.executemany("INSERT INTO skus (name, location, capacity) VALUES (?, ?, ?)",
+                         ((f"SKU {i}", f"Location {i % 20}", 10 ** 6) for i in range(100)))
+        conn.executemany(
+            "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?)",
+            ((i % 100 + 1, f"Product {i}", 2.5, 10 ** 9, i % 50 + 1) for i in range(products)),
+        )
+        start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+        conn.executemany(
+            "INSERT INTO sales (product_id, quantity, price, sale_date) VALUES (?, ?, ?, ?)",
+            (
+                (random.randint(1, products), quantity, quantity * 2.5,
+                 time.strftime("%Y-%m-%d", time.localtime(start + random.randrange(365) * 86400)))
+                for quantity in (random.randint(1, 5) for _ in range(sales))
+            ),
+        )
+    conn.close()
+
+
+def report_queries():
+    import analytics
+
+    return {
+        "supplier-revenue": analytics.supplier_revenue_query("2025-01-01", "2025-12-31"),
+        "top-products": analytics.top_products_query("2025-01-01", "2025-12-31", 10),
+        "stock-value": (analytics.STOCK_VALUE_QUERY, []),
+    }
+
+
+async def time_backends(path, repeat):
+    import analytics_engine
+
+    for backend in ("sqlite", "duckdb"):
+        engine = analytics_engine.AnalyticsEngine(path, backend, 2)
+        try:
+            engine.start()
+        except Exception as exc:
+            print(f"{backend:6s} unavailable: {str(exc).splitlines()[0]}")
+            continue
+        try:
+            for name, (sql, params) in report_queries().items():
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    await engine.fetchall(sql, params)
+                    timings.append(time.perf_counter() - started)
+                print(f"{backend:6s} {name:16s} {min(timings) * 1000:8.1f} ms")
+        finally:
+            engine.stop()
+
+
+async def sale_latency(client, main, on_pool, args):
+    import analytics_engine
+
+    sql, params = report_queries()["supplier-revenue"]
+    stop = asyncio.Event()
+
+    async def poller():
+        while not stop.is_set():
+            if on_pool:
+                await main.database.run(analytics_engine._fetchall, sql, params)
+            else:
+                (await client.get("/reports/supplier-revenue?from=2025-01-01&to=2025-12-31")).raise_for_status()
+
+    latencies = []
+
+    async def seller():
+        for _ in range(args.requests // args.concurrency):
+            started = time.perf_counter()
+            response = await client.post("/sales/", json={"product_id": random.randint(1, 1000), "quantity": 1, "price": 2.5})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    pollers = [asyncio.create_task(poller()) for _ in range(args.pollers)]
+    await asyncio.sleep(0.05)
+    await asyncio.gather(*(seller() for _ in range(args.concurrency)))
+    stop.set()
+    await asyncio.gather(*pollers)
+    return latencies
+
+
+async def run(args):
+    import httpx
+
+    path = os.environ["INVENTORY_DB"]
+    populate(path, 1000, args.sales)
+    await time_backends(path, args.repeat)
+
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, on_pool in (("reports on request pool", True), ("reports on analytics engine", False)):
+            samples = await sale_latency(client, main, on_pool, args)
+            print(f"POST /sales/ with {label:27s}: p50 {percentile(samples, 50):7.2f} ms  "
+                  f"p99 {percentile(samples, 99):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pollers", type=int, default=8, help="concurrent report pollers")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Encode a large GET /products page: legacy path versus pre-encoded orjson.
+
+    python benchmarks/bench_serialization.py --rows 100000
+
+The legacy path is what the route did before: tuples through FastAPI's
+jsonable_encoder and the stdlib JSONResponse. The new path builds keyed rows
+from one column tuple and encodes them once with orjson.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def legacy(rows):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def fast(columns, rows):
+    import serialization
+
+    return serialization.json_body_response(serialization.encode_rows(columns, rows, True)).body
+
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import listing
+    import serialization
+
+    columns = listing.TABLE_COLUMNS['products']
+    rows = [(i, i % 10 + 1, f"Product {i}", 9.99, i % 500, i % 5 + 1) for i in range(1, args.rows + 1)]
+
+    legacy_time, legacy_size = best_of(args.repeat, legacy, rows)
+    fast_time, fast_size = best_of(args.repeat, fast, columns, rows)
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"{args.rows} rows, legacy tuples:       {legacy_time * 1000:8.1f} ms ({legacy_size} bytes)")
+    print(f"{args.rows} rows, keyed via {encoder:6s}: {fast_time * 1000:8.1f} ms ({fast_size} bytes)")
+    print(f"speed-up: {legacy_time / fast_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Browsing a 500k-row orders table: paged list requests and the virtual TableView.
+
+Fills a throwaway database with --orders orders and serves it with uvicorn.
+First it times the list requests the TableView makes: a counted first page,
+pages at random offsets, and the same sorted by customer e-mail. For
+comparison it times the single unpaged GET /orders/ that the old
+clear-and-reload refresh made. Then, when tkinter1's dependencies and a
+display are available, it opens a TableView on /orders/ and times the first
+paint and jumps to random scroll positions until the window is filled.
+--legacy also times filling a plain Treeview with every row, as the old
+TableView did.
+
+    python benchmarks/bench_tableview.py --orders 500000 --jumps 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+FIELDS = ("id", "product_id", "quantity", "customer_name", "customer_email")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(f"{label:40s} p50 {percentile(samples, 50):8.1f} ms  p95 {percentile(samples, 95):8.1f} ms"
+          f"  max {max(samples):8.1f} ms")
+
+
+def populate(path, orders):
+    import migrations
+    from database import connect, transaction
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    with transaction(conn):
+        conn.execute("INSERT INTO suppliers (name, email) VALUES ('Supplier', 'supplier@example.com')")
+        conn.execute("INSERT INTO skus (name, location, capacity) VALUES ('SKU', 'Location', 1000000000)")
+        conn.executemany(
+            "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (1, ?, 2.5, 1000000, 1)",
+            ((f"Product {i}",) for i in range(1000)),
+        )
+        conn.executemany(
+            "INSERT INTO orders (product_id, quantity, customer_name, customer_email) VALUES (?, ?, ?, ?)",
+            ((i % 1000 + 1, i % 5 + 1, f"Customer {i}", f"customer{i % 50000}@example.com") for i in range(orders)),
+        )
+    conn.close()
+
+
+def serve(port):
+    import uvicorn
+
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def bench_requests(base_url, args, rng):
+    import httpx
+
+    page = {"limit": args.page_size, "fields": ",".join(FIELDS)}
+    with httpx.Client(base_url=base_url, headers={"X-Row-Format": "tuple"}, timeout=None) as client:
+        def timed(params):
+            started = time.perf_counter()
+            response = client.get("/orders/", params=params)
+            response.raise_for_status()
+            return (time.perf_counter() - started) * 1000
+
+        report("first page with count", [timed(dict(page, offset=0, count="true")) for _ in range(args.jumps)])
+        report("page at a random offset", [timed(dict(page, offset=rng.randrange(args.orders)))
+                                           for _ in range(args.jumps)])
+        report("sorted page at a random offset", [timed(dict(page, offset=rng.randrange(args.orders),
+                                                             sort="customer_email"))
+                                                  for _ in range(args.jumps)])
+        started = time.perf_counter()
+        response = client.get("/orders/")
+        response.raise_for_status()
+        rows = response.json()
+        print(f"{'unpaged GET /orders/ (old refresh)':40s} {(time.perf_counter() - started) * 1000:8.1f} ms"
+              f"  {len(response.content) / 2 ** 20:.1f} MiB for {len(rows)} rows")
+    return rows
+
+
+def pump_until(root, done, timeout=30):
+    started = time.perf_counter()
+    while not done():
+        root.update()
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError("the table did not fill in time")
+        time.sleep(0.001)
+    return (time.perf_counter() - started) * 1000
+
+
+def bench_gui(base_url, args, rng, rows):
+    import tkinter as tk
+    from tkinter import ttk
+
+    try:
+        import tkinter1
+        root = tk.Tk()
+    except (ImportError, tk.TclError) as exc:
+        print(f"skipping the TableView run: {exc}")
+        return
+    root.geometry("900x700")
+    io = tkinter1.BackgroundClient(root, base_url)
+    table = tkinter1.TableView(root, io, "/orders/", "Orders", columns=list(FIELDS), fields=list(FIELDS))
+    table.pack(expand=True, fill="both")
+    root.update()
+
+    def filled():
+        items = table.tree.get_children()
+        return table.total is not None and items and all(table.tree.item(item, "values") for item in items)
+
+    table.reload()
+    print(f"{'TableView first paint':40s} {pump_until(root, filled):8.1f} ms")
+    jumps = []
+    for _ in range(args.jumps):
+        table.yview("moveto", rng.random())
+        jumps.append(pump_until(root, filled))
+    report("TableView jump to a random position", jumps)
+    print(f"{'TableView Treeview items':40s} {len(table.tree.get_children()):8d}"
+          f"  ({len(table._pages)} pages of {table.PAGE_SIZE} rows cached)")
+
+    if args.legacy:
+        tree = ttk.Treeview(root, columns=FIELDS, show="headings")
+        started = time.perf_counter()
+        for row in rows:
+            tree.insert("", "end", values=row)
+        root.update()
+        print(f"{'plain Treeview insert (old TableView)':40s} {(time.perf_counter() - started) * 1000:8.1f} ms"
+              f"  {len(tree.get_children())} items")
+        started = time.perf_counter()
+        for item in tree.get_children():
+            tree.delete(item)
+        print(f"{'plain Treeview clear (old TableView)':40s} {(time.perf_counter() - started) * 1000:8.1f} ms")
+    io.close()
+    root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=500000)
+    parser.add_argument("--jumps", type=int, default=50, help="random pages and scroll jumps to time")
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--legacy", action="store_true", help="also fill a plain Treeview with every row")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+        os.environ.setdefault("INVENTORY_SLOW_QUERY_LOG", os.path.join(tmp, "slow-queries.log"))
+        started = time.perf_counter()
+        populate(os.environ["INVENTORY_DB"], args.orders)
+        print(f"populated {args.orders} orders in {time.perf_counter() - started:.1f} s")
+        server, thread = serve(args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+        rows = bench_requests(base_url, args, rng)
+        bench_gui(base_url, args, rng, rows)
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
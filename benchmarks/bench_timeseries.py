@@ -0,0 +1,107 @@
+"""A year of daily sales for the whole catalog: raw GROUP BY versus the rollup.
+
+Fills a throwaway database with --products products selling --per-day times a
+day for a year, then times GET /sales/timeseries?bucket=week against the same
+aggregation run directly over the sales table.
+
+    python benchmarks/bench_timeseries.py --products 1000 --per-day 3
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+RAW_QUERY = '''
+    SELECT date(sale_date, 'weekday 0', '-6 days') AS bucket, SUM(quantity), SUM(price), COUNT(*)
+    FROM sales
+    WHERE sale_date >= ? AND sale_date <= ?
+    GROUP BY bucket
+    ORDER BY bucket
+'''
+
+
+def populate(path, products, per_day, first_day):
+    import migrations
+    from database import connect, transaction
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    with transaction(conn):
+        conn.executemany(
+            "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?)",
+            ((i % 10 + 1, f"Product {i}", 2.5, 1000, i % 5 + 1) for i in range(products)),
+        )
+        days = [(first_day + datetime.timedelta(days=day)).isoformat() for day in range(365)]
+        conn.executemany(
+            "INSERT INTO sales (product_id, quantity, price, sale_date) VALUES (?, ?, ?, ?)",
+            (
+                (product_id, quantity, quantity * 2.5, day)
+                for day in days
+                for product_id in range(1, products + 1)
+                for quantity in random.choices(range(1, 6), k=per_day)
+            ),
+        )
+    conn.close()
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+async def run(args):
+    import httpx
+
+    import main
+    from database import connect
+
+    first_day = datetime.date(2025, 1, 1)
+    last_day = first_day + datetime.timedelta(days=364)
+    started = time.perf_counter()
+    populate(os.environ["INVENTORY_DB"], args.products, args.per_day, first_day)
+    sales = args.products * args.per_day * 365
+    print(f"loaded {sales} sales in {time.perf_counter() - started:.1f} s")
+
+    conn = connect()
+    raw = best_of(args.repeat, lambda: conn.execute(RAW_QUERY, (first_day.isoformat(), last_day.isoformat())).fetchall())
+    conn.close()
+
+    url = f"/sales/timeseries?bucket=week&from={first_day}&to={last_day}"
+    transport = httpx.ASGITransport(app=main.app)
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = await client.get(url)
+            response.raise_for_status()
+            timings.append(time.perf_counter() - started)
+    print(f"raw GROUP BY over sales:      {raw * 1000:8.1f} ms")
+    print(f"GET /sales/timeseries (week): {min(timings) * 1000:8.1f} ms ({len(response.json())} buckets)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--per-day", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
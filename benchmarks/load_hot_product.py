@@ -0,0 +1,85 @@
+"""Concurrent POST /sales/ against a single hot product.
+
+Fires many small sales at one product from concurrent clients and checks the
+books afterwards: stock never goes negative, every accepted sale has a sales
+row, and accepted units exactly match the stock that was taken.
+
+    python benchmarks/load_hot_product.py --stock 500 --sales 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+async def run(args):
+    import httpx
+
+    import main
+    import migrations
+    import seed
+
+    path = os.environ["INVENTORY_DB"]
+    conn = sqlite3.connect(path)
+    migrations.migrate(conn)
+    seed.seed(conn)
+    conn.execute("UPDATE products SET quantity = ? WHERE id = 1", (args.stock,))
+    conn.commit()
+
+    statuses = []
+    pending = iter(range(args.sales))
+
+    async def client_loop(client):
+        for _ in pending:
+            response = await client.post("/sales/", json={"product_id": 1, "quantity": args.units, "price": 1.0})
+            statuses.append(response.status_code)
+
+    transport = httpx.ASGITransport(app=main.app)
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    accepted = statuses.count(200)
+    rejected = statuses.count(400)
+    on_hand = conn.execute("SELECT quantity FROM products WHERE id = 1").fetchone()[0]
+    recorded = conn.execute("SELECT COUNT(*), COALESCE(SUM(quantity), 0) FROM sales WHERE product_id = 1").fetchone()
+    conn.close()
+
+    print(f"{len(statuses)} sales in {elapsed:.2f}s ({len(statuses) / elapsed:.0f}/s): "
+          f"{accepted} accepted, {rejected} out of stock, {len(statuses) - accepted - rejected} errors")
+    print(f"stock {args.stock} -> {on_hand}, sales rows {recorded[0]}, units recorded {recorded[1]}")
+
+    ok = (
+        on_hand >= 0
+        and recorded[0] == accepted
+        and recorded[1] == accepted * args.units == args.stock - on_hand
+        and accepted + rejected == len(statuses)
+    )
+    print("OK" if ok else "INCONSISTENT")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--sales", type=int, default=2000)
+    parser.add_argument("--units", type=int, default=1, help="units per sale")
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTORY_DB"] = os.path.join(tmp, "load.db")
+        ok = asyncio.run(run(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Throughput of `python main.py` as the number of worker processes grows.
+
+Starts the real server once per worker count against the same throwaway
+database and drives it over HTTP with a mix of product lookups, list pages
+and sales from several load-generator processes. Afterwards the analytics
+summaries are checked, since concurrent writers from different workers must
+still leave them consistent.
+
+    python benchmarks/load_workers.py --workers 1 2 4 --duration 10
+
+Scaling needs free cores for both the workers and the load generators.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def populate(path, products):
+    import migrations
+    import seed
+    from database import connect, transaction
+
+    conn = connect(path)
+    migrations.migrate(conn)
+    seed.seed(conn)
+    with transaction(conn):
+        conn.executemany(
+            "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?)",
+            ((i % 10 + 1, f"Load {i}", 2.5, 10 ** 9, i % 5 + 1) for i in range(products)),
+        )
+    conn.close()
+
+
+async def drive(base_url, duration, concurrency, products, write_ratio, list_ratio):
+    import httpx
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            product_id = random.randint(1, products)
+            roll = random.random()
+            started = time.perf_counter()
+            if roll < write_ratio:
+                response = await client.post("/sales/", json={"product_id": product_id, "quantity": 1, "price": 2.5})
+            elif roll < write_ratio + list_ratio:
+                response = await client.get("/products", params={"after": product_id, "limit": 50})
+            else:
+                response = await client.get(f"/products/{product_id}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def generator(args):
+    return asyncio.run(drive(*args))
+
+
+def wait_until_up(base_url, process, timeout=30):
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/products/1", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run_workers(args, workers, env):
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = dict(env, INVENTORY_WORKERS=str(workers), INVENTORY_PORT=str(args.port), INVENTORY_HOST="127.0.0.1")
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base_url, server)
+        job = (base_url, args.duration, args.concurrency, args.products, args.write_ratio, args.list_ratio)
+        with multiprocessing.Pool(args.clients) as clients:
+            results = clients.map(generator, [job] * args.clients)
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=30)
+    latencies = [sample for samples, _ in results for sample in samples]
+    errors = sum(errors for _, errors in results)
+    return len(latencies) / args.duration, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10, help="seconds per worker count")
+    parser.add_argument("--clients", type=int, default=2, help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per load generator")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--list-ratio", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load.db")
+        env = dict(os.environ, INVENTORY_DB=path)
+        env.pop("INVENTORY_CACHE_SHARED_NAME", None)
+        os.environ["INVENTORY_DB"] = path
+        populate(path, args.products)
+
+        baseline = None
+        for workers in args.workers:
+            rate, latencies, errors = run_workers(args, workers, env)
+            baseline = baseline or rate
+            print(
+                f"{workers} worker(s): {rate:8.0f} req/s ({rate / baseline:4.2f}x)  "
+                f"p50 {percentile(latencies, 50):7.2f} ms  p99 {percentile(latencies, 99):7.2f} ms  "
+                f"errors {errors}"
+            )
+
+        import analytics
+        from database import connect
+
+        conn = connect(path)
+        mismatches = analytics.check_consistency(conn)
+        conn.close()
+        print(f"summary tables after the run: {len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
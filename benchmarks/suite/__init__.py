@@ -0,0 +1,17 @@
+"""Reproducible load benchmark covering every route in main.py.
+
+Runs a weighted mix of operations from several concurrent virtual clients:
+catalog reads, sales on a few hot products, order CRUD, analytics polling
+with ETags, catalog writes and admin routes. By default it drives main.app in
+process through an ASGI transport against a freshly populated throwaway
+database; with --url it drives a running server instead. Per-route
+throughput and p50/p95/p99 latency are printed and can be saved as JSON,
+and a run can be gated against an earlier result:
+
+    python -m benchmarks.suite run --requests 20000 --output results/base.json
+    python -m benchmarks.suite run --baseline results/base.json --max-regression 15
+    python -m benchmarks.suite compare results/base.json results/new.json
+
+The same --seed and options produce the same sequence of operations per
+virtual client, so two runs differ only in how fast the server answers.
+"""
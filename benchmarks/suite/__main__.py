@@ -0,0 +1,149 @@
+"""Command line for the load benchmark; see benchmarks/suite/__init__.py."""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT)
+
+from benchmarks.suite import results, workload  # noqa: E402
+
+
+async def drive(client, args, mix):
+    recorder = results.Recorder()
+    catalog = await workload.discover(client, args.hot_products)
+    clients = [
+        workload.VirtualClient(client, catalog, recorder, random.Random(args.seed * 1000 + index), mix, args.hot_ratio)
+        for index in range(args.concurrency)
+    ]
+    per_client = max(1, args.requests // args.concurrency)
+    warmup = args.warmup // args.concurrency
+
+    async def steps(virtual, count):
+        for _ in range(count):
+            await virtual.step()
+
+    recorder.enabled = False
+    await asyncio.gather(*(steps(virtual, warmup) for virtual in clients))
+    recorder.enabled = True
+    started = time.perf_counter()
+    await asyncio.gather(*(steps(virtual, per_client) for virtual in clients))
+    return recorder.summary(time.perf_counter() - started)
+
+
+async def run_in_process(args, mix):
+    import httpx
+
+    path = os.environ["INVENTORY_DB"]
+    started = time.perf_counter()
+    workload.populate(path, args.products, args.sales, args.seed)
+    print(f"populated {args.products} products and {args.sales} sales in {time.perf_counter() - started:.1f} s",
+          file=sys.stderr)
+
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    headers = {"X-Row-Format": "dict"}
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with main.app.router.lifespan_context(main.app), \
+            httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=None) as client:
+        return await drive(client, args, mix)
+
+
+async def run_remote(args, mix):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    headers = {"X-Row-Format": "dict"}
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, timeout=60, limits=limits) as client:
+        return await drive(client, args, mix)
+
+
+def run(args):
+    mix = workload.parse_mix(args.mix)
+    options = {
+        "target": args.url or "in-process",
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "mix": mix,
+        "hot_products": args.hot_products,
+        "hot_ratio": args.hot_ratio,
+    }
+    if args.url:
+        total, routes = asyncio.run(run_remote(args, mix))
+    else:
+        options.update(products=args.products, sales=args.sales)
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["INVENTORY_DB"] = os.path.join(tmp, "bench.db")
+            os.environ.setdefault("INVENTORY_SLOW_QUERY_LOG", os.path.join(tmp, "slow-queries.log"))
+            total, routes = asyncio.run(run_in_process(args, mix))
+    result = results.build(options, total, routes)
+    results.print_summary(total, routes)
+    if args.output:
+        results.save(result, args.output)
+        print(f"results written to {args.output}")
+    if args.baseline:
+        return gate(results.load(args.baseline), result, args)
+    return 1 if total["errors"] and args.fail_on_errors else 0
+
+
+def gate(baseline, current, args):
+    regressions = results.compare(
+        baseline, current, args.metric, args.max_regression, args.min_delta_ms, args.min_requests,
+    )
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.max_regression}%:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("no regressions")
+    return 0
+
+
+def add_gate_options(parser):
+    parser.add_argument("--metric", default="p95_ms", choices=("mean_ms", "p50_ms", "p95_ms", "p99_ms"))
+    parser.add_argument("--max-regression", type=float, default=10.0, help="percent slowdown that fails the gate")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore smaller absolute slowdowns")
+    parser.add_argument("--min-requests", type=int, default=50, help="ignore routes with fewer samples")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the workload and report per-route latency")
+    run_parser.add_argument("--url", help="drive a running server instead of main.app in process")
+    run_parser.add_argument("--requests", type=int, default=10000, help="operations across all clients")
+    run_parser.add_argument("--warmup", type=int, default=500, help="operations run before measuring")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="virtual clients")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--mix", help=f"operation weights, e.g. read=60,sale=30 (default "
+                                          f"{','.join(f'{k}={v}' for k, v in workload.MIX.items())})")
+    run_parser.add_argument("--hot-products", type=int, default=10, help="products most sales and reads go to")
+    run_parser.add_argument("--hot-ratio", type=float, default=0.8, help="share of product picks from the hot set")
+    run_parser.add_argument("--products", type=int, default=10000, help="catalog size when run in process")
+    run_parser.add_argument("--sales", type=int, default=200000, help="sales history when run in process")
+    run_parser.add_argument("--output", help="write results as JSON to this file")
+    run_parser.add_argument("--baseline", help="compare against this result and fail on regressions")
+    run_parser.add_argument("--fail-on-errors", action="store_true", help="exit 1 when any request failed")
+    add_gate_options(run_parser)
+
+    compare_parser = commands.add_parser("compare", help="compare two saved results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    add_gate_options(compare_parser)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return gate(results.load(args.baseline), results.load(args.current), args)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Per-route latency samples, their summary, and comparison between runs."""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.enabled = True
+
+    def record(self, method, route, seconds, status, ok):
+        if not self.enabled:
+            return
+        key = f"{method} {route}"
+        self.samples[key].append(seconds * 1000)
+        self.statuses[key][str(status)] += 1
+        if not ok:
+            self.errors[key] += 1
+
+    def summary(self, elapsed):
+        routes = {}
+        for key in sorted(self.samples):
+            ordered = sorted(self.samples[key])
+            routes[key] = {
+                'requests': len(ordered),
+                'errors': self.errors[key],
+                'statuses': dict(self.statuses[key]),
+                'throughput': round(len(ordered) / elapsed, 2),
+                'mean_ms': round(sum(ordered) / len(ordered), 3),
+                **{f'p{pct}_ms': round(percentile(ordered, pct), 3) for pct in PERCENTILES},
+                'max_ms': round(ordered[-1], 3),
+            }
+        everything = sorted(sample for samples in self.samples.values() for sample in samples)
+        total = {
+            'requests': len(everything),
+            'errors': sum(self.errors.values()),
+            'elapsed_s': round(elapsed, 3),
+            'throughput': round(len(everything) / elapsed, 2) if elapsed else 0.0,
+        }
+        if everything:
+            total.update({f'p{pct}_ms': round(percentile(everything, pct), 3) for pct in PERCENTILES})
+        return total, routes
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build(options, total, routes):
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'options': options,
+        'total': total,
+        'routes': routes,
+    }
+
+
+def save(result, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_summary(total, routes, out=sys.stdout):
+    print(f"{'route':44s} {'reqs':>7s} {'err':>5s} {'req/s':>9s} {'p50':>8s} {'p95':>8s} {'p99':>8s}", file=out)
+    for key, stats in routes.items():
+        print(f"{key:44s} {stats['requests']:7d} {stats['errors']:5d} {stats['throughput']:9.1f} "
+              f"{stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f}", file=out)
+    print(f"{'total':44s} {total['requests']:7d} {total['errors']:5d} {total['throughput']:9.1f} "
+          f"{total.get('p50_ms', 0):8.2f} {total.get('p95_ms', 0):8.2f} {total.get('p99_ms', 0):8.2f}", file=out)
+
+
+def compare(baseline, current, metric='p95_ms', max_regression=10.0, min_delta_ms=1.0, min_requests=50,
+            out=sys.stdout):
+    """Print per-route changes and return the regressions beyond the gate.
+
+    A route regresses when its metric grows by more than max_regression
+    percent and by more than min_delta_ms, so sub-millisecond noise on fast
+    routes does not fail the gate. Routes with fewer than min_requests samples
+    in either run are shown but not gated. Overall throughput regresses when
+    it drops by more than max_regression percent.
+    """
+    regressions = []
+    print(f"{'route':44s} {'base ' + metric:>14s} {'new':>10s} {'change':>8s}", file=out)
+    for key in sorted(set(baseline['routes']) | set(current['routes'])):
+        before, after = baseline['routes'].get(key), current['routes'].get(key)
+        if before is None or after is None:
+            print(f"{key:44s} {'only in ' + ('new' if before is None else 'baseline'):>34s}", file=out)
+            continue
+        change = (after[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+        gated = min(before['requests'], after['requests']) >= min_requests
+        flag = ''
+        if gated and change > max_regression and after[metric] - before[metric] > min_delta_ms:
+            regressions.append(f"{key}: {metric} {before[metric]:.2f} -> {after[metric]:.2f} ms ({change:+.1f}%)")
+            flag = '  REGRESSION'
+        print(f"{key:44s} {before[metric]:14.2f} {after[metric]:10.2f} {change:+7.1f}%{flag}", file=out)
+    before, after = baseline['total']['throughput'], current['total']['throughput']
+    change = (after - before) / before * 100 if before else 0.0
+    print(f"{'throughput (req/s)':44s} {before:14.1f} {after:10.1f} {change:+7.1f}%", file=out)
+    if change < -max_regression:
+        regressions.append(f"throughput {before:.1f} -> {after:.1f} req/s ({change:+.1f}%)")
+    return regressions
@@ -0,0 +1,265 @@
+"""The operations a virtual client runs, and the data they run against."""
+import datetime
+import itertools
+import random
+import time
+
+# Default share of each operation kind in the mix
+MIX = {
+    'read': 50,
+    'sale': 20,
+    'orders': 10,
+    'analytics': 10,
+    'catalog': 5,
+    'admin': 5,
+}
+
+# Requests per analytics poll cycle reuse ETags, as a dashboard would
+ANALYTICS_URLS = (
+    ('/capacity-analytics', '/capacity-analytics'),
+    ('/sales-analytics', '/sales-analytics'),
+    ('/reports/supplier-revenue', '/reports/supplier-revenue?from=2025-01-01&to=2025-12-31'),
+    ('/reports/top-products', '/reports/top-products?from=2025-01-01&to=2025-12-31&limit=10'),
+    ('/reports/stock-value', '/reports/stock-value'),
+    ('/sales/timeseries', '/sales/timeseries?from=2025-01-01&to=2025-12-31&bucket=week'),
+)
+
+
+def parse_mix(text):
+    """'read=60,sale=30' -> MIX with those weights replaced."""
+    mix = dict(MIX)
+    for part in filter(None, (part.strip() for part in (text or '').split(','))):
+        name, _, weight = part.partition('=')
+        if name not in MIX:
+            raise ValueError(f"Unknown operation {name!r}; expected one of {', '.join(MIX)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def populate(path, products, sales, seed):
+    """Fill a new database with a catalog and a year of sales history."""
+    import migrations
+    from database import connect, transaction
+
+    rng = random.Random(seed)
+    conn = connect(path)
+    migrations.migrate(conn)
+    with transaction(conn):
+        conn.executemany("INSERT INTO suppliers (name, email) VALUES (?, ?)",
+                         ((f"Supplier {i}", f"supplier{i}@example.com") for i in range(50)))
+        conn.executemany("INSERT INTO skus (name, location, capacity) VALUES (?, ?, ?)",
+                         ((f"SKU {i}", f"Location {i % 20}", 10 ** 12) for i in range(100)))
+        conn.executemany(
+            "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?)",
+            ((i % 100 + 1, f"Product {i}", round(rng.uniform(1, 50), 2), 10 ** 9, i % 50 + 1)
+             for i in range(products)),
+        )
+        conn.executemany(
+            "INSERT INTO orders (product_id, quantity, customer_name, customer_email) VALUES (?, ?, ?, ?)",
+            ((rng.randint(1, products), rng.randint(1, 5), f"Customer {i}", f"customer{i}@example.com")
+             for i in range(products)),
+        )
+        first_day = datetime.date(2025, 1, 1)
+        conn.executemany(
+            "INSERT INTO sales (product_id, quantity, price, sale_date) VALUES (?, ?, ?, ?)",
+            ((rng.randint(1, products), quantity, quantity * 2.5,
+              (first_day + datetime.timedelta(days=rng.randrange(365))).isoformat())
+             for quantity in (rng.randint(1, 5) for _ in range(sales))),
+        )
+    conn.close()
+
+
+class Catalog:
+    """Ids discovered from the server before the run, shared by every client."""
+
+    def __init__(self, products, skus, suppliers, orders, hot_products):
+        self.products = products
+        self.skus = skus
+        self.suppliers = suppliers
+        self.orders = orders
+        self.hot = products[:hot_products]
+
+
+async def _ids(client, path, most):
+    ids = []
+    after = 0
+    while len(ids) < most:
+        response = await client.get(path, params={'after': after, 'limit': min(1000, most - len(ids)),
+                                                  'fields': 'id'})
+        response.raise_for_status()
+        page = [row['id'] for row in response.json()]
+        if not page:
+            break
+        ids.extend(page)
+        after = page[-1]
+    return ids
+
+
+async def discover(client, hot_products, most=10000):
+    catalog = Catalog(
+        await _ids(client, '/products', most),
+        await _ids(client, '/skus', most),
+        await _ids(client, '/suppliers/', most),
+        await _ids(client, '/orders/', most),
+        hot_products,
+    )
+    if not catalog.products or not catalog.skus or not catalog.suppliers:
+        raise RuntimeError("the server has no products, SKUs or suppliers to run against")
+    return catalog
+
+
+class VirtualClient:
+    """One simulated user: a seeded random stream of operations over one HTTP client.
+
+    Every request is recorded under its route template, so /products/17 and
+    /products/18 land in the same bucket.
+    """
+
+    _unique = itertools.count()
+
+    def __init__(self, client, catalog, recorder, rng, mix, hot_ratio):
+        self.client = client
+        self.catalog = catalog
+        self.recorder = recorder
+        self.rng = rng
+        self.hot_ratio = hot_ratio
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.etags = {}
+        self.tag = f"{id(self):x}"
+
+    async def request(self, method, route, url, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception as exc:
+            self.recorder.record(method, route, time.perf_counter() - started, type(exc).__name__, False)
+            return None
+        self.recorder.record(method, route, time.perf_counter() - started, response.status_code,
+                             response.status_code in expect)
+        return response
+
+    async def step(self):
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        await getattr(self, f'op_{kind}')()
+
+    def product(self):
+        if self.catalog.hot and self.rng.random() < self.hot_ratio:
+            return self.rng.choice(self.catalog.hot)
+        return self.rng.choice(self.catalog.products)
+
+    def name(self, prefix):
+        return f"{prefix} {self.tag}-{next(self._unique)}"
+
+    async def op_read(self):
+        rng, catalog = self.rng, self.catalog
+        roll = rng.random()
+        if roll < 0.4:
+            await self.request('GET', '/products/{product_id}', f'/products/{self.product()}')
+        elif roll < 0.55:
+            await self.request('GET', '/products', '/products',
+                               params={'after': rng.choice(catalog.products), 'limit': 50})
+        elif roll < 0.65:
+            await self.request('GET', '/skus/{sku_id}', f'/skus/{rng.choice(catalog.skus)}')
+        elif roll < 0.7:
+            await self.request('GET', '/skus', '/skus', params={'limit': 50})
+        elif roll < 0.8:
+            await self.request('GET', '/suppliers/{supplier_id}', f'/suppliers/{rng.choice(catalog.suppliers)}')
+        elif roll < 0.85:
+            await self.request('GET', '/suppliers/', '/suppliers/', params={'limit': 50})
+        elif roll < 0.93 and catalog.orders:
+            await self.request('GET', '/orders/{order_id}', f'/orders/{rng.choice(catalog.orders)}')
+        else:
+            await self.request('GET', '/sales/{product_id}', f'/sales/{self.product()}',
+                               params={'from': '2025-06-01', 'to': '2025-06-30'})
+
+    async def op_sale(self):
+        # 400 is an out-of-stock product on a server with real quantities
+        await self.request('POST', '/sales/', '/sales/', expect=(200, 400),
+                           json={'product_id': self.product(), 'quantity': 1, 'price': 2.5})
+
+    async def op_orders(self):
+        email = f"{self.name('bench').replace(' ', '-')}@example.com"
+        order = {'product_id': self.product(), 'quantity': self.rng.randint(1, 5),
+                 'customer_name': 'Bench Customer', 'customer_email': email}
+        await self.request('POST', '/orders/', '/orders/', json=order)
+        response = await self.request('GET', '/orders/', '/orders/', params={'customer_email': email})
+        if response is None or response.status_code != 200 or not response.json():
+            return
+        order_id = response.json()[0]['id']
+        await self.request('GET', '/orders/{order_id}', f'/orders/{order_id}')
+        await self.request('PUT', '/orders/{order_id}', f'/orders/{order_id}', json=dict(order, quantity=order['quantity'] + 1))
+        await self.request('DELETE', '/orders/{order_id}', f'/orders/{order_id}')
+
+    async def op_analytics(self):
+        route, url = self.rng.choice(ANALYTICS_URLS)
+        headers = {'If-None-Match': self.etags[url]} if url in self.etags else {}
+        response = await self.request('GET', route, url, expect=(200, 304), headers=headers)
+        if response is not None and 'etag' in response.headers:
+            self.etags[url] = response.headers['etag']
+
+    async def op_catalog(self):
+        rng, catalog = self.rng, self.catalog
+        roll = rng.random()
+        if roll < 0.4:
+            # Product lifecycle on a SKU of its own, so it can be found again by sku_id
+            sku = {'name': self.name('Bench SKU'), 'location': 'Bench', 'capacity': 10 ** 6}
+            response = await self.request('POST', '/skus/bulk', '/skus/bulk', json=[sku])
+            if response is None or response.status_code != 200:
+                return
+            sku_id = response.json()['results'][0]['id']
+            product = {'sku_id': sku_id, 'name': self.name('Bench product'), 'price': 3.5,
+                       'quantity': 100, 'supplier_id': rng.choice(catalog.suppliers)}
+            await self.request('POST', '/products/', '/products/', json=product)
+            response = await self.request('GET', '/products', '/products', params={'sku_id': sku_id})
+            if response is not None and response.status_code == 200 and response.json():
+                product_id = response.json()[0]['id']
+                await self.request('PUT', '/products/{product_id}', f'/products/{product_id}',
+                                   json=dict(product, price=4.5))
+                await self.request('DELETE', '/products/{product_id}', f'/products/{product_id}')
+            await self.request('PUT', '/skus/{sku_id}', f'/skus/{sku_id}', json=dict(sku, capacity=2 * 10 ** 6))
+            await self.request('DELETE', '/skus/{sku_id}', f'/skus/{sku_id}')
+        elif roll < 0.7:
+            email = f"{self.name('supplier').replace(' ', '-')}@example.com"
+            supplier = {'name': self.name('Bench supplier'), 'email': email}
+            await self.request('POST', '/suppliers/', '/suppliers/', json=supplier)
+            response = await self.request('GET', '/suppliers/', '/suppliers/', params={'email': email})
+            if response is not None and response.status_code == 200 and response.json():
+                supplier_id = response.json()[0]['id']
+                await self.request('PUT', '/suppliers/{supplier_id}', f'/suppliers/{supplier_id}',
+                                   json=dict(supplier, name=self.name('Renamed supplier')))
+                await self.request('DELETE', '/suppliers/{supplier_id}', f'/suppliers/{supplier_id}')
+        else:
+            # Bulk insert, update and remove a small batch of products
+            products = [{'sku_id': rng.choice(catalog.skus), 'name': self.name('Bulk product'), 'price': 1.5,
+                         'quantity': 10, 'supplier_id': rng.choice(catalog.suppliers)} for _ in range(10)]
+            response = await self.request('POST', '/products/bulk', '/products/bulk', json=products)
+            if response is None or response.status_code != 200:
+                return
+            ids = [result['id'] for result in response.json()['results']]
+            await self.request('PUT', '/products/bulk', '/products/bulk',
+                               json=[dict(product, id=product_id, price=2.0) for product, product_id in zip(products, ids)])
+            for product_id in ids:
+                await self.request('DELETE', '/products/{product_id}', f'/products/{product_id}')
+
+    async def op_admin(self):
+        roll = self.rng.random()
+        if roll < 0.3:
+            await self.request('GET', '/export/{table}', '/export/suppliers', params={'format': 'ndjson'})
+        elif roll < 0.45:
+            await self.request('GET', '/analytics/consistency', '/analytics/consistency')
+        elif roll < 0.5:
+            await self.request('POST', '/analytics/consistency/repair', '/analytics/consistency/repair')
+        elif roll < 0.65:
+            orders = [{'product_id': self.product(), 'quantity': 1, 'customer_name': 'Bulk Customer',
+                       'customer_email': 'bulk@example.com'} for _ in range(10)]
+            response = await self.request('POST', '/orders/bulk', '/orders/bulk', json=orders)
+            if response is not None and response.status_code == 200:
+                for result in response.json()['results']:
+                    await self.request('DELETE', '/orders/{order_id}', f"/orders/{result['id']}")
+        elif roll < 0.75:
+            await self.request('GET', '/debug/cache', '/debug/cache')
+        elif roll < 0.85:
+            await self.request('GET', '/debug/slow-queries', '/debug/slow-queries')
+        else:
+            await self.request('GET', '/metrics', '/metrics')
@@ -0,0 +1,40 @@
+from database import transaction
+
+# Largest list accepted by one bulk call
+MAX_BULK_ITEMS = 10000
+
+# Bound parameters per IN (...) lookup, well under SQLite's variable limit
+_LOOKUP_CHUNK = 500
+
+
+def insert_many(conn, table, columns, rows):
+    """Insert rows with one executemany in one transaction; return their new ids.
+
+    Inside the write transaction nobody else can insert, and AUTOINCREMENT hands
+    out consecutive ids, so the batch owns the last len(rows) sequence values.
+    """
+    placeholders = ', '.join('?' for _ in columns)
+    with transaction(conn):
+        conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        last = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()[0]
+    return list(range(last - len(rows) + 1, last + 1))
+
+
+def update_many(conn, table, columns, ids, rows):
+    """Update rows by id with one executemany in one transaction.
+
+    Returns the set of ids that existed and were updated.
+    """
+    assignments = ', '.join(f'{column} = ?' for column in columns)
+    with transaction(conn):
+        existing = set()
+        unique_ids = list(set(ids))
+        for start in range(0, len(unique_ids), _LOOKUP_CHUNK):
+            chunk = unique_ids[start:start + _LOOKUP_CHUNK]
+            placeholders = ', '.join('?' for _ in chunk)
+            existing.update(row[0] for row in conn.execute(f'SELECT id FROM {table} WHERE id IN ({placeholders})', chunk))
+        conn.executemany(
+            f'UPDATE {table} SET {assignments} WHERE id = ?',
+            [(*row, row_id) for row_id, row in zip(ids, rows) if row_id in existing],
+        )
+    return existing
@@ -0,0 +1,168 @@
+import atexit
+import os
+import time
+import zlib
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import fcntl
+except ImportError:  # Windows removes a shared-memory block with its last handle
+    fcntl = None
+
+_MISSING = object()
+
+
+class LocalVersions:
+    """Invalidation counters for one process."""
+
+    def __init__(self, slots):
+        self.slots = [0] * slots
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, slot):
+        return self.slots[slot]
+
+    def bump(self, slot):
+        self.slots[slot] += 1
+
+    def close(self):
+        pass
+
+
+class SharedVersions:
+    """Invalidation counters in a named shared-memory block.
+
+    Every worker on the host attaches to the same block, so a bump made by one
+    worker invalidates the matching entries in all of them. Slots are aligned
+    64-bit words; a lost increment between two racing workers is harmless
+    because either write still moves the slot past any stamp taken before it.
+
+    Each attached process holds a shared flock() on lock_path. On close() it
+    lets go and tries for an exclusive one, which only the last process to
+    leave gets, and that process removes the block. A worker that dies without
+    closing drops its lock with it. (On Windows, which has no flock(), the
+    block goes away with its last handle anyway.)
+    """
+
+    def __init__(self, name, slots, lock_path):
+        self._lock_fd = None
+        if fcntl is not None:
+            self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            # Waits while the last user of a previous block is removing it
+            fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=slots * 8)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        # Removal follows the lock above, not the lifetime of whichever worker created it
+        resource_tracker.unregister(self._shm._name, 'shared_memory')
+        self.slots = self._shm.buf.cast('Q')
+        atexit.register(self.close)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, slot):
+        return self.slots[slot]
+
+    def bump(self, slot):
+        self.slots[slot] = (self.slots[slot] + 1) & 0xFFFFFFFFFFFFFFFF
+
+    def close(self):
+        if self.slots is None:
+            return
+        # The cast view must go before the mapping can be closed
+        self.slots.release()
+        self.slots = None
+        self._shm.close()
+        if self._lock_fd is None:
+            return
+        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            pass  # other processes are still attached
+        else:
+            # unlink() unregisters from the resource tracker, so register first
+            resource_tracker.register(self._shm._name, 'shared_memory')
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                # Another process left last a moment ago and removed it
+                resource_tracker.unregister(self._shm._name, 'shared_memory')
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+
+def shared_name(path):
+    """Shared-memory block name for a database file, the same in every worker."""
+    return f'inventory-cache-{zlib.crc32(os.path.abspath(path).encode()):08x}'
+
+
+class EntityCache:
+    """Bounded LRU cache of single rows keyed by (table, id).
+
+    Each key hashes to a version slot. Writers call invalidate() after they
+    commit, which drops the local entry and bumps the slot; an entry is only
+    served while its slot still has the version stamped when it was read from
+    the database, so a read that raced a write is never cached as current.
+    """
+
+    def __init__(self, maxsize, ttl=None, versions=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.versions = versions if versions is not None else LocalVersions(4096)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _slot(self, key):
+        # crc32 rather than hash() so every worker maps a key to the same slot
+        return zlib.crc32(f'{key[0]}:{key[1]}'.encode()) % len(self.versions)
+
+    def stamp(self, key):
+        """Version to pass to set(); take it before reading the row."""
+        return self.versions[self._slot(key)]
+
+    def get(self, key):
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, stamp, expires = entry
+            if stamp == self.versions[self._slot(key)] and (expires is None or expires > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, value, stamp):
+        if self.maxsize <= 0 or stamp != self.versions[self._slot(key)]:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (value, stamp, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, table, *ids):
+        for entity_id in ids:
+            key = (table, entity_id)
+            self._entries.pop(key, None)
+            self.versions.bump(self._slot(key))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,160 @@
+"""Column-oriented encodings of query results.
+
+Three layouts, all built from the same transposed column vectors:
+
+* columns - JSON object mapping each column name to its list of values.
+* packed  - dependency-free binary layout that NumPy can view without copying.
+* arrow   - Arrow IPC stream; needs pyarrow, which is optional.
+
+Packed layout (all integers little-endian):
+
+    uint32 header length | header JSON | padding to 8 bytes | buffers
+
+The header is {"rows": n, "columns": [...]}; each column entry has a name, a
+type (int64, float64 or utf8) and [offset, length] pairs, measured from the
+start of the body, for its buffers. Numeric columns have "values"; utf8
+columns have "offsets" (n + 1 int32 byte offsets) and "data" (UTF-8 bytes).
+A column that contains NULLs also has "validity", one uint8 per row, 0 where
+the value is NULL. Every buffer starts on an 8-byte boundary, so for example
+
+    numpy.frombuffer(body, '<i8', count=n, offset=column['values'][0])
+
+is a zero-copy view of an int64 column.
+"""
+import json
+import struct
+import sys
+from array import array
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pyarrow is optional; the arrow format is then unavailable
+    pyarrow = None
+
+_HEADER_LENGTH = struct.Struct('<I')
+
+
+def transpose(columns, rows):
+    """Column name -> list of values, in column order."""
+    if not rows:
+        return {name: [] for name in columns}
+    return dict(zip(columns, map(list, zip(*rows))))
+
+
+def _column_type(values):
+    types = set(map(type, values))
+    types.discard(type(None))
+    if types <= {int}:
+        return 'int64'
+    if types <= {int, float}:
+        return 'float64'
+    return 'utf8'
+
+
+def _pack_array(typecode, values):
+    buffer = array(typecode, values)
+    if sys.byteorder == 'big':
+        buffer.byteswap()
+    return buffer.tobytes()
+
+
+def _unpack_array(typecode, data):
+    buffer = array(typecode)
+    buffer.frombytes(data)
+    if sys.byteorder == 'big':
+        buffer.byteswap()
+    return buffer
+
+
+def _pack_column(values):
+    """Return (type, {buffer name: bytes}) for one column."""
+    kind = _column_type(values)
+    buffers = {}
+    if None in values:
+        buffers['validity'] = bytes(value is not None for value in values)
+    if kind == 'utf8':
+        encoded = [b'' if value is None else str(value).encode() for value in values]
+        offsets = [0]
+        for item in encoded:
+            offsets.append(offsets[-1] + len(item))
+        buffers['offsets'] = _pack_array('i', offsets)
+        buffers['data'] = b''.join(encoded)
+    elif kind == 'float64':
+        buffers['values'] = _pack_array('d', [float('nan') if value is None else value for value in values])
+    else:
+        buffers['values'] = _pack_array('q', [0 if value is None else value for value in values])
+    return kind, buffers
+
+
+def _pad(length):
+    return -length % 8
+
+
+def encode_packed(columns, rows):
+    vectors = transpose(columns, rows)
+    packed = [(name, *_pack_column(vectors[name])) for name in columns]
+
+    # Buffer offsets depend on the header's length, which depends on how many
+    # digits those offsets have; recompute until the header length settles.
+    def header_for(base):
+        entries = []
+        position = base
+        for name, kind, buffers in packed:
+            entry = {'name': name, 'type': kind}
+            for buffer_name, data in buffers.items():
+                entry[buffer_name] = [position, len(data)]
+                position += len(data) + _pad(len(data))
+            entries.append(entry)
+        return json.dumps({'rows': len(rows), 'columns': entries}, separators=(',', ':')).encode()
+
+    base = 0
+    while True:
+        header = header_for(base)
+        start = _HEADER_LENGTH.size + len(header)
+        start += _pad(start)
+        if start == base:
+            break
+        base = start
+
+    parts = [_HEADER_LENGTH.pack(len(header)), header, bytes(base - _HEADER_LENGTH.size - len(header))]
+    for _, _, buffers in packed:
+        for data in buffers.values():
+            parts.append(data)
+            parts.append(bytes(_pad(len(data))))
+    return b''.join(parts)
+
+
+def decode_packed(body):
+    """Decode a packed body into column name -> list, with None for NULLs.
+
+    Clients with NumPy can skip this and view the buffers directly.
+    """
+    (length,) = _HEADER_LENGTH.unpack_from(body)
+    header = json.loads(body[_HEADER_LENGTH.size:_HEADER_LENGTH.size + length])
+    view = memoryview(body)
+    result = {}
+    for column in header['columns']:
+        kind = column['type']
+        if kind == 'utf8':
+            start, size = column['offsets']
+            offsets = _unpack_array('i', view[start:start + size])
+            start, _ = column['data']
+            values = [bytes(view[start + a:start + b]).decode() for a, b in zip(offsets, offsets[1:])]
+        else:
+            start, size = column['values']
+            values = _unpack_array('d' if kind == 'float64' else 'q', view[start:start + size]).tolist()
+        if 'validity' in column:
+            start, size = column['validity']
+            values = [value if valid else None for value, valid in zip(values, view[start:start + size])]
+        result[column['name']] = values
+    return result
+
+
+def encode_arrow(columns, rows):
+    vectors = transpose(columns, rows)
+    table = pyarrow.table({name: vectors[name] for name in columns})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,105 @@
+import os
+
+# Settings for the inventory service, overridable through the environment
+
+# SQLite database file
+DATABASE_PATH = os.environ.get("INVENTORY_DB", "inventory.db")
+
+# Maximum number of pooled SQLite connections
+POOL_SIZE = int(os.environ.get("INVENTORY_POOL_SIZE", "8"))
+
+# Seconds a request waits for a free pooled connection
+POOL_TIMEOUT = float(os.environ.get("INVENTORY_POOL_TIMEOUT", "10"))
+
+# Requests allowed to queue for a connection before new ones get 503
+DB_MAX_WAITING = int(os.environ.get("INVENTORY_DB_MAX_WAITING", "256"))
+
+# Rows are sent as keyed objects ("dict") or as legacy JSON arrays ("tuple")
+ROW_FORMAT = os.environ.get("INVENTORY_ROW_FORMAT", "dict")
+
+# Milliseconds SQLite waits on a locked database before raising SQLITE_BUSY
+BUSY_TIMEOUT_MS = int(os.environ.get("INVENTORY_BUSY_TIMEOUT_MS", "5000"))
+
+# Extra attempts for a statement or transaction that still fails with SQLITE_BUSY
+BUSY_RETRIES = int(os.environ.get("INVENTORY_BUSY_RETRIES", "5"))
+
+# First retry delay in milliseconds; doubles with each attempt
+BUSY_RETRY_DELAY_MS = float(os.environ.get("INVENTORY_BUSY_RETRY_DELAY_MS", "10"))
+
+# Queue writers on a lock file next to the database instead of SQLite's busy polling
+WRITE_LOCK = os.environ.get("INVENTORY_WRITE_LOCK", "1").lower() in ("1", "true", "yes")
+
+# Page cache per connection, in KiB
+CACHE_SIZE_KIB = int(os.environ.get("INVENTORY_CACHE_SIZE_KIB", "16384"))
+
+# Bytes of the database file to memory-map (0 disables mmap)
+MMAP_SIZE = int(os.environ.get("INVENTORY_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Engine for analytics and report routes: "auto", "duckdb" or "sqlite"
+ANALYTICS_ENGINE = os.environ.get("INVENTORY_ANALYTICS_ENGINE", "auto").lower()
+
+# Threads (and connections) the analytics engine runs queries on
+ANALYTICS_THREADS = int(os.environ.get("INVENTORY_ANALYTICS_THREADS", "2"))
+
+# Group-commit mode for POST /sales/: queue sales and commit them in batches
+SALES_GROUP_COMMIT = os.environ.get("INVENTORY_SALES_GROUP_COMMIT", "").lower() in ("1", "true", "yes")
+
+# Most sales committed in one group-commit transaction
+SALES_BATCH_SIZE = int(os.environ.get("INVENTORY_SALES_BATCH_SIZE", "256"))
+
+# Milliseconds the writer waits for a batch to fill before committing
+SALES_MAX_WAIT_MS = float(os.environ.get("INVENTORY_SALES_MAX_WAIT_MS", "2"))
+
+# Sales allowed to queue for the writer before callers wait
+SALES_QUEUE_SIZE = int(os.environ.get("INVENTORY_SALES_QUEUE_SIZE", "4096"))
+
+# Rows held by the single-entity read cache (0 disables it)
+CACHE_SIZE = int(os.environ.get("INVENTORY_CACHE_SIZE", "10000"))
+
+# Seconds a cached row stays valid (0 means until invalidated or evicted)
+CACHE_TTL = float(os.environ.get("INVENTORY_CACHE_TTL", "0"))
+
+# Shared-memory block for cross-worker cache invalidation. "auto" names it after
+# the database file, so every worker on that file shares it; empty keeps it per process
+CACHE_SHARED_NAME = os.environ.get("INVENTORY_CACHE_SHARED_NAME", "auto")
+
+# Invalidation version slots; keys hash onto these
+CACHE_VERSION_SLOTS = int(os.environ.get("INVENTORY_CACHE_VERSION_SLOTS", "65536"))
+
+# Record request, database and cache metrics and serve them at /metrics
+METRICS_ENABLED = os.environ.get("INVENTORY_METRICS", "1").lower() in ("1", "true", "yes")
+
+# Statements slower than this many milliseconds go to the slow-query log (0 disables it)
+SLOW_QUERY_MS = float(os.environ.get("INVENTORY_SLOW_QUERY_MS", "100"))
+
+# Rotating file for slow statements, suffixed with each process's PID (empty,
+# the default, keeps them in memory only)
+SLOW_QUERY_LOG = os.environ.get("INVENTORY_SLOW_QUERY_LOG", "")
+
+# Size in bytes at which the slow-query log rotates, and rotated files kept
+SLOW_QUERY_LOG_BYTES = int(os.environ.get("INVENTORY_SLOW_QUERY_LOG_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get("INVENTORY_SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# Milliseconds between reads of new change_log rows for /events subscribers
+EVENTS_POLL_MS = float(os.environ.get("INVENTORY_EVENTS_POLL_MS", "100"))
+
+# Recent changes kept in memory for live subscribers
+EVENTS_BUFFER = int(os.environ.get("INVENTORY_EVENTS_BUFFER", "10000"))
+
+# Changes a subscriber may fall behind before it is told to reload instead
+EVENTS_MAX_LAG = int(os.environ.get("INVENTORY_EVENTS_MAX_LAG", "50000"))
+
+# change_log rows kept for resuming clients; older ones are pruned
+EVENTS_RETENTION = int(os.environ.get("INVENTORY_EVENTS_RETENTION", "200000"))
+
+# Seconds between keep-alive comments on an idle /events stream
+EVENTS_HEARTBEAT = float(os.environ.get("INVENTORY_EVENTS_HEARTBEAT", "15"))
+
+# Seconds `python main.py` lets open requests finish on shutdown before closing
+# them; /events streams end on their own as soon as shutdown starts
+SHUTDOWN_TIMEOUT = float(os.environ.get("INVENTORY_SHUTDOWN_TIMEOUT", "5"))
+
+# Server address and worker processes for `python main.py`
+HOST = os.environ.get("INVENTORY_HOST", "0.0.0.0")
+PORT = int(os.environ.get("INVENTORY_PORT", "8000"))
+WORKERS = int(os.environ.get("INVENTORY_WORKERS", "1"))
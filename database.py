@@ -0,0 +1,433 @@
+import asyncio
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain
+
+from fastapi import HTTPException
+
+import config
+import metrics
+import slowlog
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the write lock is then per process only
+    fcntl = None
+
+# Applied to every new connection. WAL lets readers run alongside the single
+# writer, and synchronous=NORMAL is durable across application crashes in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA cache_size = -{config.CACHE_SIZE_KIB}",
+    f"PRAGMA mmap_size = {config.MMAP_SIZE}",
+    f"PRAGMA busy_timeout = {config.BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+class WriteLock:
+    """Queues writers to one database file, across threads and processes.
+
+    SQLite's busy handler retries a locked write by sleeping, in steps of up to
+    100 ms, so under contention from several workers a writer can sleep well
+    past the moment the lock was freed. This lock makes writers wait their turn
+    instead: a thread lock orders the threads of one process, and an flock() on
+    a file next to the database orders the processes.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._fd = None
+        if fcntl is not None and path != ':memory:':
+            self._fd = os.open(f'{path}-writelock', os.O_RDWR | os.O_CREAT, 0o644)
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._lock.release()
+                raise
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(path):
+    """The process-wide WriteLock for a database file."""
+    key = os.path.abspath(path) if path != ':memory:' else path
+    with _write_locks_guard:
+        if key not in _write_locks:
+            _write_locks[key] = WriteLock(key)
+        return _write_locks[key]
+
+
+class Cursor(sqlite3.Cursor):
+    """Times each statement, including fetching its rows, for the slow-query log."""
+
+    _timing = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._timing = slowlog.Timing(
+            slowlog.slow_queries, slowlog.explain_sqlite, self.connection, sql, parameters,
+            time.perf_counter() - started,
+        )
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        # The plan and the logged parameters are those of the first row
+        rows = iter(seq_of_parameters)
+        first = next(rows, None)
+        started = time.perf_counter()
+        super().executemany(sql, rows if first is None else chain((first,), rows))
+        self._timing = slowlog.Timing(
+            slowlog.slow_queries, slowlog.explain_sqlite, self.connection, sql, first or (),
+            time.perf_counter() - started,
+        )
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        if self._timing is not None:
+            self._timing.add(time.perf_counter() - started)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if self._timing is not None:
+            self._timing.add(time.perf_counter() - started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        if self._timing is not None:
+            self._timing.add(time.perf_counter() - started)
+        return rows
+
+
+class Connection(sqlite3.Connection):
+    # Taken around every write (transaction(), AsyncConnection.execute); None disables it
+    write_lock = None
+    # Statements run on a timed Cursor for the slow-query log when set
+    timed = False
+
+    def execute(self, sql, parameters=()):
+        if not self.timed:
+            return super().execute(sql, parameters)
+        return self.cursor(Cursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not self.timed:
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor(Cursor).executemany(sql, seq_of_parameters)
+
+
+def connect(path=None):
+    """Open a configured SQLite connection in autocommit mode."""
+    path = path or config.DATABASE_PATH
+    conn = sqlite3.connect(
+        path,
+        timeout=config.BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,
+        check_same_thread=False,
+        factory=Connection,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if config.WRITE_LOCK:
+        conn.write_lock = write_lock(path)
+    conn.timed = slowlog.slow_queries.enabled
+    return conn
+
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections, opened lazily.
+
+    A connection is only ever used by one request at a time, so connections are
+    opened with check_same_thread=False and may move between threads.
+    """
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_use(self):
+        return self._created - self._idle.qsize()
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                conn = connect(self.path)
+                self._created += 1
+                return conn
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+
+
+@contextmanager
+def write_locked(conn):
+    """Hold the connection's WriteLock, if it has one, for the block."""
+    lock = getattr(conn, 'write_lock', None)
+    if lock is None:
+        yield conn
+        return
+    lock.acquire()
+    try:
+        yield conn
+    finally:
+        lock.release()
+
+
+@contextmanager
+def transaction(conn):
+    """Run a block of statements in one write transaction.
+
+    BEGIN IMMEDIATE takes the write lock up front, so the transaction cannot fail
+    half-way with SQLITE_BUSY when it upgrades from a read. Connections from
+    connect() first queue on their database's WriteLock.
+    """
+    with write_locked(conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            started = time.perf_counter()
+            conn.commit()
+            metrics.DB_COMMIT_DURATION.observe(time.perf_counter() - started)
+
+
+@contextmanager
+def snapshot(conn):
+    """Run a block of reads against one consistent snapshot, without the write lock.
+
+    A deferred BEGIN only reads; in WAL mode writers carry on while it is open.
+    """
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+def is_busy(exc):
+    """True for SQLITE_BUSY / SQLITE_LOCKED, including their extended codes."""
+    code = getattr(exc, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return 'locked' in str(exc) or 'busy' in str(exc)
+
+
+def retry_busy(fn, conn, *args):
+    """Call fn(conn, *args), retrying with jittered backoff on SQLITE_BUSY.
+
+    busy_timeout already waits inside SQLite; this covers the cases it gives up
+    on, such as a checkpoint or another process holding the lock for longer.
+    fn must be safe to repeat: a single statement, or one transaction() block,
+    which is rolled back in full when it fails.
+    """
+    for attempt in range(config.BUSY_RETRIES + 1):
+        try:
+            return fn(conn, *args)
+        except sqlite3.OperationalError as exc:
+            # A transaction fn left open is not safe to start over
+            if attempt == config.BUSY_RETRIES or not is_busy(exc) or conn.in_transaction:
+                raise
+        metrics.DB_BUSY_RETRIES.inc()
+        time.sleep(config.BUSY_RETRY_DELAY_MS / 1000 * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def timed_call(fn, conn, args, submitted):
+    """retry_busy(fn, conn, *args), recording executor wait and run time."""
+    started = time.perf_counter()
+    metrics.DB_EXECUTOR_WAIT.observe(started - submitted)
+    try:
+        return retry_busy(fn, conn, *args)
+    finally:
+        metrics.DB_CALL_DURATION.labels(fn.__name__).observe(time.perf_counter() - started)
+
+
+def _fetchone(conn, sql, params):
+    return conn.execute(sql, params).fetchone()
+
+
+def _fetchall(conn, sql, params):
+    return conn.execute(sql, params).fetchall()
+
+
+def _is_read(sql):
+    return sql.lstrip()[:6].upper() == 'SELECT'
+
+
+# A statement run on its own commits in autocommit mode, so it is a write
+# transaction of its own and queues on the WriteLock like transaction() does
+def _write(conn, sql, params):
+    with write_locked(conn):
+        return conn.execute(sql, params)
+
+
+def _write_many(conn, sql, rows):
+    with write_locked(conn):
+        return conn.executemany(sql, rows)
+
+
+class AsyncConnection:
+    """Async facade over a pooled connection.
+
+    Every statement runs on the dedicated DB executor, so a slow query or commit
+    never blocks the event loop.
+    """
+
+    def __init__(self, conn, executor):
+        self.conn = conn
+        self._executor = executor
+
+    async def run(self, fn, *args):
+        """Call fn(conn, *args) on the DB executor and return its result.
+
+        SQLITE_BUSY is retried (see retry_busy), so fn must be safe to repeat.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(timed_call, fn, self.conn, args, time.perf_counter())
+        )
+
+    async def execute(self, sql, params=()):
+        if _is_read(sql):
+            return await self.run(Connection.execute, sql, params)
+        return await self.run(_write, sql, params)
+
+    async def executemany(self, sql, rows):
+        return await self.run(_write_many, sql, rows)
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(_fetchone, sql, params)
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(_fetchall, sql, params)
+
+
+class Database:
+    """Hands out pooled connections to coroutines without blocking the loop.
+
+    At most pool.size requests hold a connection at once, so the executor has one
+    thread per connection and never queues more than that. Requests beyond the
+    pool wait on a semaphore, and once max_waiting of them are queued further
+    requests are turned away with 503 rather than piling up.
+    """
+
+    def __init__(self, pool, max_waiting, timeout):
+        self.pool = pool
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="sqlite")
+        self.waiting = 0
+        self._loop = None
+        self._slots = None
+
+    def _semaphore(self):
+        # asyncio primitives belong to one event loop; rebuild on a new loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.pool.size)
+        return self._slots
+
+    async def acquire(self):
+        slots = self._semaphore()
+        if slots.locked() and self.waiting >= self.max_waiting:
+            raise HTTPException(status_code=503, detail="Database is busy")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Database is busy")
+        finally:
+            self.waiting -= 1
+        try:
+            # Holding a slot guarantees an idle connection or room to open one
+            conn = await asyncio.get_running_loop().run_in_executor(self.executor, self.pool.acquire)
+        except BaseException:
+            slots.release()
+            raise
+        return AsyncConnection(conn, self.executor)
+
+    def release(self, db):
+        self.pool.release(db.conn)
+        self._slots.release()
+
+    async def run(self, fn, *args):
+        """Call fn(conn, *args) on a pooled connection held just for the call."""
+        db = await self.acquire()
+        try:
+            return await db.run(fn, *args)
+        finally:
+            self.release(db)
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(_fetchone, sql, params)
+
+
+pool = ConnectionPool(config.DATABASE_PATH, config.POOL_SIZE)
+database = Database(pool, config.DB_MAX_WAITING, config.POOL_TIMEOUT)
+
+
+async def get_db():
+    """FastAPI dependency handing each request its own pooled connection."""
+    db = await database.acquire()
+    try:
+        yield db
+    finally:
+        database.release(db)
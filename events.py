@@ -0,0 +1,234 @@
+"""Change feed behind GET /events: change_log rows as server-sent events.
+
+Triggers from migration 7 append a row to change_log for every insert,
+update and delete, whichever worker or code path made it. One ChangeFeed per
+process tails that table and keeps the newest changes in a ring buffer,
+already encoded, so each change is read and serialized once however many
+clients are subscribed.
+
+Every subscriber streams from its own position. One that falls behind the
+ring buffer is served from change_log in pages, at the pace it reads them, so
+a slow client holds no more than a page in memory and never delays the
+others. A client more than EVENTS_MAX_LAG changes behind, or behind what
+change_log still holds, gets a reset event: reload, then carry on from there.
+"""
+import asyncio
+import logging
+import signal
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+
+from database import transaction
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ('products', 'skus', 'orders', 'suppliers', 'sales')
+
+# Changes read per query and sent to a client per write
+PAGE_SIZE = 500
+
+# Seconds between prunes of change_log
+PRUNE_INTERVAL = 60
+
+
+def _bounds(conn):
+    return conn.execute('SELECT COALESCE(MIN(seq), 0), COALESCE(MAX(seq), 0) FROM change_log').fetchone()
+
+
+def _read_changes(conn, after, limit):
+    return conn.execute(
+        'SELECT seq, entity, entity_id, op, fields FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?',
+        (after, limit),
+    ).fetchall()
+
+
+def _catch_up(conn, after, limit):
+    return _bounds(conn)[0], _read_changes(conn, after, limit)
+
+
+def _prune(conn, keep):
+    with transaction(conn):
+        conn.execute('DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?', (keep,))
+
+
+def message(event, data, seq=None):
+    """One server-sent event; data must be a single line."""
+    head = f'id: {seq}\n' if seq is not None else ''
+    return f'{head}event: {event}\ndata: {data}\n\n'
+
+
+def encode(seq, entity, entity_id, op, fields):
+    # fields is JSON text from SQLite's json_object(), spliced in as is
+    return message('change', f'{{"seq":{seq},"entity":"{entity}","id":{entity_id},"op":"{op}",'
+                             f'"fields":{fields or "null"}}}', seq)
+
+
+class ChangeFeed:
+    def __init__(self, db, buffer_size, poll_interval, max_lag, retention, heartbeat):
+        self.db = db
+        self.poll_interval = poll_interval
+        self.max_lag = max_lag
+        self.retention = retention
+        self.heartbeat = heartbeat
+        self.head = 0
+        self.subscribers = 0
+        # Set by close(); every stream ends at its next step
+        self.closing = False
+        # (seq, entity, encoded message) and, for bisecting, the seqs alone
+        self._buffer = deque(maxlen=buffer_size)
+        self._seqs = deque(maxlen=buffer_size)
+        self._changed = None
+        self._stale = True
+        self._task = None
+
+    async def start(self):
+        self.closing = False
+        # Nothing was buffered while stopped
+        self._stale = True
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def close(self):
+        """End every open stream, and any opened from now on."""
+        self.closing = True
+        if self._changed is not None:
+            # Wakes the streams waiting for a change, which then see closing
+            self._changed.set()
+
+    async def stop(self):
+        self.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if self.subscribers:
+                    await self._poll()
+                else:
+                    # Nobody is listening, so nothing needs buffering
+                    self._stale = True
+                if time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                    last_prune = time.monotonic()
+                    await self.db.run(_prune, self.retention)
+            except Exception:
+                logger.exception("Reading change_log failed")
+
+    async def _poll(self):
+        published = False
+        if self._stale:
+            # Skip what happened while idle; subscribers catch up from change_log
+            self._buffer.clear()
+            self._seqs.clear()
+            head = (await self.db.run(_bounds))[1]
+            # Anyone waiting at the old head has that gap to catch up on
+            published = head != self.head
+            self.head = head
+            self._stale = False
+        while True:
+            rows = await self.db.run(_read_changes, self.head, PAGE_SIZE)
+            for row in rows:
+                self._buffer.append((row[0], row[1], encode(*row)))
+                self._seqs.append(row[0])
+            if rows:
+                self.head = rows[-1][0]
+                published = True
+            if len(rows) < PAGE_SIZE:
+                break
+        if published:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    async def _next(self, position, entities):
+        """(text to send, new position, reset) for a subscriber at position."""
+        if self._seqs and position >= self._seqs[0] - 1:
+            if position >= self.head:
+                return '', position, False
+            start = bisect_right(self._seqs, position)
+            batch = list(islice(self._buffer, start, start + PAGE_SIZE))
+        else:
+            # Behind the buffer: page through change_log at this client's pace
+            oldest, rows = await self.db.run(_catch_up, position, PAGE_SIZE)
+            if position < oldest - 1:
+                return '', position, True
+            if not rows:
+                # Nothing left between here and the head
+                return '', max(position, self.head), False
+            batch = [(row[0], row[1], encode(*row)) for row in rows]
+        text = ''.join(text for _, entity, text in batch if entities is None or entity in entities)
+        return text, batch[-1][0], False
+
+    async def stream(self, since=None, entities=None):
+        """Yield SSE text for the changes after since, or from now on when None.
+
+        Opens with a ready event carrying the starting position. entities, a
+        set of table names, filters the changes sent.
+        """
+        self.subscribers += 1
+        try:
+            _, last = await self.db.run(_bounds)
+            position = last if since is None or since > last else since
+            yield message('reset' if since is not None and since > last else 'ready',
+                          f'{{"seq":{position}}}', position)
+            while not self.closing:
+                changed = self._changed
+                if self.head - position > self.max_lag:
+                    text, reset = '', True
+                else:
+                    text, position, reset = await self._next(position, entities)
+                if reset:
+                    position = (await self.db.run(_bounds))[1]
+                    yield message('reset', f'{{"seq":{position}}}', position)
+                elif text:
+                    yield text
+                elif position >= self.head:
+                    try:
+                        await asyncio.wait_for(changed.wait(), self.heartbeat)
+                    except asyncio.TimeoutError:
+                        yield ': keep-alive\n\n'
+        finally:
+            self.subscribers -= 1
+
+
+def close_on_exit(feed, signals=(signal.SIGINT, signal.SIGTERM)):
+    """Close feed's streams as soon as the process is told to stop.
+
+    uvicorn waits for open connections to finish before it runs the lifespan
+    shutdown, and an /events stream never finishes by itself, so waiting for
+    the shutdown would wait forever. This chains onto the server's handlers
+    for the exit signals instead; they still run after the streams are told
+    to end. Returns a function that puts the previous handlers back.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        # Signal handlers can only be set from the main thread
+        return lambda: None
+    loop = asyncio.get_running_loop()
+    previous = {}
+
+    def handle(signum, frame):
+        loop.call_soon_threadsafe(feed.close)
+        handler = previous[signum]
+        if callable(handler):
+            handler(signum, frame)
+        elif handler == signal.SIG_DFL:
+            signal.signal(signum, handler)
+            signal.raise_signal(signum)
+
+    for signum in signals:
+        previous[signum] = signal.signal(signum, handle)
+
+    def restore():
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+    return restore
@@ -0,0 +1,59 @@
+import csv
+import io
+
+from listing import TABLE_COLUMNS
+from serialization import dumps
+
+EXPORT_TABLES = ('products', 'orders', 'sales', 'skus', 'suppliers')
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows pulled from SQLite per round trip to the DB executor
+CHUNK_SIZE = 1000
+
+
+def _open_snapshot(conn, table, columns):
+    # In WAL mode a read transaction sees one consistent snapshot for its whole
+    # life without blocking writers; it ends when the connection is released.
+    conn.execute('BEGIN')
+    return conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+
+
+def _fetchmany(conn, cursor):
+    return cursor.fetchmany(CHUNK_SIZE)
+
+
+def _encode_ndjson(columns, rows):
+    # The same encoder as the JSON routes (orjson when installed), as UTF-8 bytes
+    return b''.join(dumps(dict(zip(columns, row))) + b'\n' for row in rows)
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_table(database, table, fmt):
+    """Yield a table as NDJSON or CSV text, CHUNK_SIZE rows at a time.
+
+    A pooled connection is acquired once iteration starts and released when the
+    stream finishes or the client goes away, so a response that is never sent
+    holds none, and memory stays flat however big the table.
+    """
+    columns = TABLE_COLUMNS[table]
+    db = await database.acquire()
+    try:
+        cursor = await db.run(_open_snapshot, table, columns)
+        if fmt == 'csv':
+            yield _encode_csv([columns])
+        while True:
+            rows = await db.run(_fetchmany, cursor)
+            if not rows:
+                break
+            yield _encode_csv(rows) if fmt == 'csv' else _encode_ndjson(columns, rows)
+    finally:
+        database.release(db)
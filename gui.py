@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
-from api import fetch_products, fetch_skus, fetch_orders
+from api import APIError, fetch_products, fetch_skus, fetch_orders
 
 class AppGUI:
     def __init__(self, master):
@@ -39,7 +39,6 @@ class AppGUI:
 
         try:
             response = fetch_products()  # Fetch products
-            console.log(response)
             if not response:  # If response is empty
                 self.no_data_label.config(text="No products available yet", fg="red")
                 self.no_data_label.pack()
@@ -57,8 +56,8 @@ class AppGUI:
 
                 tree.pack(fill=tk.BOTH, expand=True)
 
-        except Exception as e:
-            print("Error fetching products:", e)
+        except APIError as e:
+            self.show_error(f"Error fetching products: {e}")
 
 
 
@@ -73,13 +72,27 @@ class AppGUI:
                 self.no_data_label.pack()
             else:
                 self.display_response(response)
-        except Exception as e:
-            print("Error fetching SKUs:", e)
+        except APIError as e:
+            self.show_error(f"Error fetching SKUs: {e}")
 
     def show_orders(self):
         self.clear_content_frame()
-        orders = fetch_orders()
-        self.display_table(orders)
+        self.no_data_label.pack_forget()
+
+        try:
+            orders = fetch_orders()
+        except APIError as e:
+            self.show_error(f"Error fetching orders: {e}")
+            return
+        if not orders:
+            self.no_data_label.config(text="No orders available yet", fg="red")
+            self.no_data_label.pack()
+        else:
+            self.display_table(orders)
+
+    def show_error(self, message):
+        self.no_data_label.config(text=message, fg="red")
+        self.no_data_label.pack()
 
     def display_table(self, data):
         tree = ttk.Treeview(self.content_frame)
@@ -95,5 +108,9 @@ class AppGUI:
         tree.pack(fill=tk.BOTH, expand=True)
 
     def clear_content_frame(self):
+        # The status labels are reused, so they are hidden rather than destroyed
         for widget in self.content_frame.winfo_children():
-            widget.destroy()
+            if widget in (self.loading_label, self.no_data_label):
+                widget.pack_forget()
+            else:
+                widget.destroy()
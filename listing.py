@@ -0,0 +1,159 @@
+import json
+
+from fastapi import HTTPException
+
+import serialization
+
+# Columns of each table, in SELECT * order
+TABLE_COLUMNS = {
+    'products': ('id', 'sku_id', 'name', 'price', 'quantity', 'supplier_id'),
+    'skus': ('id', 'name', 'location', 'capacity'),
+    'orders': ('id', 'product_id', 'quantity', 'customer_name', 'customer_email'),
+    'suppliers': ('id', 'name', 'email'),
+    'sales': ('id', 'product_id', 'quantity', 'price', 'sale_date'),
+}
+
+MAX_PAGE_SIZE = 1000
+
+
+def parse_fields(table, fields):
+    """Validate a comma-separated fields= projection against the table's columns."""
+    columns = TABLE_COLUMNS[table]
+    if not fields:
+        return columns
+    selected = tuple(field.strip() for field in fields.split(',') if field.strip())
+    unknown = [field for field in selected if field not in columns]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown fields for {table}: {', '.join(unknown) or fields}")
+    return selected
+
+
+def parse_ids(ids):
+    """Turn ids=1,2,3 into a JSON array for the IDS_FILTER clause, or None."""
+    if ids is None:
+        return None
+    try:
+        values = [int(value) for value in ids.split(',') if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(values) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} ids per request")
+    return json.dumps(values)
+
+
+# One placeholder for any number of ids, so the statement text stays the same
+IDS_FILTER = 'id IN (SELECT value FROM json_each(?))'
+
+
+def parse_sort(table, sort):
+    """Validate sort=column (or -column, descending) into (column, descending)."""
+    if not sort:
+        return None
+    descending = sort.startswith('-')
+    column = sort[1:] if descending else sort
+    if column not in TABLE_COLUMNS[table]:
+        raise HTTPException(status_code=400, detail=f"Cannot sort {table} by {column}")
+    return column, descending
+
+
+def _where(filters):
+    where = []
+    params = []
+    for clause, value in filters:
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    return where, params
+
+
+def build_query(table, columns, filters=(), after=None, limit=None, sort=None, offset=None):
+    """Build a paginated SELECT, ordered by id unless sort is given.
+
+    filters is a sequence of (clause, value) pairs; pairs whose value is None
+    are skipped. Paging with id > after walks the primary key (or the filter
+    column's index, which is ordered by id within each key), so every page
+    costs the same however deep it is. sort, a (column, descending) pair, is
+    broken by id in the same direction, so an index on the column serves it
+    either way; offset then addresses rows by position, for clients that
+    jump around a sorted list.
+    """
+    where, params = _where(filters)
+    if after is not None:
+        where.append('id > ?')
+        params.append(after)
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    if sort is not None:
+        column, descending = sort
+        direction = ' DESC' if descending else ''
+        sql += f' ORDER BY {column}{direction}, id{direction}' if column != 'id' else f' ORDER BY id{direction}'
+    else:
+        sql += ' ORDER BY id'
+    if limit is not None or offset:
+        # SQLite only takes OFFSET after a LIMIT; -1 means no limit
+        sql += ' LIMIT ?'
+        params.append(limit if limit is not None else -1)
+    if offset:
+        sql += ' OFFSET ?'
+        params.append(offset)
+    return sql, params
+
+
+def build_count(table, filters=()):
+    where, params = _where(filters)
+    sql = f"SELECT COUNT(*) FROM {table}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    return sql, params
+
+
+def _read_page(conn, sql, params, columns, query_columns, limit, row_format, count=None):
+    # Fetch, shape and encode on the DB executor so big pages never touch the loop
+    total = conn.execute(*count).fetchone()[0] if count is not None else None
+    rows = conn.execute(sql, params).fetchall()
+    next_after = None
+    if limit is not None and len(rows) == limit:
+        next_after = rows[-1][query_columns.index('id')]
+    if query_columns is not columns:
+        rows = [row[:-1] for row in rows]
+    return serialization.encode_rows(columns, rows, row_format), next_after, total
+
+
+def _read_all(conn, sql, params, columns, row_format):
+    return serialization.encode_rows(columns, conn.execute(sql, params).fetchall(), row_format)
+
+
+async def fetch_page(db, request, response, table, fields=None, filters=(), after=None, limit=None, row_format='dict',
+                     sort=None, offset=None, count=False):
+    """Run a list query and return it as an encoded response in row_format.
+
+    A full page advertises the next one in a Link header: by after= in id
+    order, by offset= once sort or offset is used. Without limit the whole
+    (filtered) table is returned, as before. With count, X-Total-Count
+    carries the number of rows matching the filters.
+    """
+    columns = parse_fields(table, fields)
+    sort = parse_sort(table, sort)
+    if after is not None and (sort is not None or offset):
+        raise HTTPException(status_code=400, detail="after pages in id order; use offset with sort")
+    # The cursor needs the id even when the caller did not ask for it
+    query_columns = columns if 'id' in columns else columns + ('id',)
+    sql, params = build_query(table, query_columns, filters, after, limit, sort, offset)
+    body, next_after, total = await db.run(_read_page, sql, params, columns, query_columns, limit, row_format,
+                                           build_count(table, filters) if count else None)
+    if next_after is not None:
+        if sort is not None or offset:
+            next_url = request.url.include_query_params(offset=(offset or 0) + limit)
+        else:
+            next_url = request.url.include_query_params(after=next_after)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    return serialization.rows_response(body, row_format, response.headers)
+
+
+async def fetch_all(db, response, sql, columns, row_format='dict', params=()):
+    """Run a report query (such as an analytics one) and encode it in row_format."""
+    body = await db.run(_read_all, sql, params, columns, row_format)
+    return serialization.rows_response(body, row_format, response.headers)
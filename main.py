@@ -1,123 +1,102 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import sqlite3
-from typing import Dict
-# Define the FastAPI app
-app = FastAPI()
-
-# Connect to SQLite database
-conn = sqlite3.connect('inventory.db')
-cursor = conn.cursor()
-
-# Create tables if not exist
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        sku_id INTEGER,
-        name TEXT,
-        price REAL,
-        quantity INTEGER,
-        supplier_id INTEGER,
-        FOREIGN KEY (sku_id) REFERENCES skus(id),
-        FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
-    )
-''')
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS orders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        product_id INTEGER,
-        quantity INTEGER,
-        customer_name TEXT,
-        customer_email TEXT,
-        FOREIGN KEY (product_id) REFERENCES products(id)
-    )
-''')
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+import analytics
+import analytics_engine
+import bulk
+import cache
+import config
+import events
+import export
+import listing
+import metrics
+import migrations
+import serialization
+import slowlog
+import stock
+import versions
+from database import AsyncConnection, database, get_db, pool
+
+# Batches POST /sales/ commits when group-commit mode is on
+sale_writer = stock.SaleWriter(
+    config.DATABASE_PATH,
+    config.SALES_BATCH_SIZE,
+    config.SALES_MAX_WAIT_MS / 1000,
+    config.SALES_QUEUE_SIZE,
+)
+
+# Single-row reads, invalidated by the write routes; lifespan() attaches the
+# version counters shared with the other workers
+entity_cache = cache.EntityCache(config.CACHE_SIZE, config.CACHE_TTL or None,
+                                 cache.LocalVersions(config.CACHE_VERSION_SLOTS))
+
+# Read-only engine for analytics and reports (DuckDB when available)
+report_engine = analytics_engine.AnalyticsEngine(config.DATABASE_PATH, config.ANALYTICS_ENGINE, config.ANALYTICS_THREADS)
+
+# Tails change_log for /events subscribers
+change_feed = events.ChangeFeed(database, config.EVENTS_BUFFER, config.EVENTS_POLL_MS / 1000,
+                                config.EVENTS_MAX_LAG, config.EVENTS_RETENTION, config.EVENTS_HEARTBEAT)
+
+# Gauges read at scrape time
+metrics.Gauge('db_pool_connections_in_use', 'Pooled connections held by requests.', lambda: pool.in_use)
+metrics.Gauge('db_pool_size', 'Most pooled connections.', lambda: pool.size)
+metrics.Gauge('db_waiting_requests', 'Requests queued for a pooled connection.', lambda: database.waiting)
+metrics.Gauge('sale_writer_queue_depth', 'Sales queued for the group-commit writer.', lambda: sale_writer.depth)
+metrics.Gauge('entity_cache_entries', 'Rows held by the entity cache.', lambda: entity_cache.stats()['size'])
+metrics.Gauge('entity_cache_hit_ratio', 'Entity cache hits over lookups.', lambda: entity_cache.stats()['hit_rate'])
+metrics.Gauge('entity_cache_hits', 'Entity cache hits.', lambda: entity_cache.hits, kind='counter')
+metrics.Gauge('entity_cache_misses', 'Entity cache misses.', lambda: entity_cache.misses, kind='counter')
+metrics.Gauge('entity_cache_evictions', 'Entity cache evictions.', lambda: entity_cache.evictions, kind='counter')
+metrics.Gauge('events_subscribers', 'Open /events streams.', lambda: change_feed.subscribers)
+
+
+def cache_versions():
+    """Invalidation counters: per process, or shared by every worker on this host."""
+    name = config.CACHE_SHARED_NAME
+    if not name:
+        return cache.LocalVersions(config.CACHE_VERSION_SLOTS)
+    if name == 'auto':
+        name = cache.shared_name(config.DATABASE_PATH)
+    # The last worker to close the block removes it
+    return cache.SharedVersions(name, config.CACHE_VERSION_SLOTS, f'{config.DATABASE_PATH}-cachelock')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # However the workers were started, they invalidate each other's cached rows
+    entity_cache.versions = cache_versions()
+    # Bring the schema up to date; seed data is loaded separately with
+    # `python seed.py`. Workers starting together apply it exactly once.
+    await database.run(migrations.migrate)
+    # Probing for DuckDB may try to fetch its sqlite extension, so not on the loop
+    await asyncio.get_running_loop().run_in_executor(None, report_engine.start)
+    if config.SALES_GROUP_COMMIT:
+        await sale_writer.start()
+    await change_feed.start()
+    # The server drains connections before this hook's shutdown half runs, so
+    # /events streams are ended on the exit signal itself
+    restore_signals = events.close_on_exit(change_feed)
+    loop_watcher = asyncio.create_task(metrics.watch_event_loop()) if config.METRICS_ENABLED else None
+    yield
+    if loop_watcher is not None:
+        loop_watcher.cancel()
+    restore_signals()
+    await change_feed.stop()
+    await sale_writer.stop()
+    report_engine.stop()
+    pool.close()
+    # uvicorn's worker processes exit without running atexit hooks
+    entity_cache.versions.close()
+
+# Every route hangs off this router; create_app() mounts it
+router = APIRouter()
 
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS suppliers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        email TEXT
-    )
-''')
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS skus (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        location TEXT,
-        capacity INTEGER
-    )
-''')
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS sales (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        product_id INTEGER,
-        quantity INTEGER,
-        price REAL,
-        sale_date DATE DEFAULT CURRENT_DATE,
-        FOREIGN KEY (product_id) REFERENCES products(id)
-    )
-''')
-cursor.executemany('''
-    INSERT INTO skus (name, location, capacity) VALUES (?, ?, ?)
-''', [
-    ('Himalaya Factory', 'Bangalore, Karnataka', 100),
-    ('Apple Manufacturing', 'Mumbai, Maharashtra', 200),
-    ('Kellogg\'s Plant', 'Mumbai, Maharashtra', 150),
-    ('Dove Manufacturing', 'Pune, Maharashtra', 80),
-    ('Daawat Rice Factory', 'Karnal, Haryana', 250),
-    ('Bombay Dyeing Factory', 'Mumbai, Maharashtra', 120),
-    ('Tropicana Factory', 'Jaipur, Rajasthan', 180),
-    ('Colgate-Palmolive Factory', 'Mumbai, Maharashtra', 90),
-    ('Parker Pen Manufacturing', 'Ahmedabad, Gujarat', 50),
-    ('ITC Paper Factory', 'Hyderabad, Telangana', 70)
-])
-
-# Insert hardcoded data for Suppliers
-cursor.executemany('''
-    INSERT INTO suppliers (name, email) VALUES (?, ?)
-''', [
-    ('Supplier 1', 'supplier1@example.com'),
-    ('Supplier 2', 'supplier2@example.com'),
-    ('Supplier 3', 'supplier3@example.com'),
-    ('Supplier 4', 'supplier4@example.com'),
-    ('Supplier 5', 'supplier5@example.com')
-])
-
-# Insert hardcoded data for Products
-cursor.executemany('''
-    INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?)
-''', [
-    (1, 'Shampoo', 5.99, 50, 1),
-    (2, 'Apple', 0.99, 100, 2),
-    (3, 'Cereals', 3.49, 80, 3),
-    (4, 'Soap', 1.49, 120, 1),
-    (5, 'Rice', 2.99, 200, 4),
-    (6, 'Towel', 8.99, 30, 5),
-    (7, 'Juice', 4.29, 70, 3),
-    (8, 'Toothpaste', 2.49, 90, 1),
-    (9, 'Pen', 1.99, 60, 2),
-    (10, 'Book', 9.99, 20, 4)
-])
-
-# Insert hardcoded data for Orders
-cursor.executemany('''
-    INSERT INTO orders (product_id, quantity, customer_name, customer_email) VALUES (?, ?, ?, ?)
-''', [
-    (1, 2, 'John Doe', 'john@example.com'),
-    (2, 5, 'Jane Smith', 'jane@example.com'),
-    (3, 3, 'Alice Johnson', 'alice@example.com'),
-    (4, 1, 'Bob Brown', 'bob@example.com'),
-    (5, 4, 'Charlie Davis', 'charlie@example.com'),
-    (6, 2, 'Eva Wilson', 'eva@example.com'),
-    (7, 3, 'Frank Miller', 'frank@example.com'),
-    (8, 2, 'Grace Thompson', 'grace@example.com'),
-    (9, 1, 'Henry Garcia', 'henry@example.com'),
-    (10, 2, 'Ivy Clark', 'ivy@example.com')
-])
 # Product model
 class Product(BaseModel):
     sku_id: int
@@ -148,221 +127,308 @@ class SKU(BaseModel):
     capacity: int
 
 
-
-
+# Product with its ID, for bulk updates
+class ProductUpdate(Product):
+    id: int
 
 
 # Sale model
 class Sale(BaseModel):
     product_id: int
-    quantity: int
+    quantity: int = Field(gt=0)
     price: float
 
 
+# Read one row through the entity cache; a miss holds a connection only for its query
+async def fetch_entity(table, entity_id):
+    key = (table, entity_id)
+    row = entity_cache.get(key)
+    if row is None:
+        stamp = entity_cache.stamp(key)
+        columns = ', '.join(listing.TABLE_COLUMNS[table])
+        row = await database.fetchone(f'SELECT {columns} FROM {table} WHERE id = ?', (entity_id,))
+        if row is not None:
+            entity_cache.set(key, row, stamp)
+    return row
+
+
+def date_range(start: Optional[date] = Query(None, alias="from"), end: Optional[date] = Query(None, alias="to")):
+    """Dependency for inclusive from/to query params, as ISO strings or None."""
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    return (start.isoformat() if start else None, end.isoformat() if end else None)
+
+
 # CRUD operations for Sales
-@app.post("/sales/")
+@router.post("/sales/")
 async def create_sale(sale: Sale):
-    # Check if product is in stock
-    cursor.execute('SELECT quantity FROM products WHERE id = ?', (sale.product_id,))
-    product_quantity = cursor.fetchone()
-    if product_quantity is None:
+    try:
+        if sale_writer.running:
+            remaining = await sale_writer.submit(sale.product_id, sale.quantity, sale.price)
+        else:
+            remaining = await database.run(stock.sell, sale.product_id, sale.quantity, sale.price)
+    except stock.ProductNotFound:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    if sale.quantity > product_quantity[0]:
+    except stock.OutOfStock:
         raise HTTPException(status_code=400, detail="Product is out of stock")
-    
-    # Calculate total sale amount
-    total_price = sale.quantity * sale.price
-    
-    # Add sale record
-    cursor.execute('''
-        INSERT INTO sales (product_id, quantity, price)
-        VALUES (?, ?, ?)
-    ''', (sale.product_id, sale.quantity, total_price))
-    
-    # Update product quantity
-    cursor.execute('''
-        UPDATE products
-        SET quantity = quantity - ?
-        WHERE id = ?
-    ''', (sale.quantity, sale.product_id))
-    
-    conn.commit()
-    return {"message": "Sale added successfully"}
+    entity_cache.invalidate('products', sale.product_id)
+    return {"message": "Sale added successfully", "quantity": remaining}
+
+
+# Units and revenue per day, week or month; declared before /sales/{product_id}
+@router.get("/sales/timeseries")
+async def sales_timeseries(request: Request, response: Response, dates: tuple = Depends(date_range),
+                           bucket: str = Query("day", pattern="^(day|week|month)$"),
+                           product_id: Optional[int] = None, supplier_id: Optional[int] = None,
+                           row_format: str = Depends(serialization.row_format), db: AsyncConnection = Depends(get_db)):
+    tables = ('sales', 'products') if supplier_id is not None else ('sales',)
+    not_modified = await versions.check_etag(db, request, response, *tables)
+    if not_modified:
+        return not_modified
+    sql, params = analytics.timeseries_query(bucket, *dates, product_id, supplier_id)
+    return await listing.fetch_all(db, response, sql, analytics.TIMESERIES_COLUMNS, row_format, params)
+
+
+# Retrieve sales for a product, optionally between two dates (inclusive)
+@router.get("/sales/{product_id}")
+async def get_product_sales(product_id: int, dates: tuple = Depends(date_range),
+                            keyed: bool = Depends(serialization.keyed_rows),
+                            db: AsyncConnection = Depends(get_db)):
+    columns = listing.TABLE_COLUMNS['sales']
+    sql, params = listing.build_query('sales', columns, (
+        ('product_id = ?', product_id),
+        ('sale_date >= ?', dates[0]),
+        ('sale_date <= ?', dates[1]),
+    ))
+    sales = await db.fetchall(sql, params)
+    return {"sales": serialization.shape_rows(columns, sales, keyed)}
+
+#-------------------------bulk------------------------------
+PRODUCT_COLUMNS = ('sku_id', 'name', 'price', 'quantity', 'supplier_id')
+ORDER_COLUMNS = ('product_id', 'quantity', 'customer_name', 'customer_email')
+SKU_COLUMNS = ('name', 'location', 'capacity')
+
+
+def check_bulk_size(items):
+    if len(items) > bulk.MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {bulk.MAX_BULK_ITEMS} items per bulk request")
+
+
+async def insert_bulk(db, table, columns, items):
+    check_bulk_size(items)
+    rows = [tuple(getattr(item, column) for column in columns) for item in items]
+    ids = await db.run(bulk.insert_many, table, columns, rows) if rows else []
+    return {"results": [{"id": item_id, "status": "created"} for item_id in ids]}
+
+
+@router.post("/products/bulk")
+async def create_products_bulk(products: List[Product], db: AsyncConnection = Depends(get_db)):
+    return await insert_bulk(db, 'products', PRODUCT_COLUMNS, products)
 
 
-# Retrieve sales for a product
-@app.get("/sales/{product_id}")
-async def get_product_sales(product_id: int):
-    cursor.execute('SELECT * FROM sales WHERE product_id = ?', (product_id,))
-    sales = cursor.fetchall()
-    return {"sales": sales}
+@router.put("/products/bulk")
+async def update_products_bulk(products: List[ProductUpdate], db: AsyncConnection = Depends(get_db)):
+    check_bulk_size(products)
+    ids = [product.id for product in products]
+    rows = [tuple(getattr(product, column) for column in PRODUCT_COLUMNS) for product in products]
+    updated = await db.run(bulk.update_many, 'products', PRODUCT_COLUMNS, ids, rows) if rows else set()
+    entity_cache.invalidate('products', *updated)
+    return {"results": [
+        {"id": product_id, "status": "updated" if product_id in updated else "not_found"}
+        for product_id in ids
+    ]}
+
+
+@router.post("/orders/bulk")
+async def create_orders_bulk(orders: List[Order], db: AsyncConnection = Depends(get_db)):
+    return await insert_bulk(db, 'orders', ORDER_COLUMNS, orders)
+
+
+@router.post("/skus/bulk")
+async def create_skus_bulk(skus: List[SKU], db: AsyncConnection = Depends(get_db)):
+    return await insert_bulk(db, 'skus', SKU_COLUMNS, skus)
+
 
 # CRUD operations for Products
-@app.post("/products/")
-async def create_product(product: Product):
-    print(product)
-    cursor.execute('''
+@router.post("/products/")
+async def create_product(product: Product, db: AsyncConnection = Depends(get_db)):
+    await db.execute('''
         INSERT INTO products (sku_id, name, price, quantity, supplier_id)
         VALUES (?, ?, ?, ?, ?)
     ''', (product.sku_id, product.name, product.price, product.quantity, product.supplier_id))
-    conn.commit()
     return {"message": "Product created successfully"}
 
 
-@app.get("/products/{product_id}")
-async def read_product(product_id: int):
-    cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-    product = cursor.fetchone()
-    if product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
-
-@app.get("/products")
-async def read_product():
-    cursor.execute('SELECT * FROM products ', ())
-    product = cursor.fetchall()
+@router.get("/products/{product_id}")
+async def read_product(product_id: int, keyed: bool = Depends(serialization.keyed_rows)):
+    product = await fetch_entity('products', product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
-
-@app.put("/products/{product_id}")
-async def update_product(product_id: int, product: Product):
-    cursor.execute('''
+    return serialization.shape_row(listing.TABLE_COLUMNS['products'], product, keyed)
+
+@router.get("/products")
+async def list_products(request: Request, response: Response, supplier_id: Optional[int] = None,
+                        sku_id: Optional[int] = None, quantity_lt: Optional[int] = None,
+                        ids: Optional[str] = None, fields: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1, le=listing.MAX_PAGE_SIZE),
+                        sort: Optional[str] = None, offset: Optional[int] = Query(None, ge=0), count: bool = False,
+                        row_format: str = Depends(serialization.row_format), db: AsyncConnection = Depends(get_db)):
+    not_modified = await versions.check_etag(db, request, response, 'products')
+    if not_modified:
+        return not_modified
+    return await listing.fetch_page(db, request, response, 'products', fields, (
+        (listing.IDS_FILTER, listing.parse_ids(ids)),
+        ('supplier_id = ?', supplier_id),
+        ('sku_id = ?', sku_id),
+        ('quantity < ?', quantity_lt),
+    ), after, limit, row_format, sort, offset, count)
+
+@router.put("/products/{product_id}")
+async def update_product(product_id: int, product: Product, db: AsyncConnection = Depends(get_db)):
+    await db.execute('''
         UPDATE products
         SET sku_id = ?, name = ?, price = ?, quantity = ?, supplier_id = ?
         WHERE id = ?
     ''', (product.sku_id, product.name, product.price, product.quantity, product.supplier_id, product_id))
-    conn.commit()
+    entity_cache.invalidate('products', product_id)
     return {"message": "Product updated successfully"}
 
 
-@app.delete("/products/{product_id}")
-async def delete_product(product_id: int):
-    cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
-    conn.commit()
+@router.delete("/products/{product_id}")
+async def delete_product(product_id: int, db: AsyncConnection = Depends(get_db)):
+    await db.execute('DELETE FROM products WHERE id = ?', (product_id,))
+    entity_cache.invalidate('products', product_id)
     return {"message": "Product deleted successfully"}
 
-@app.get("/suppliers/")
-async def get_suppliers():
-    cursor.execute('SELECT * FROM suppliers')
-    suppliers = cursor.fetchall()
-    return  suppliers
-
-@app.get("/orders/")
-async def get_orders():
-    cursor.execute('SELECT * FROM orders')
-    orders = cursor.fetchall()
-    return  orders
+@router.get("/suppliers/")
+async def get_suppliers(request: Request, response: Response, email: Optional[str] = None,
+                        ids: Optional[str] = None, fields: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1, le=listing.MAX_PAGE_SIZE),
+                        sort: Optional[str] = None, offset: Optional[int] = Query(None, ge=0), count: bool = False,
+                        row_format: str = Depends(serialization.row_format), db: AsyncConnection = Depends(get_db)):
+    not_modified = await versions.check_etag(db, request, response, 'suppliers')
+    if not_modified:
+        return not_modified
+    return await listing.fetch_page(db, request, response, 'suppliers', fields, (
+        (listing.IDS_FILTER, listing.parse_ids(ids)),
+        ('email = ?', email),
+    ), after, limit, row_format, sort, offset, count)
+
+@router.get("/orders/")
+async def get_orders(request: Request, response: Response, product_id: Optional[int] = None,
+                     customer_email: Optional[str] = None, ids: Optional[str] = None, fields: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1, le=listing.MAX_PAGE_SIZE),
+                     sort: Optional[str] = None, offset: Optional[int] = Query(None, ge=0), count: bool = False,
+                     row_format: str = Depends(serialization.row_format), db: AsyncConnection = Depends(get_db)):
+    not_modified = await versions.check_etag(db, request, response, 'orders')
+    if not_modified:
+        return not_modified
+    return await listing.fetch_page(db, request, response, 'orders', fields, (
+        (listing.IDS_FILTER, listing.parse_ids(ids)),
+        ('product_id = ?', product_id),
+        ('customer_email = ?', customer_email),
+    ), after, limit, row_format, sort, offset, count)
 
 # Get a specific order by ID
-@app.get("/orders/{order_id}")
+@router.get("/orders/{order_id}")
 async def get_order(order_id: int):
-    cursor.execute('SELECT * FROM orders WHERE id = ?', (order_id,))
-    order = cursor.fetchone()
+    order = await fetch_entity('orders', order_id)
     if order is None:
         raise HTTPException(status_code=404, detail="Order not found")
-    columns = [description[0] for description in cursor.description]  # Get column names
-    order_data = dict(zip(columns, order))  # Create a dictionary of column names and values
-    return order_data
+    # Always keyed, as this route has always returned an object
+    return serialization.shape_row(listing.TABLE_COLUMNS['orders'], order, True)
 
 # Get a specific supplier by ID
-@app.get("/suppliers/{supplier_id}")
+@router.get("/suppliers/{supplier_id}")
 async def get_supplier(supplier_id: int):
-    cursor.execute('SELECT * FROM suppliers WHERE id = ?', (supplier_id,))
-    supplier = cursor.fetchone()
+    supplier = await fetch_entity('suppliers', supplier_id)
     if supplier is None:
         raise HTTPException(status_code=404, detail="Supplier not found")
-    columns = [description[0] for description in cursor.description]  # Get column names
-    supplier_data = dict(zip(columns, supplier))  # Create a dictionary of column names and values
-    return supplier_data
+    # Always keyed, as this route has always returned an object
+    return serialization.shape_row(listing.TABLE_COLUMNS['suppliers'], supplier, True)
 
 # CRUD operations for Orders
-@app.post("/orders/")
-async def create_order(order: Order):
-    cursor.execute('''
+@router.post("/orders/")
+async def create_order(order: Order, db: AsyncConnection = Depends(get_db)):
+    await db.execute('''
         INSERT INTO orders (product_id, quantity, customer_name, customer_email)
         VALUES (?, ?, ?, ?)
     ''', (order.product_id, order.quantity, order.customer_name, order.customer_email))
-    conn.commit()
     return {"message": "Order created successfully"}
 
 
 # CRUD operations for Suppliers
-@app.post("/suppliers/")
-async def create_supplier(supplier: Supplier):
-    cursor.execute('''
+@router.post("/suppliers/")
+async def create_supplier(supplier: Supplier, db: AsyncConnection = Depends(get_db)):
+    await db.execute('''
         INSERT INTO suppliers (name, email)
         VALUES (?, ?)
     ''', (supplier.name, supplier.email))
-    conn.commit()
     return {"message": "Supplier created successfully"}
 
 
 # CRUD operations for SKUs
-@app.post("/skus/")
-async def create_sku(sku: SKU):
-    cursor.execute('''
+@router.post("/skus/")
+async def create_sku(sku: SKU, db: AsyncConnection = Depends(get_db)):
+    await db.execute('''
         INSERT INTO skus (name, location, capacity)
         VALUES (?, ?, ?)
     ''', (sku.name, sku.location, sku.capacity))
-    conn.commit()
     return {"message": "SKU created successfully"}
 
 # Read SKU details
-@app.get("/skus/{sku_id}")
-async def read_sku(sku_id: int):
-    cursor.execute('SELECT * FROM skus WHERE id = ?', (sku_id,))
-    sku = cursor.fetchone()
+@router.get("/skus/{sku_id}")
+async def read_sku(sku_id: int, keyed: bool = Depends(serialization.keyed_rows)):
+    sku = await fetch_entity('skus', sku_id)
     if sku is None:
         raise HTTPException(status_code=404, detail="SKU not found")
-    print(sku)
-    return sku
-
-# Read SKU details
-@app.get("/skus")
-async def read_sku():
-    cursor.execute('SELECT * FROM skus ', ())
-    sku = cursor.fetchall()
-    if sku is None:
-        raise HTTPException(status_code=404, detail="SKU not found")
-    return sku
+    return serialization.shape_row(listing.TABLE_COLUMNS['skus'], sku, keyed)
+
+# List SKUs
+@router.get("/skus")
+async def list_skus(request: Request, response: Response, location: Optional[str] = None,
+                    ids: Optional[str] = None, fields: Optional[str] = None, after: Optional[int] = None, limit: Optional[int] = Query(None, ge=1, le=listing.MAX_PAGE_SIZE),
+                    sort: Optional[str] = None, offset: Optional[int] = Query(None, ge=0), count: bool = False,
+                    row_format: str = Depends(serialization.row_format), db: AsyncConnection = Depends(get_db)):
+    not_modified = await versions.check_etag(db, request, response, 'skus')
+    if not_modified:
+        return not_modified
+    return await listing.fetch_page(db, request, response, 'skus', fields, (
+        (listing.IDS_FILTER, listing.parse_ids(ids)),
+        ('location = ?', location),
+    ), after, limit, row_format, sort, offset, count)
 # Update SKU details
-@app.put("/skus/{sku_id}")
-async def update_sku(sku_id: int, sku: SKU):
-    cursor.execute('''
+@router.put("/skus/{sku_id}")
+async def update_sku(sku_id: int, sku: SKU, db: AsyncConnection = Depends(get_db)):
+    await db.execute('''
         UPDATE skus
         SET name = ?, location = ?, capacity = ?
         WHERE id = ?
     ''', (sku.name, sku.location, sku.capacity, sku_id))
-    conn.commit()
+    entity_cache.invalidate('skus', sku_id)
     return {"message": "SKU updated successfully"}
 
 # Delete SKU
-@app.delete("/skus/{sku_id}")
-async def delete_sku(sku_id: int):
-    cursor.execute('DELETE FROM skus WHERE id = ?', (sku_id,))
-    conn.commit()
+@router.delete("/skus/{sku_id}")
+async def delete_sku(sku_id: int, db: AsyncConnection = Depends(get_db)):
+    await db.execute('DELETE FROM skus WHERE id = ?', (sku_id,))
+    entity_cache.invalidate('skus', sku_id)
     return {"message": "SKU deleted successfully"}
 
-@app.delete("/orders/{order_id}")
-async def delete_order(order_id: int):
-    cursor.execute('DELETE FROM orders WHERE id = ?', (order_id,))
-    conn.commit()
+@router.delete("/orders/{order_id}")
+async def delete_order(order_id: int, db: AsyncConnection = Depends(get_db)):
+    await db.execute('DELETE FROM orders WHERE id = ?', (order_id,))
+    entity_cache.invalidate('orders', order_id)
     return {"message": "Order deleted successfully"}
 
-@app.delete("/suppliers/{supplier_id}")
-async def delete_supplier(supplier_id: int):
-    cursor.execute('DELETE FROM suppliers WHERE id = ?', (supplier_id,))
-    conn.commit()
+@router.delete("/suppliers/{supplier_id}")
+async def delete_supplier(supplier_id: int, db: AsyncConnection = Depends(get_db)):
+    await db.execute('DELETE FROM suppliers WHERE id = ?', (supplier_id,))
+    entity_cache.invalidate('suppliers', supplier_id)
     return {"message": "Supplier deleted successfully"}
 
 # Update an existing order by ID
-@app.put("/orders/{order_id}")
-async def update_order(order_id: int, updated_order: Order):
+@router.put("/orders/{order_id}")
+async def update_order(order_id: int, updated_order: Order, db: AsyncConnection = Depends(get_db)):
     # Check if the order exists
-    cursor.execute('SELECT * FROM orders WHERE id = ?', (order_id,))
-    existing_order = cursor.fetchone()
+    existing_order = await db.fetchone('SELECT * FROM orders WHERE id = ?', (order_id,))
     if existing_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -392,17 +458,16 @@ async def update_order(order_id: int, updated_order: Order):
     update_values.append(order_id)
 
     # Execute the update query
-    cursor.execute(update_query, update_values)
-    conn.commit()
+    await db.execute(update_query, update_values)
 
+    entity_cache.invalidate('orders', order_id)
     return {"message": "Order updated successfully"}
 
 
 # Update an existing supplier by ID
-@app.put("/suppliers/{supplier_id}")
-async def update_supplier(supplier_id: int, updated_supplier: Supplier):
-    cursor.execute('SELECT * FROM suppliers WHERE id = ?', (supplier_id,))
-    existing_supplier = cursor.fetchone()
+@router.put("/suppliers/{supplier_id}")
+async def update_supplier(supplier_id: int, updated_supplier: Supplier, db: AsyncConnection = Depends(get_db)):
+    existing_supplier = await db.fetchone('SELECT * FROM suppliers WHERE id = ?', (supplier_id,))
     if existing_supplier is None:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
@@ -410,45 +475,145 @@ async def update_supplier(supplier_id: int, updated_supplier: Supplier):
     update_query = 'UPDATE suppliers SET name = ?, email = ? WHERE id = ?'
     update_values = (updated_supplier.name, updated_supplier.email, supplier_id)
 
-    cursor.execute(update_query, update_values)
-    conn.commit()
+    await db.execute(update_query, update_values)
     
+    entity_cache.invalidate('suppliers', supplier_id)
     return {"message": "Supplier updated successfully"}
 
+#-------------------------export------------------------------
+@router.get("/export/{table}")
+async def export_table(table: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    if table not in export.EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail="Table not found")
+    # The stream holds its own connection, from its first chunk to its last
+    return StreamingResponse(
+        export.stream_table(database, table, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
 #-------------------------analytics------------------------------
-@app.get("/capacity-analytics")
-async def read_sku():
-    cursor.execute('''SELECT 
-            s.id AS sku_id, 
-            s.name AS sku_name, 
-            s.capacity AS total_capacity, 
-            COALESCE(SUM(p.quantity), 0) AS used_capacity
-        FROM 
-            skus s
-        LEFT JOIN 
-            products p ON s.id = p.sku_id
-        GROUP BY 
-            s.id, s.name, s.capacity''', ())
-    sku = cursor.fetchall()
-    if sku is None:
-        raise HTTPException(status_code=404, detail="SKU not found")
-    return sku
-@app.get("/sales-analytics")
-async def read_sku():
-    cursor.execute('''SELECT 
-                p.name AS product_name, 
-                COALESCE(SUM(o.quantity), 0) AS total_sold
-            FROM 
-                products p
-            LEFT JOIN 
-                orders o ON p.id = o.product_id
-            GROUP BY 
-                p.name''', ())
-    sku = cursor.fetchall()
-    if sku is None:
-        raise HTTPException(status_code=404, detail="SKU not found")
-    return sku
+# Analytics and reports run on report_engine, away from the request pool
+@router.get("/capacity-analytics")
+async def capacity_analytics(request: Request, response: Response, row_format: str = Depends(serialization.row_format)):
+    not_modified = await versions.check_etag(report_engine, request, response, 'skus', 'products')
+    if not_modified:
+        return not_modified
+    return await listing.fetch_all(report_engine, response, analytics.CAPACITY_QUERY, analytics.CAPACITY_COLUMNS, row_format)
+
+@router.get("/sales-analytics")
+async def sales_analytics(request: Request, response: Response, row_format: str = Depends(serialization.row_format)):
+    not_modified = await versions.check_etag(report_engine, request, response, 'products', 'orders')
+    if not_modified:
+        return not_modified
+    return await listing.fetch_all(report_engine, response, analytics.SALES_QUERY, analytics.SALES_COLUMNS, row_format)
+
+# Units, revenue and sales per supplier
+@router.get("/reports/supplier-revenue")
+async def supplier_revenue_report(request: Request, response: Response, dates: tuple = Depends(date_range),
+                                  row_format: str = Depends(serialization.row_format)):
+    not_modified = await versions.check_etag(report_engine, request, response, 'sales', 'products', 'suppliers')
+    if not_modified:
+        return not_modified
+    sql, params = analytics.supplier_revenue_query(*dates)
+    return await listing.fetch_all(report_engine, response, sql, analytics.SUPPLIER_REVENUE_COLUMNS, row_format, params)
+
+# Best-selling products by revenue
+@router.get("/reports/top-products")
+async def top_products_report(request: Request, response: Response, dates: tuple = Depends(date_range),
+                              limit: int = Query(10, ge=1, le=listing.MAX_PAGE_SIZE),
+                              row_format: str = Depends(serialization.row_format)):
+    not_modified = await versions.check_etag(report_engine, request, response, 'sales', 'products')
+    if not_modified:
+        return not_modified
+    sql, params = analytics.top_products_query(*dates, limit)
+    return await listing.fetch_all(report_engine, response, sql, analytics.TOP_PRODUCTS_COLUMNS, row_format, params)
+
+# Units and value of stock on hand per SKU location
+@router.get("/reports/stock-value")
+async def stock_value_report(request: Request, response: Response, row_format: str = Depends(serialization.row_format)):
+    not_modified = await versions.check_etag(report_engine, request, response, 'products', 'skus')
+    if not_modified:
+        return not_modified
+    return await listing.fetch_all(report_engine, response, analytics.STOCK_VALUE_QUERY, analytics.STOCK_VALUE_COLUMNS, row_format)
+
+# Compare the analytics summary tables with a full recomputation
+@router.get("/analytics/consistency")
+async def analytics_consistency(db: AsyncConnection = Depends(get_db)):
+    mismatches = await db.run(analytics.check_consistency)
+    return {"consistent": not mismatches, "mismatches": mismatches}
+
+# Same check, correcting any summary rows that disagree
+@router.post("/analytics/consistency/repair")
+async def repair_analytics(db: AsyncConnection = Depends(get_db)):
+    mismatches = await db.run(analytics.check_consistency, True)
+    return {"repaired": mismatches}
+
+#-------------------------events------------------------------
+# Server-sent change records; resume with ?since= or the Last-Event-ID header
+@router.get("/events")
+async def change_events(since: Optional[int] = Query(None, ge=0), entities: Optional[str] = None,
+                        last_event_id: Optional[str] = Header(None)):
+    if since is None and last_event_id:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID must be a change sequence number")
+    selected = None
+    if entities:
+        selected = {entity.strip() for entity in entities.split(',') if entity.strip()}
+        unknown = selected.difference(events.ENTITIES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown entities: {', '.join(sorted(unknown))}")
+    return StreamingResponse(
+        change_feed.stream(since, selected),
+        media_type="text/event-stream",
+        # Proxies must pass each event through as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+#-------------------------debug------------------------------
+@router.get("/debug/cache")
+async def cache_stats():
+    return entity_cache.stats()
+
+# Statements over INVENTORY_SLOW_QUERY_MS in this process, grouped by normalized SQL
+@router.get("/debug/slow-queries")
+async def slow_query_stats(limit: int = Query(20, ge=1, le=slowlog.MAX_FINGERPRINTS),
+                           order: str = Query("total", pattern="^(total|mean|max|count)$")):
+    return {
+        "threshold_ms": config.SLOW_QUERY_MS,
+        "log_file": slowlog.slow_queries.path or None,
+        "queries": slowlog.slow_queries.top(limit, order),
+    }
+
+@router.delete("/debug/slow-queries")
+async def reset_slow_query_stats():
+    slowlog.slow_queries.reset()
+    return {"message": "Slow-query statistics cleared"}
+
+# Prometheus scrape target
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+def create_app():
+    """Build the application. Importing this module has no database side effects."""
+    app = FastAPI(lifespan=lifespan, default_response_class=serialization.FastJSONResponse)
+    app.include_router(router)
+    if config.METRICS_ENABLED:
+        app.add_middleware(metrics.MetricsMiddleware)
+    return app
+
+
+app = create_app()
+
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    if config.WORKERS > 1:
+        uvicorn.run("main:app", host=config.HOST, port=config.PORT, workers=config.WORKERS,
+                    timeout_graceful_shutdown=config.SHUTDOWN_TIMEOUT)
+    else:
+        uvicorn.run(app, host=config.HOST, port=config.PORT, timeout_graceful_shutdown=config.SHUTDOWN_TIMEOUT)
@@ -0,0 +1,226 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A small dependency-free subset of what prometheus_client offers: labelled
+counters and histograms, gauges read from callbacks at scrape time, and an
+ASGI middleware timing every request. Recording is a dict lookup, a bisect
+and a few additions under a lock, cheap enough to leave on in production.
+"""
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; fine enough at the low end for single SQLite statements
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between event-loop lag probes
+LOOP_LAG_INTERVAL = 0.25
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        _registry.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self, lock):
+        self.value = 0
+        self._lock = lock
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild(self._lock)
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, upper_bounds, lock):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = lock
+
+    def observe(self, value):
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets, self._lock)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        with self._lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Gauge:
+    """A value read from a callback at scrape time; kind may also be counter."""
+
+    def __init__(self, name, documentation, callback, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.kind = kind
+        _registry.append(self)
+
+    def render(self):
+        name = f'{self.name}_total' if self.kind == 'counter' else self.name
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+            f'{name} {_format_value(self.callback())}',
+        ]
+
+
+def render():
+    """Every registered metric in the text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time from request start to the end of the response body.',
+    ('method', 'route', 'status'),
+)
+DB_BUSY_RETRIES = Counter('db_busy_retries', 'Database calls retried after SQLITE_BUSY.')
+DB_CALL_DURATION = Histogram(
+    'db_call_duration_seconds', 'Time spent running one database call on a DB thread, by operation.',
+    ('operation',),
+)
+DB_EXECUTOR_WAIT = Histogram('db_executor_wait_seconds', 'Time a database call waited for a DB thread.')
+DB_SLOW_QUERIES = Counter('db_slow_queries', 'Statements over the slow-query threshold.')
+DB_COMMIT_DURATION = Histogram('db_commit_duration_seconds', 'Time spent in COMMIT.')
+ENCODE_DURATION = Histogram('response_encode_duration_seconds', 'Time spent encoding rows, by format.', ('format',))
+EVENT_LOOP_LAG = Histogram('event_loop_lag_seconds', 'How late the event loop woke a sleeping task.')
+
+
+_in_progress = 0
+REQUESTS_IN_PROGRESS = Gauge('http_requests_in_progress', 'Requests being handled.', lambda: _in_progress)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording REQUEST_DURATION for every HTTP request.
+
+    The route label is the matched path template (/products/{product_id}),
+    never the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        global _in_progress
+        started = time.perf_counter()
+        status = 500
+        _in_progress += 1
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_progress -= 1
+            route = scope.get('route')
+            REQUEST_DURATION.labels(
+                scope['method'], route.path if route is not None else 'unmatched', status
+            ).observe(time.perf_counter() - started)
+
+
+async def watch_event_loop(interval=LOOP_LAG_INTERVAL):
+    """Sample event-loop lag forever; run it as a background task."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
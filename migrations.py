@@ -0,0 +1,359 @@
+import sqlite3
+
+from database import transaction
+
+# Tables whose writes bump their row in table_versions
+VERSIONED_TABLES = ('products', 'skus', 'orders', 'suppliers', 'sales')
+
+# Trigger bodies shared by the sales rollup triggers of migration 6
+_ADD_DAILY_SALE = '''
+            INSERT INTO sales_daily (sale_date, product_id, quantity, revenue, sales)
+            SELECT date(NEW.sale_date), NEW.product_id, COALESCE(NEW.quantity, 0), COALESCE(NEW.price, 0), 1
+            WHERE date(NEW.sale_date) IS NOT NULL AND NEW.product_id IS NOT NULL
+            ON CONFLICT (sale_date, product_id) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue,
+                sales = sales + 1;
+            INSERT INTO sales_daily_total (sale_date, quantity, revenue, sales)
+            SELECT date(NEW.sale_date), COALESCE(NEW.quantity, 0), COALESCE(NEW.price, 0), 1
+            WHERE date(NEW.sale_date) IS NOT NULL AND NEW.product_id IS NOT NULL
+            ON CONFLICT (sale_date) DO UPDATE SET
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue,
+                sales = sales + 1;
+'''
+_REMOVE_DAILY_SALE = '''
+            UPDATE sales_daily
+            SET quantity = quantity - COALESCE(OLD.quantity, 0),
+                revenue = revenue - COALESCE(OLD.price, 0),
+                sales = sales - 1
+            WHERE sale_date = date(OLD.sale_date) AND product_id = OLD.product_id;
+            DELETE FROM sales_daily WHERE sale_date = date(OLD.sale_date) AND product_id = OLD.product_id AND sales <= 0;
+            UPDATE sales_daily_total
+            SET quantity = quantity - COALESCE(OLD.quantity, 0),
+                revenue = revenue - COALESCE(OLD.price, 0),
+                sales = sales - 1
+            WHERE sale_date = date(OLD.sale_date) AND OLD.product_id IS NOT NULL;
+            DELETE FROM sales_daily_total WHERE sale_date = date(OLD.sale_date) AND sales <= 0;
+'''
+
+# Columns recorded in change_log per table by migration 7 (id is the row key)
+CHANGE_COLUMNS = {
+    'products': ('sku_id', 'name', 'price', 'quantity', 'supplier_id'),
+    'skus': ('name', 'location', 'capacity'),
+    'orders': ('product_id', 'quantity', 'customer_name', 'customer_email'),
+    'suppliers': ('name', 'email'),
+    'sales': ('product_id', 'quantity', 'price', 'sale_date'),
+}
+
+
+def _change_triggers(table, columns):
+    every = ', '.join(f"'{column}', NEW.{column}" for column in columns)
+    # One row per changed column, folded into a JSON object; no-op updates log nothing
+    changed = ' UNION ALL '.join(
+        f"SELECT '{column}' AS name, NEW.{column} AS value WHERE NEW.{column} IS NOT OLD.{column}"
+        for column in columns
+    )
+    return (
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_change_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, op, fields)
+            VALUES ('{table}', NEW.id, 'insert', json_object({every}));
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_change_update AFTER UPDATE ON {table}
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, op, fields)
+            SELECT '{table}', NEW.id, 'update', json_group_object(name, value)
+            FROM ({changed})
+            HAVING COUNT(*) > 0;
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_change_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO change_log (entity, entity_id, op) VALUES ('{table}', OLD.id, 'delete');
+        END
+        ''',
+    )
+
+
+# Ordered schema migrations: (version, description, statements).
+# Append new steps at the end; never edit a step that has shipped.
+MIGRATIONS = [
+    (1, "Create inventory tables", (
+        '''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sku_id INTEGER,
+            name TEXT,
+            price REAL,
+            quantity INTEGER,
+            supplier_id INTEGER,
+            FOREIGN KEY (sku_id) REFERENCES skus(id),
+            FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,
+            quantity INTEGER,
+            customer_name TEXT,
+            customer_email TEXT,
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS suppliers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            email TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS skus (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            location TEXT,
+            capacity INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,
+            quantity INTEGER,
+            price REAL,
+            sale_date DATE DEFAULT CURRENT_DATE,
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+        ''',
+    )),
+    (2, "Index foreign-key and lookup columns", (
+        # GET /sales/{product_id} and per-product date ranges
+        'CREATE INDEX IF NOT EXISTS idx_sales_product_date ON sales (product_id, sale_date)',
+        'CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (sale_date)',
+        # Covers the /capacity-analytics join and SUM(quantity) per SKU
+        'CREATE INDEX IF NOT EXISTS idx_products_sku_quantity ON products (sku_id, quantity)',
+        'CREATE INDEX IF NOT EXISTS idx_products_supplier ON products (supplier_id)',
+        # Lets /sales-analytics walk products already grouped by name
+        'CREATE INDEX IF NOT EXISTS idx_products_name ON products (name)',
+        # Covers the /sales-analytics join and SUM(quantity) per product
+        'CREATE INDEX IF NOT EXISTS idx_orders_product_quantity ON orders (product_id, quantity)',
+    )),
+    (3, "Index list endpoint filters", (
+        # Each index is ordered by id within a key, so keyset pages stay cheap
+        'CREATE INDEX IF NOT EXISTS idx_orders_product ON orders (product_id)',
+        'CREATE INDEX IF NOT EXISTS idx_orders_customer_email ON orders (customer_email)',
+        'CREATE INDEX IF NOT EXISTS idx_products_quantity ON products (quantity)',
+        'CREATE INDEX IF NOT EXISTS idx_skus_location ON skus (location)',
+        'CREATE INDEX IF NOT EXISTS idx_suppliers_email ON suppliers (email)',
+    )),
+    (4, "Maintain analytics summary tables", (
+        # Stock held per SKU, behind /capacity-analytics
+        '''
+        CREATE TABLE IF NOT EXISTS sku_usage (
+            sku_id INTEGER PRIMARY KEY,
+            used_capacity INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        # Units ordered per product, behind /sales-analytics
+        '''
+        CREATE TABLE IF NOT EXISTS product_sold (
+            product_id INTEGER PRIMARY KEY,
+            total_sold INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        # Triggers keep both tables current for every write path, including
+        # bulk writes and group-committed sales
+        '''
+        CREATE TRIGGER IF NOT EXISTS products_usage_insert AFTER INSERT ON products
+        BEGIN
+            INSERT OR IGNORE INTO sku_usage (sku_id) SELECT NEW.sku_id WHERE NEW.sku_id IS NOT NULL;
+            UPDATE sku_usage SET used_capacity = used_capacity + COALESCE(NEW.quantity, 0) WHERE sku_id = NEW.sku_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS products_usage_delete AFTER DELETE ON products
+        BEGIN
+            UPDATE sku_usage SET used_capacity = used_capacity - COALESCE(OLD.quantity, 0) WHERE sku_id = OLD.sku_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS products_usage_update AFTER UPDATE OF sku_id, quantity ON products
+        BEGIN
+            UPDATE sku_usage SET used_capacity = used_capacity - COALESCE(OLD.quantity, 0) WHERE sku_id = OLD.sku_id;
+            INSERT OR IGNORE INTO sku_usage (sku_id) SELECT NEW.sku_id WHERE NEW.sku_id IS NOT NULL;
+            UPDATE sku_usage SET used_capacity = used_capacity + COALESCE(NEW.quantity, 0) WHERE sku_id = NEW.sku_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS orders_sold_insert AFTER INSERT ON orders
+        BEGIN
+            INSERT OR IGNORE INTO product_sold (product_id) SELECT NEW.product_id WHERE NEW.product_id IS NOT NULL;
+            UPDATE product_sold SET total_sold = total_sold + COALESCE(NEW.quantity, 0) WHERE product_id = NEW.product_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS orders_sold_delete AFTER DELETE ON orders
+        BEGIN
+            UPDATE product_sold SET total_sold = total_sold - COALESCE(OLD.quantity, 0) WHERE product_id = OLD.product_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS orders_sold_update AFTER UPDATE OF product_id, quantity ON orders
+        BEGIN
+            UPDATE product_sold SET total_sold = total_sold - COALESCE(OLD.quantity, 0) WHERE product_id = OLD.product_id;
+            INSERT OR IGNORE INTO product_sold (product_id) SELECT NEW.product_id WHERE NEW.product_id IS NOT NULL;
+            UPDATE product_sold SET total_sold = total_sold + COALESCE(NEW.quantity, 0) WHERE product_id = NEW.product_id;
+        END
+        ''',
+        # Backfill from the existing rows
+        '''
+        INSERT INTO sku_usage (sku_id, used_capacity)
+        SELECT sku_id, SUM(COALESCE(quantity, 0)) FROM products WHERE sku_id IS NOT NULL GROUP BY sku_id
+        ''',
+        '''
+        INSERT INTO product_sold (product_id, total_sold)
+        SELECT product_id, SUM(COALESCE(quantity, 0)) FROM orders WHERE product_id IS NOT NULL GROUP BY product_id
+        ''',
+    )),
+    (5, "Track a write version per table", (
+        '''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        ''',
+        *(f"INSERT OR IGNORE INTO table_versions (name) VALUES ('{table}')" for table in VERSIONED_TABLES),
+        *(
+            f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END
+            '''
+            for table in VERSIONED_TABLES
+            for event in ('INSERT', 'UPDATE', 'DELETE')
+        ),
+    )),
+    (6, "Roll up sales per day", (
+        # Units, revenue and sale count per (day, product), behind /sales/timeseries.
+        # sales.price already holds the line total, so revenue is its sum.
+        '''
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            sale_date TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            sales INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (sale_date, product_id)
+        ) WITHOUT ROWID
+        ''',
+        # Per-product ranges; the primary key serves date ranges across products
+        'CREATE INDEX IF NOT EXISTS idx_sales_daily_product ON sales_daily (product_id, sale_date)',
+        # The same per day for the whole catalog, so unfiltered ranges read one row a day
+        '''
+        CREATE TABLE IF NOT EXISTS sales_daily_total (
+            sale_date TEXT PRIMARY KEY,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            sales INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS sales_daily_insert AFTER INSERT ON sales
+        BEGIN
+            {_ADD_DAILY_SALE}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS sales_daily_delete AFTER DELETE ON sales
+        BEGIN
+            {_REMOVE_DAILY_SALE}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS sales_daily_update AFTER UPDATE OF product_id, quantity, price, sale_date ON sales
+        BEGIN
+            {_REMOVE_DAILY_SALE}
+            {_ADD_DAILY_SALE}
+        END
+        ''',
+        # Backfill from the existing rows
+        '''
+        INSERT INTO sales_daily (sale_date, product_id, quantity, revenue, sales)
+        SELECT date(sale_date), product_id, SUM(COALESCE(quantity, 0)), SUM(COALESCE(price, 0)), COUNT(*)
+        FROM sales
+        WHERE date(sale_date) IS NOT NULL AND product_id IS NOT NULL
+        GROUP BY date(sale_date), product_id
+        ''',
+        '''
+        INSERT INTO sales_daily_total (sale_date, quantity, revenue, sales)
+        SELECT sale_date, SUM(quantity), SUM(revenue), SUM(sales) FROM sales_daily GROUP BY sale_date
+        ''',
+    )),
+    (7, "Log row changes for the /events feed", (
+        # seq orders every change across tables and is the resume point for
+        # clients; fields holds the new values of the changed columns as JSON
+        '''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            fields TEXT,
+            changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        )
+        ''',
+        *(
+            trigger
+            for table, columns in CHANGE_COLUMNS.items()
+            for trigger in _change_triggers(table, columns)
+        ),
+    )),
+    (8, "Drop the orders index that duplicates a prefix of another", (
+        # idx_orders_product_quantity from migration 2 serves every product_id lookup
+        'DROP INDEX IF EXISTS idx_orders_product',
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    try:
+        return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+    except sqlite3.OperationalError:
+        # No schema_version table yet
+        return 0
+
+
+def migrate(conn):
+    """Apply pending migrations and return the resulting schema version.
+
+    An up-to-date database costs a single read. Otherwise the steps run under
+    BEGIN IMMEDIATE, so workers starting together apply them exactly once: the
+    first takes the write lock, the rest wait and then find nothing to do.
+    """
+    if current_version(conn) >= LATEST_VERSION:
+        return LATEST_VERSION
+    with transaction(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        version = current_version(conn)
+        for step, description, statements in MIGRATIONS:
+            if step <= version:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (step, description))
+    return LATEST_VERSION
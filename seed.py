@@ -0,0 +1,86 @@
+"""Load the demo inventory into an empty database.
+
+    python seed.py
+
+Seeding is opt-in and idempotent: it runs the migrations, then inserts the demo
+rows only when the skus, suppliers, products and orders tables are all empty.
+"""
+import migrations
+from database import connect, transaction
+
+SKUS = [
+    ('Himalaya Factory', 'Bangalore, Karnataka', 100),
+    ('Apple Manufacturing', 'Mumbai, Maharashtra', 200),
+    ('Kellogg\'s Plant', 'Mumbai, Maharashtra', 150),
+    ('Dove Manufacturing', 'Pune, Maharashtra', 80),
+    ('Daawat Rice Factory', 'Karnal, Haryana', 250),
+    ('Bombay Dyeing Factory', 'Mumbai, Maharashtra', 120),
+    ('Tropicana Factory', 'Jaipur, Rajasthan', 180),
+    ('Colgate-Palmolive Factory', 'Mumbai, Maharashtra', 90),
+    ('Parker Pen Manufacturing', 'Ahmedabad, Gujarat', 50),
+    ('ITC Paper Factory', 'Hyderabad, Telangana', 70)
+]
+
+SUPPLIERS = [
+    ('Supplier 1', 'supplier1@example.com'),
+    ('Supplier 2', 'supplier2@example.com'),
+    ('Supplier 3', 'supplier3@example.com'),
+    ('Supplier 4', 'supplier4@example.com'),
+    ('Supplier 5', 'supplier5@example.com')
+]
+
+PRODUCTS = [
+    (1, 'Shampoo', 5.99, 50, 1),
+    (2, 'Apple', 0.99, 100, 2),
+    (3, 'Cereals', 3.49, 80, 3),
+    (4, 'Soap', 1.49, 120, 1),
+    (5, 'Rice', 2.99, 200, 4),
+    (6, 'Towel', 8.99, 30, 5),
+    (7, 'Juice', 4.29, 70, 3),
+    (8, 'Toothpaste', 2.49, 90, 1),
+    (9, 'Pen', 1.99, 60, 2),
+    (10, 'Book', 9.99, 20, 4)
+]
+
+ORDERS = [
+    (1, 2, 'John Doe', 'john@example.com'),
+    (2, 5, 'Jane Smith', 'jane@example.com'),
+    (3, 3, 'Alice Johnson', 'alice@example.com'),
+    (4, 1, 'Bob Brown', 'bob@example.com'),
+    (5, 4, 'Charlie Davis', 'charlie@example.com'),
+    (6, 2, 'Eva Wilson', 'eva@example.com'),
+    (7, 3, 'Frank Miller', 'frank@example.com'),
+    (8, 2, 'Grace Thompson', 'grace@example.com'),
+    (9, 1, 'Henry Garcia', 'henry@example.com'),
+    (10, 2, 'Ivy Clark', 'ivy@example.com')
+]
+
+
+def seed(conn):
+    """Insert the demo rows unless any seeded table already has data.
+
+    Returns True when the data was inserted.
+    """
+    with transaction(conn):
+        for table in ('skus', 'suppliers', 'products', 'orders'):
+            if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone() is not None:
+                return False
+        conn.executemany('INSERT INTO skus (name, location, capacity) VALUES (?, ?, ?)', SKUS)
+        conn.executemany('INSERT INTO suppliers (name, email) VALUES (?, ?)', SUPPLIERS)
+        conn.executemany('''
+            INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?)
+        ''', PRODUCTS)
+        conn.executemany('''
+            INSERT INTO orders (product_id, quantity, customer_name, customer_email) VALUES (?, ?, ?, ?)
+        ''', ORDERS)
+    return True
+
+
+if __name__ == "__main__":
+    conn = connect()
+    migrations.migrate(conn)
+    if seed(conn):
+        print("Seeded demo inventory")
+    else:
+        print("Database already has data, nothing seeded")
+    conn.close()
@@ -0,0 +1,140 @@
+import json
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+import columnar
+import config
+import metrics
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+# Row formats a list or analytics route can produce, by media type. "dict" and
+# "tuple" are both plain JSON and are told apart by X-Row-Format.
+MEDIA_TYPES = {
+    'dict': 'application/json',
+    'tuple': 'application/json',
+    'columns': 'application/vnd.inventory.columns+json',
+    'packed': 'application/vnd.inventory.packed',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+_ACCEPTED = {
+    'application/vnd.inventory.columns+json': 'columns',
+    'application/vnd.inventory.packed': 'packed',
+    'application/vnd.apache.arrow.stream': 'arrow',
+}
+
+_JSON_RANGES = ('application/json', 'application/*', '*/*')
+
+
+def dumps(content):
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def keyed_rows(request: Request):
+    """FastAPI dependency: False when rows should be sent as legacy JSON arrays.
+
+    Rows are keyed objects unless the server runs with INVENTORY_ROW_FORMAT=tuple
+    or the client sends X-Row-Format: tuple.
+    """
+    return request.headers.get("x-row-format", config.ROW_FORMAT) != "tuple"
+
+
+def _available(row_format):
+    return row_format != 'arrow' or columnar.pyarrow is not None
+
+
+def _accepted(accept):
+    """Media ranges of an Accept header, best first."""
+    ranges = []
+    for position, item in enumerate(accept.split(',')):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(ranges)]
+
+
+def row_format(request: Request):
+    """FastAPI dependency: the row format a list or analytics route should send.
+
+    A columnar format is chosen through the Accept header; X-Row-Format may
+    also name one directly. Anything else gets JSON rows, keyed or as tuples
+    as decided by keyed_rows(). Raises 406 when the client asks only for
+    columnar formats this server cannot produce (Arrow without pyarrow).
+    """
+    requested = request.headers.get("x-row-format")
+    if requested in _ACCEPTED.values() and _available(requested):
+        return requested
+    json_format = 'dict' if keyed_rows(request) else 'tuple'
+    accept = request.headers.get("accept")
+    if not accept:
+        return json_format
+    ranges = _accepted(accept)
+    for media_type in ranges:
+        if media_type in _JSON_RANGES:
+            return json_format
+        found = _ACCEPTED.get(media_type)
+        if found is not None and _available(found):
+            return found
+    if any(media_type in _ACCEPTED for media_type in ranges):
+        raise HTTPException(status_code=406, detail=f"Supported media types: {', '.join(sorted(set(MEDIA_TYPES.values())))}")
+    # Accept headers that name none of our formats keep getting JSON, as before
+    return json_format
+
+
+def shape_row(columns, row, keyed):
+    if row is None or not keyed:
+        return row
+    return dict(zip(columns, row))
+
+
+def shape_rows(columns, rows, keyed):
+    # One shared column tuple, zipped per row, is the cheapest way to key rows
+    if not keyed:
+        return rows
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _encode_rows(columns, rows, row_format):
+    if row_format == 'columns':
+        return dumps(columnar.transpose(columns, rows))
+    if row_format == 'packed':
+        return columnar.encode_packed(columns, rows)
+    if row_format == 'arrow':
+        return columnar.encode_arrow(columns, rows)
+    return dumps(shape_rows(columns, rows, row_format != 'tuple'))
+
+
+def encode_rows(columns, rows, row_format):
+    started = time.perf_counter()
+    try:
+        return _encode_rows(columns, rows, row_format)
+    finally:
+        metrics.ENCODE_DURATION.labels(row_format).observe(time.perf_counter() - started)
+
+
+def rows_response(body, row_format, headers=None):
+    """Wrap a body from encode_rows(), skipping FastAPI's jsonable_encoder pass."""
+    return Response(body, media_type=MEDIA_TYPES[row_format], headers=headers)
@@ -0,0 +1,171 @@
+"""Slow-query log: statements over a time threshold, with their query plans.
+
+database.Connection (and the analytics engine) time every statement,
+including fetching its rows. Each one that takes longer than
+INVENTORY_SLOW_QUERY_MS is written as a JSON line to a rotating file, when
+INVENTORY_SLOW_QUERY_LOG names one, together with its normalized SQL, parameters, duration and EXPLAIN QUERY PLAN output,
+and folded into per-fingerprint totals served by /debug/slow-queries.
+"""
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import partial
+
+import config
+import metrics
+
+# Distinct fingerprints kept in memory; the one with least total time goes first
+MAX_FINGERPRINTS = 500
+
+# Longer string parameters are cut to this many characters in the log
+MAX_PARAM_LENGTH = 200
+
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b')
+_IN_LISTS = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL with comments, whitespace and literals folded, so variants group together."""
+    sql = _COMMENTS.sub(' ', sql)
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _IN_LISTS.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def explain_sqlite(conn, sql, params):
+    """EXPLAIN QUERY PLAN for a statement, as indented lines."""
+    # Through the base class, so the EXPLAIN itself is not timed
+    rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    depth = {}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+
+def _jsonable(value):
+    if isinstance(value, str) and len(value) > MAX_PARAM_LENGTH:
+        return value[:MAX_PARAM_LENGTH] + '...'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<{len(value)} bytes>'
+    return value
+
+
+def _params(params):
+    if isinstance(params, dict):
+        return {key: _jsonable(value) for key, value in params.items()}
+    return [_jsonable(value) for value in params or ()]
+
+
+class Timing:
+    """Running time of one statement, reported once it crosses the threshold.
+
+    explain(target, sql, params) returns the plan lines, where target is the
+    connection or cursor the statement ran on.
+    """
+
+    __slots__ = ('log', 'explain', 'target', 'sql', 'params', 'elapsed', 'reported')
+
+    def __init__(self, log, explain, target, sql, params, elapsed=0.0):
+        self.log = log
+        self.explain = explain
+        self.target = target
+        self.sql = sql
+        self.params = params
+        self.elapsed = 0.0
+        self.reported = False
+        self.add(elapsed)
+
+    def add(self, seconds):
+        self.elapsed += seconds
+        if not self.reported and self.elapsed >= self.log.threshold:
+            self.reported = True
+            self.log.record(self.sql, self.params, self.elapsed, partial(self.explain, self.target))
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms, path='', max_bytes=0, backups=0):
+        self.threshold = threshold_ms / 1000
+        self.path = path
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._logger = None
+        if path:
+            # RotatingFileHandler cannot rotate a file other processes write to,
+            # and workers may share this setting however they were started
+            root, ext = os.path.splitext(path)
+            self.path = f'{root}.{os.getpid()}{ext}'
+            self._logger = logging.getLogger(f'{__name__}.{id(self)}')
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=max_bytes, backupCount=backups, delay=True, encoding='utf-8',
+            ))
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def record(self, sql, params, seconds, explain):
+        """Log one slow statement; explain(sql, params) returns its plan lines."""
+        try:
+            plan = explain(sql, params)
+        except Exception as exc:  # e.g. a statement EXPLAIN cannot take, or a closed connection
+            plan = [f'EXPLAIN failed: {exc}']
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        duration_ms = round(seconds * 1000, 3)
+        params = _params(params)
+        now = time.time()
+        metrics.DB_SLOW_QUERIES.inc()
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                if len(self._stats) >= MAX_FINGERPRINTS:
+                    del self._stats[min(self._stats, key=lambda k: self._stats[k]['total_ms'])]
+                entry = self._stats[key] = {
+                    'fingerprint': key, 'sql': normalized, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry.update(last_ms=duration_ms, last_seen=now, last_params=params, plan=plan)
+        if self._logger is not None:
+            self._logger.info(json.dumps({
+                'time': now, 'fingerprint': key, 'duration_ms': duration_ms,
+                'sql': normalized, 'params': params, 'plan': plan,
+            }, default=str))
+
+    def top(self, limit=20, order='total'):
+        """The worst fingerprints, ordered by total, mean or max time or by count."""
+        with self._lock:
+            entries = [
+                dict(entry, total_ms=round(entry['total_ms'], 3), mean_ms=round(entry['total_ms'] / entry['count'], 3))
+                for entry in self._stats.values()
+            ]
+        entries.sort(key=lambda entry: entry[order if order == 'count' else f'{order}_ms'], reverse=True)
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+slow_queries = SlowQueryLog(
+    config.SLOW_QUERY_MS, config.SLOW_QUERY_LOG, config.SLOW_QUERY_LOG_BYTES, config.SLOW_QUERY_LOG_BACKUPS,
+)
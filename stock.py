@@ -0,0 +1,175 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import connect, timed_call, transaction
+
+# Take stock only if enough is on hand; the guard and the decrement are one
+# statement, so two concurrent sales can never both pass the check.
+DECREMENT_STOCK = '''
+    UPDATE products
+    SET quantity = quantity - ?
+    WHERE id = ? AND quantity >= ?
+    RETURNING quantity
+'''
+
+INSERT_SALE = '''
+    INSERT INTO sales (product_id, quantity, price)
+    VALUES (?, ?, ?)
+'''
+
+
+class ProductNotFound(Exception):
+    pass
+
+
+class OutOfStock(Exception):
+    pass
+
+
+def _sell(conn, product_id, quantity, price):
+    # Must run inside a write transaction
+    updated = conn.execute(DECREMENT_STOCK, (quantity, product_id, quantity)).fetchall()
+    if not updated:
+        # Only the failure path pays for a second lookup
+        if conn.execute('SELECT 1 FROM products WHERE id = ?', (product_id,)).fetchone() is None:
+            raise ProductNotFound(product_id)
+        raise OutOfStock(product_id)
+    conn.execute(INSERT_SALE, (product_id, quantity, quantity * price))
+    return updated[0][0]
+
+
+def sell(conn, product_id, quantity, price):
+    """Decrement stock and record the sale in one short write transaction.
+
+    Returns the quantity left on hand. Raises OutOfStock when the guarded
+    decrement touches no row, or ProductNotFound when the product is missing.
+    """
+    with transaction(conn):
+        return _sell(conn, product_id, quantity, price)
+
+
+def sell_batch(conn, sales):
+    """Apply many (product_id, quantity, price) sales in one transaction.
+
+    Returns one entry per sale: the quantity left on hand, or the OutOfStock /
+    ProductNotFound exception for that sale. Rejected sales write nothing, so
+    they do not affect the rest of the batch.
+    """
+    results = []
+    with transaction(conn):
+        for product_id, quantity, price in sales:
+            try:
+                results.append(_sell(conn, product_id, quantity, price))
+            except (OutOfStock, ProductNotFound) as exc:
+                results.append(exc)
+    return results
+
+
+class SaleWriter:
+    """Group-commit pipeline for POST /sales/.
+
+    Callers queue their sale and await a future. A single writer task takes up
+    to batch_size queued sales, waiting at most max_wait seconds for a batch to
+    fill, applies them with sell_batch() in one transaction and only then
+    resolves each caller's future. A sale is therefore acknowledged only after
+    the commit that made it durable, and one fsync is shared by the whole batch.
+    The writer's connection uses synchronous=FULL, so acknowledged sales also
+    survive a power loss.
+    """
+
+    def __init__(self, path, batch_size, max_wait, queue_size):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue_size = queue_size
+        self.running = False
+        self._queue = None
+        self._task = None
+        self._conn = None
+        self._executor = None
+
+    @property
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sale-writer")
+        loop = asyncio.get_running_loop()
+        self._conn = await loop.run_in_executor(self._executor, connect, self.path)
+        self._conn.execute('PRAGMA synchronous = FULL')
+        self._queue = asyncio.Queue(self.queue_size)
+        self._task = asyncio.create_task(self._run())
+        self.running = True
+
+    async def stop(self):
+        """Stop taking sales, commit everything already queued, then close."""
+        if not self.running:
+            return
+        self.running = False
+        await self._queue.put(None)
+        await self._task
+        # Sales that raced past the stop marker still get committed
+        leftovers = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                leftovers.append(item)
+        if leftovers:
+            await self._commit(leftovers)
+        self._conn.close()
+        self._executor.shutdown()
+
+    async def submit(self, product_id, quantity, price):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((product_id, quantity, price), future))
+        return await future
+
+    async def _next_batch(self):
+        """Collect the next batch; the second value is False once stop() was called."""
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        if first is None:
+            return [], False
+        batch = [first]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, False
+            batch.append(item)
+        return batch, True
+
+    async def _run(self):
+        keep_going = True
+        while keep_going:
+            batch, keep_going = await self._next_batch()
+            if batch:
+                await self._commit(batch)
+
+    async def _commit(self, batch):
+        loop = asyncio.get_running_loop()
+        sales = [sale for sale, _ in batch]
+        try:
+            results = await loop.run_in_executor(
+                self._executor, timed_call, sell_batch, self._conn, (sales,), time.perf_counter()
+            )
+        except Exception as exc:
+            # Nothing in the batch was committed, so nothing is acknowledged
+            results = [exc] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Keep the modules under test off the working database and slow-query log,
+# and skip probing for DuckDB on every app startup; config reads these once,
+# at first import.
+_tmp = tempfile.mkdtemp(prefix='inventory-tests-')
+os.environ.setdefault('INVENTORY_DB', os.path.join(_tmp, 'inventory.db'))
+os.environ['INVENTORY_SLOW_QUERY_LOG'] = ''
+os.environ.setdefault('INVENTORY_ANALYTICS_ENGINE', 'sqlite')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh database file at the latest migration."""
+    import migrations
+    from database import connect
+
+    path = str(tmp_path / 'inventory.db')
+    conn = connect(path)
+    migrations.migrate(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def conn(db_path):
+    from database import connect
+
+    conn = connect(db_path)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+async def client():
+    """An httpx client for the app, with its lifespan running around the test.
+
+    Every test shares the INVENTORY_DB database, so tests create the rows they
+    use and look them up by the ids they were given.
+    """
+    import httpx
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            yield client
+
+
+@pytest.fixture
+def create_products(client):
+    """POST products in bulk; returns their ids."""
+    async def create(*quantities, price=2.5, sku_id=1, supplier_id=1):
+        response = await client.post('/products/bulk', json=[
+            {'sku_id': sku_id, 'name': f'item {quantity}', 'price': price,
+             'quantity': quantity, 'supplier_id': supplier_id}
+            for quantity in quantities
+        ])
+        assert response.status_code == 200, response.text
+        return [result['id'] for result in response.json()['results']]
+    return create
@@ -0,0 +1,50 @@
+"""insert_many() reports the ids it created; update_many() the ids it found."""
+import bulk
+
+COLUMNS = ('name', 'location', 'capacity')
+
+
+def names(conn, ids):
+    placeholders = ', '.join('?' for _ in ids)
+    rows = dict(conn.execute(f'SELECT id, name FROM skus WHERE id IN ({placeholders})', ids))
+    return [rows.get(sku_id) for sku_id in ids]
+
+
+def test_insert_many_into_empty_table(conn):
+    assert conn.execute("SELECT 1 FROM sqlite_sequence WHERE name = 'skus'").fetchone() is None
+
+    ids = bulk.insert_many(conn, 'skus', COLUMNS, [(f'shelf {n}', 'A', n) for n in range(3)])
+
+    assert ids == [1, 2, 3]
+    assert names(conn, ids) == ['shelf 0', 'shelf 1', 'shelf 2']
+
+
+def test_insert_many_after_deletes(conn):
+    bulk.insert_many(conn, 'skus', COLUMNS, [(f'old {n}', 'A', n) for n in range(5)])
+    # AUTOINCREMENT never hands a deleted id out again
+    conn.execute('DELETE FROM skus WHERE id >= 3')
+
+    ids = bulk.insert_many(conn, 'skus', COLUMNS, [(f'new {n}', 'B', n) for n in range(4)])
+
+    assert ids == [6, 7, 8, 9]
+    assert names(conn, ids) == ['new 0', 'new 1', 'new 2', 'new 3']
+    assert bulk.insert_many(conn, 'skus', COLUMNS, [('last', 'C', 1)]) == [10]
+
+
+def test_update_many_reports_missing_ids_across_lookup_chunks(conn):
+    count = bulk._LOOKUP_CHUNK * 2 + 100
+    bulk.insert_many(conn, 'skus', COLUMNS, [(f'shelf {n}', 'A', n) for n in range(count)])
+    # Missing ids on both sides of each chunk boundary, plus a repeated id
+    missing = {bulk._LOOKUP_CHUNK, bulk._LOOKUP_CHUNK + 1, bulk._LOOKUP_CHUNK * 2 + 1, count + 1, count + 2}
+    conn.execute(f"DELETE FROM skus WHERE id IN ({', '.join(str(sku_id) for sku_id in missing)})")
+    ids = list(range(1, count + 3)) + [7]
+    rows = [(f'moved {sku_id}', 'Z', sku_id) for sku_id in ids]
+
+    updated = bulk.update_many(conn, 'skus', COLUMNS, ids, rows)
+
+    assert updated == set(ids) - missing
+    assert conn.execute("SELECT COUNT(*) FROM skus WHERE location = 'Z'").fetchone() == (len(updated),)
+    assert conn.execute('SELECT COUNT(*) FROM skus').fetchone() == (len(updated),)
+    assert names(conn, [1, bulk._LOOKUP_CHUNK - 1, bulk._LOOKUP_CHUNK + 2, count]) == [
+        'moved 1', f'moved {bulk._LOOKUP_CHUNK - 1}', f'moved {bulk._LOOKUP_CHUNK + 2}', f'moved {count}',
+    ]
@@ -0,0 +1,61 @@
+"""check_consistency() finds summary rows that drifted, and repair fixes them."""
+import pytest
+
+import analytics
+import stock
+
+# A drift to inject, and the mismatch it must be reported as
+DRIFTS = {
+    'sku_usage off by some units': (
+        'UPDATE sku_usage SET used_capacity = used_capacity + 5 WHERE sku_id = 1',
+        {'table': 'sku_usage', 'sku_id': 1, 'stored': 12, 'expected': 7},
+    ),
+    'sku_usage row for no products': (
+        'INSERT INTO sku_usage (sku_id, used_capacity) VALUES (9, 3)',
+        {'table': 'sku_usage', 'sku_id': 9, 'stored': 3, 'expected': 0},
+    ),
+    'product_sold row missing': (
+        'DELETE FROM product_sold WHERE product_id = 1',
+        {'table': 'product_sold', 'product_id': 1, 'stored': 0, 'expected': 6},
+    ),
+    'sales_daily revenue off': (
+        "UPDATE sales_daily SET revenue = revenue + 1 WHERE sale_date = '2025-01-02' AND product_id = 2",
+        {'table': 'sales_daily', 'sale_date': '2025-01-02', 'product_id': 2,
+         'stored': {'quantity': 1, 'revenue': 5.0, 'sales': 1},
+         'expected': {'quantity': 1, 'revenue': 4.0, 'sales': 1}},
+    ),
+}
+
+
+@pytest.fixture
+def stocked(conn):
+    conn.executemany(
+        'INSERT INTO products (id, sku_id, name, price, quantity, supplier_id) VALUES (?, ?, ?, ?, ?, 1)',
+        [(1, 1, 'bolt', 2.0, 5), (2, 1, 'nut', 4.0, 5), (3, 2, 'washer', 1.0, 5)],
+    )
+    conn.executemany(
+        "INSERT INTO orders (product_id, quantity, customer_name, customer_email) VALUES (?, ?, 'Ann', 'ann@example.com')",
+        [(1, 2), (1, 4), (3, 1)],
+    )
+    stock.sell(conn, 1, 2, 2.0)
+    stock.sell(conn, 2, 1, 4.0)
+    conn.execute("UPDATE sales SET sale_date = '2025-01-02 10:00:00'")
+    stock.sell(conn, 3, 1, 1.0)
+    return conn
+
+
+def test_triggers_keep_summaries_consistent(stocked):
+    assert analytics.check_consistency(stocked) == []
+
+
+@pytest.mark.parametrize('name', DRIFTS)
+def test_drift_is_reported_and_repaired(stocked, name):
+    drift, mismatch = DRIFTS[name]
+    stocked.execute(drift)
+
+    assert analytics.check_consistency(stocked) == [mismatch]
+    # A plain check leaves the drift in place
+    assert analytics.check_consistency(stocked) == [mismatch]
+
+    assert analytics.check_consistency(stocked, repair=True) == [mismatch]
+    assert analytics.check_consistency(stocked) == []
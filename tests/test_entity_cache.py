@@ -0,0 +1,113 @@
+"""Cached single-row reads never outlive a write to their row."""
+from multiprocessing import shared_memory
+
+import pytest
+
+import cache
+
+PRODUCT = {'sku_id': 1, 'name': 'widget', 'price': 2.5, 'quantity': 5, 'supplier_id': 1}
+
+
+async def read(client, product_id):
+    response = await client.get(f'/products/{product_id}', headers={'X-Row-Format': 'dict'})
+    return response.json() if response.status_code == 200 else response.status_code
+
+
+async def cached_read(client, product_id):
+    """Read the product until it is served from the cache."""
+    await read(client, product_id)
+    hits = (await client.get('/debug/cache')).json()['hits']
+    product = await read(client, product_id)
+    assert (await client.get('/debug/cache')).json()['hits'] == hits + 1
+    return product
+
+
+@pytest.mark.anyio
+async def test_writes_invalidate_cached_product(client, create_products):
+    product_id, other_id = await create_products(5, 5)
+    await cached_read(client, other_id)
+
+    assert (await cached_read(client, product_id))['name'] == 'item 5'
+    await client.put(f'/products/{product_id}', json={**PRODUCT, 'name': 'renamed'})
+    assert (await read(client, product_id))['name'] == 'renamed'
+
+    await cached_read(client, product_id)
+    await client.post('/sales/', json={'product_id': product_id, 'quantity': 2, 'price': 2.5})
+    assert (await read(client, product_id))['quantity'] == 3
+
+    await cached_read(client, product_id)
+    response = await client.put('/products/bulk', json=[{**PRODUCT, 'id': product_id, 'price': 4.0}])
+    assert response.json()['results'] == [{'id': product_id, 'status': 'updated'}]
+    assert (await read(client, product_id))['price'] == 4.0
+
+    await cached_read(client, product_id)
+    await client.delete(f'/products/{product_id}')
+    assert await read(client, product_id) == 404
+
+    # The other product was never written, so it is still served from the cache
+    await cached_read(client, other_id)
+
+
+@pytest.fixture
+def shared_versions(tmp_path):
+    """Opens SharedVersions on one block, as separate workers would."""
+    opened = []
+
+    def attach():
+        versions = cache.SharedVersions(cache.shared_name(str(tmp_path / 'inventory.db')), 64,
+                                        str(tmp_path / 'cachelock'))
+        opened.append(versions)
+        return versions
+    yield attach
+    for versions in opened:
+        versions.close()
+
+
+def test_bump_in_another_worker_invalidates(shared_versions):
+    ours = cache.EntityCache(10, versions=shared_versions())
+    theirs = cache.EntityCache(10, versions=shared_versions())
+    key = ('products', 7)
+    ours.set(key, ('cached',), ours.stamp(key))
+    assert ours.get(key) == ('cached',)
+
+    theirs.invalidate(*key)
+
+    assert ours.get(key) is None
+
+
+def test_read_racing_a_write_is_not_cached(shared_versions):
+    ours = cache.EntityCache(10, versions=shared_versions())
+    theirs = cache.EntityCache(10, versions=shared_versions())
+    key = ('products', 7)
+    stamp = ours.stamp(key)
+    # Another worker commits and invalidates between our stamp and our set()
+    theirs.invalidate(*key)
+    ours.set(key, ('read before the write',), stamp)
+
+    assert ours.get(key) is None
+
+
+def test_last_worker_to_close_removes_the_block(tmp_path):
+    name = cache.shared_name(str(tmp_path / 'inventory.db'))
+    first = cache.SharedVersions(name, 64, str(tmp_path / 'cachelock'))
+    second = cache.SharedVersions(name, 64, str(tmp_path / 'cachelock'))
+    first.bump(0)
+
+    first.close()
+    assert second[0] == 1
+    second.close()
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_caches_sharing_local_versions_invalidate_each_other():
+    versions = cache.LocalVersions(64)
+    first = cache.EntityCache(10, versions=versions)
+    second = cache.EntityCache(10, versions=versions)
+    key = ('skus', 3)
+    first.set(key, ('cached',), first.stamp(key))
+
+    second.invalidate(*key)
+
+    assert first.get(key) is None
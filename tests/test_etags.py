@@ -0,0 +1,93 @@
+"""List and analytics routes answer a current If-None-Match with 304."""
+import re
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+# Each tagged route and the tables its ETag covers
+TAGGED = {
+    '/products': ('products',),
+    '/suppliers/': ('suppliers',),
+    '/orders/': ('orders',),
+    '/skus': ('skus',),
+    '/sales/timeseries': ('sales',),
+    '/sales/timeseries?supplier_id=1': ('products', 'sales'),
+    '/capacity-analytics': ('products', 'skus'),
+    '/sales-analytics': ('orders', 'products'),
+    '/reports/supplier-revenue': ('products', 'sales', 'suppliers'),
+    '/reports/top-products': ('products', 'sales'),
+    '/reports/stock-value': ('products', 'skus'),
+}
+
+PRODUCT = {'sku_id': 1, 'name': 'widget', 'price': 2.5, 'quantity': 5, 'supplier_id': 1}
+
+
+def tagged_versions(etag):
+    """{table: version} from an ETag such as W/"products3.skus7-1a2b3c4d"."""
+    tag = etag[len('W/"'):-1].rsplit('-', 1)[0]
+    return {name: int(version) for name, version in (re.fullmatch(r'(\D+)(\d+)', part).groups()
+                                                      for part in tag.split('.'))}
+
+
+async def create_product(client):
+    response = await client.post('/products/bulk', json=[PRODUCT])
+    return response.json()['results'][0]['id']
+
+
+# One write to the table; a sale needs a product to sell first, so that is
+# made by prepare and only the sale itself is the write
+WRITES = {
+    'products': lambda client, _: create_product(client),
+    'orders': lambda client, _: client.post('/orders/', json={
+        'product_id': 1, 'quantity': 1, 'customer_name': 'Ann', 'customer_email': 'ann@example.com'}),
+    'suppliers': lambda client, _: client.post('/suppliers/', json={'name': 'Acme', 'email': 'acme@example.com'}),
+    'skus': lambda client, _: client.post('/skus/', json={'name': 'shelf', 'location': 'A1', 'capacity': 10}),
+    'sales': lambda client, product_id: client.post('/sales/', json={
+        'product_id': product_id, 'quantity': 1, 'price': 2.5}),
+}
+
+
+@pytest.mark.parametrize('path', TAGGED)
+async def test_current_etag_is_not_modified(client, path):
+    response = await client.get(path)
+    assert response.status_code == 200
+    etag = response.headers['etag']
+    assert sorted(tagged_versions(etag)) == list(TAGGED[path])
+
+    response = await client.get(path, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+    response = await client.get(path, headers={'If-None-Match': f'W/"stale", {etag}'})
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize('path,table', [(path, table) for path, tables in TAGGED.items() for table in tables])
+async def test_write_changes_etag(client, path, table):
+    product_id = await create_product(client)
+    before = (await client.get(path)).headers['etag']
+
+    await WRITES[table](client, product_id)
+
+    response = await client.get(path, headers={'If-None-Match': before})
+    assert response.status_code == 200
+    assert tagged_versions(response.headers['etag'])[table] > tagged_versions(before)[table]
+
+
+async def test_etag_depends_on_query_and_representation(client):
+    etags = set()
+    for path in ('/products', '/products?limit=5', '/products?limit=6', '/products?supplier_id=1'):
+        for headers in ({}, {'X-Row-Format': 'tuple'}, {'X-Row-Format': 'dict'},
+                        {'Accept': 'application/vnd.inventory.columns+json'}):
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200
+            assert response.headers['vary'] == 'Accept, X-Row-Format'
+            etags.add(response.headers['etag'])
+    assert len(etags) == 16
+
+    response = await client.get('/products?limit=5', headers={'X-Row-Format': 'tuple'})
+    tuple_etag = response.headers['etag']
+    response = await client.get('/products?limit=5', headers={'X-Row-Format': 'dict', 'If-None-Match': tuple_etag})
+    assert response.status_code == 200
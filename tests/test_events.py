@@ -0,0 +1,167 @@
+"""GET /events over ASGI: resuming, resets, filtering and shutdown.
+
+httpx's ASGITransport hands back a response once the app finishes it, so
+each test opens its streams, waits for the feed to catch up, then closes the
+feed the way shutdown does and reads what every stream sent.
+"""
+import asyncio
+import json
+import signal
+
+import pytest
+
+import config
+import events
+import main
+from database import connect
+
+pytestmark = pytest.mark.anyio
+
+PRODUCT = {'sku_id': 1, 'name': 'widget', 'price': 2.5, 'quantity': 5, 'supplier_id': 1}
+
+
+def last_seq():
+    conn = connect(config.DATABASE_PATH)
+    try:
+        return conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def parse(body):
+    """[(event, data)] from an event stream, leaving out comments."""
+    sent = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if fields:
+            sent.append((fields['event'], json.loads(fields['data'])))
+    return sent
+
+
+async def wait_until(condition, timeout=5):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def read_streams(client, *requests, until=None):
+    """Open an /events stream per (params, headers), close the feed once it
+    has read up to change until, and return what each stream sent."""
+    feed = main.change_feed
+    responses = [asyncio.ensure_future(client.get('/events', params=params, headers=headers))
+                 for params, headers in requests]
+    await wait_until(lambda: feed.subscribers == len(requests))
+    if until is not None:
+        await wait_until(lambda: feed.head >= until)
+    # Give the streams a moment to write out what they were woken for
+    await asyncio.sleep(0.1)
+    feed.close()
+    responses = await asyncio.wait_for(asyncio.gather(*responses), 5)
+    for response in responses:
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('text/event-stream')
+    return [parse(response.text) for response in responses]
+
+
+def changes(sent):
+    return [(data['seq'], data['entity'], data['op']) for event, data in sent if event == 'change']
+
+
+async def test_resume_from_since_or_last_event_id(client, create_products):
+    start = last_seq()
+    ids = await create_products(1, 2, 3)
+    end = last_seq()
+    assert end == start + 3
+
+    from_since, from_header = await read_streams(
+        client, ({'since': start}, {}), ({}, {'Last-Event-ID': str(start + 1)}), until=end,
+    )
+
+    assert from_since[0] == ('ready', {'seq': start})
+    assert changes(from_since) == [(start + n, 'products', 'insert') for n in (1, 2, 3)]
+    assert [data['id'] for event, data in from_since[1:]] == ids
+    assert from_header[0] == ('ready', {'seq': start + 1})
+    assert changes(from_header) == [(start + n, 'products', 'insert') for n in (2, 3)]
+
+
+async def test_live_changes_after_ready(client, create_products):
+    stream = asyncio.ensure_future(read_streams(client, ({}, {}), until=last_seq() + 1))
+    await wait_until(lambda: main.change_feed.subscribers == 1)
+    await asyncio.sleep(0.1)
+    product_id, = await create_products(4)
+
+    sent, = await stream
+
+    assert sent[0][0] == 'ready'
+    assert [(data['entity'], data['id'], data['op'], data['fields']['quantity'])
+            for event, data in sent[1:]] == [('products', product_id, 'insert', 4)]
+
+
+async def test_reset_when_cursor_is_behind_change_log_or_ahead_of_it(client, create_products):
+    await create_products(1, 2, 3)
+    end = last_seq()
+    conn = connect(config.DATABASE_PATH)
+    try:
+        # What the periodic prune does once change_log outgrows its retention
+        conn.execute('DELETE FROM change_log WHERE seq < ?', (end - 1,))
+    finally:
+        conn.close()
+
+    behind, caught_up, ahead = await read_streams(
+        client, ({'since': end - 3}, {}), ({'since': end - 2}, {}), ({'since': end + 10}, {}), until=end,
+    )
+
+    assert behind[0] == ('ready', {'seq': end - 3})
+    assert behind[1] == ('reset', {'seq': end})
+    assert changes(behind) == []
+    # The change right after the cursor is still in change_log, so no reset
+    assert [event for event, _ in caught_up] == ['ready', 'change', 'change']
+    assert ahead == [('reset', {'seq': end})]
+
+
+async def test_entities_filter(client, create_products):
+    start = last_seq()
+    await create_products(1)
+    await client.post('/skus/', json={'name': 'shelf', 'location': 'A1', 'capacity': 10})
+    await client.post('/suppliers/', json={'name': 'Acme', 'email': 'acme@example.com'})
+    end = last_seq()
+
+    skus, both = await read_streams(
+        client, ({'since': start, 'entities': 'skus'}, {}), ({'since': start, 'entities': 'skus, suppliers'}, {}),
+        until=end,
+    )
+
+    assert changes(skus) == [(start + 2, 'skus', 'insert')]
+    assert changes(both) == [(start + 2, 'skus', 'insert'), (start + 3, 'suppliers', 'insert')]
+
+
+async def test_bad_requests(client):
+    response = await client.get('/events', params={'entities': 'products,widgets'})
+    assert response.status_code == 400
+    response = await client.get('/events', headers={'Last-Event-ID': 'latest'})
+    assert response.status_code == 400
+
+
+async def test_exit_signal_ends_open_streams(client):
+    chained = []
+    previous = signal.signal(signal.SIGUSR1, lambda signum, frame: chained.append(signum))
+    restore = events.close_on_exit(main.change_feed, (signal.SIGUSR1,))
+    try:
+        streams = asyncio.ensure_future(asyncio.gather(
+            client.get('/events'), client.get('/events', params={'since': 0}),
+        ))
+        await wait_until(lambda: main.change_feed.subscribers == 2)
+
+        signal.raise_signal(signal.SIGUSR1)
+
+        responses = await asyncio.wait_for(streams, 5)
+    finally:
+        restore()
+        signal.signal(signal.SIGUSR1, previous)
+    assert [response.status_code for response in responses] == [200, 200]
+    assert main.change_feed.subscribers == 0
+    # The server's own handler still runs
+    assert chained == [signal.SIGUSR1]
+    # And streams opened during shutdown end straight after their ready event
+    response = await client.get('/events')
+    assert [event for event, _ in parse(response.text)] == ['ready']
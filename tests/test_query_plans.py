@@ -0,0 +1,93 @@
+"""The hot lookups and the analytics joins must stay on an index after every migration.
+
+Each query is built the way its route builds it and run through EXPLAIN QUERY
+PLAN on a database created by migrations.migrate(), so a later migration that
+drops an index, or a query rewrite the index no longer fits, fails here
+instead of silently going back to a full table scan.
+"""
+import re
+
+import pytest
+
+import analytics
+import listing
+import migrations
+from database import connect
+
+COLUMNS = listing.TABLE_COLUMNS
+
+HOT_QUERIES = {
+    'products by supplier_id': ('products', (('supplier_id = ?', 3),), {'limit': 50}),
+    'products by supplier_id, next page': ('products', (('supplier_id = ?', 3),), {'after': 10, 'limit': 50}),
+    'products by sku_id': ('products', (('sku_id = ?', 3),), {'limit': 50}),
+    'orders by product_id': ('orders', (('product_id = ?', 3),), {'limit': 50}),
+    'sales by product_id': ('sales', (('product_id = ?', 3),), {}),
+    'sales by product_id and sale_date': ('sales', (
+        ('product_id = ?', 3),
+        ('sale_date >= ?', '2025-01-01'),
+        ('sale_date <= ?', '2025-01-31'),
+    ), {}),
+    'sales by sale_date': ('sales', (('sale_date >= ?', '2025-01-01'), ('sale_date <= ?', '2025-01-31')), {}),
+}
+
+# Steps each analytics or report query's plan must contain. Whole-catalog
+# reports still walk their driving table once; what matters is that every
+# join is a keyed lookup and no per-row work falls back to a scan.
+ANALYTICS_QUERIES = {
+    '/capacity-analytics': ((analytics.CAPACITY_QUERY, ()), (
+        r'SEARCH u USING INTEGER PRIMARY KEY',
+    )),
+    '/sales-analytics': ((analytics.SALES_QUERY, ()), (
+        r'SCAN p USING COVERING INDEX idx_products_name',
+        r'SEARCH t USING INTEGER PRIMARY KEY',
+    )),
+    '/reports/stock-value': ((analytics.STOCK_VALUE_QUERY, ()), (
+        r'SEARCH p USING INDEX idx_products_sku_quantity \(sku_id=\?\)',
+    )),
+    '/reports/supplier-revenue by date': (analytics.supplier_revenue_query('2025-01-01', '2025-01-31'), (
+        r'SEARCH sa USING INDEX idx_sales_date',
+        r'SEARCH p USING INTEGER PRIMARY KEY',
+        r'SEARCH s USING INTEGER PRIMARY KEY',
+    )),
+    '/reports/top-products by date': (analytics.top_products_query('2025-01-01', '2025-01-31'), (
+        r'SEARCH sa USING INDEX idx_sales_date',
+        r'SEARCH p USING INTEGER PRIMARY KEY',
+    )),
+    '/sales/timeseries': (analytics.timeseries_query('day', '2025-01-01', '2025-01-31'), (
+        r'SEARCH sales_daily_total USING PRIMARY KEY',
+    )),
+    '/sales/timeseries by product': (analytics.timeseries_query('week', '2025-01-01', None, 3), (
+        r'SEARCH sales_daily USING INDEX idx_sales_daily_product \(product_id=\? AND sale_date>\?\)',
+    )),
+    '/sales/timeseries by supplier': (analytics.timeseries_query('month', None, None, None, 2), (
+        r'SEARCH sales_daily USING INDEX idx_sales_daily_product',
+        r'SEARCH products USING COVERING INDEX idx_products_supplier',
+    )),
+}
+
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    conn = connect(str(tmp_path_factory.mktemp('plans') / 'plans.db'))
+    migrations.migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_an_index(conn, name):
+    table, filters, options = HOT_QUERIES[name]
+    sql, params = listing.build_query(table, COLUMNS[table], filters, **options)
+    plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+    assert any(re.match(rf'SEARCH {table} USING (COVERING )?INDEX ', step) for step in plan), plan
+    assert not any(step.startswith(f'SCAN {table}') for step in plan), plan
+
+
+@pytest.mark.parametrize('name', ANALYTICS_QUERIES)
+def test_analytics_query_plan(conn, name):
+    (sql, params), expected = ANALYTICS_QUERIES[name]
+    plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+    for step in expected:
+        assert any(re.match(step, actual) for actual in plan), (step, plan)
@@ -0,0 +1,89 @@
+"""Group commit: a sale is acknowledged only once it is committed."""
+import asyncio
+
+import pytest
+
+import stock
+from database import connect
+
+pytestmark = pytest.mark.anyio
+
+
+def add_product(conn, quantity):
+    return conn.execute(
+        "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (1, 'widget', 2.5, ?, 1)",
+        (quantity,),
+    ).lastrowid
+
+
+def sales_of(db_path, product_id):
+    # A connection of its own sees only what the writer committed
+    conn = connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM sales WHERE product_id = ?', (product_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+async def test_acknowledged_sales_are_committed(conn, db_path):
+    product_id = add_product(conn, 100)
+    writer = stock.SaleWriter(db_path, batch_size=8, max_wait=0.005, queue_size=100)
+    await writer.start()
+    acknowledged = 0
+
+    async def sell():
+        nonlocal acknowledged
+        await writer.submit(product_id, 1, 2.5)
+        acknowledged += 1
+        assert sales_of(db_path, product_id) >= acknowledged
+
+    try:
+        await asyncio.gather(*(sell() for _ in range(40)))
+    finally:
+        await writer.stop()
+    assert sales_of(db_path, product_id) == 40
+
+
+async def test_failed_sale_rejects_only_its_own_future(conn, db_path):
+    in_stock = add_product(conn, 5)
+    sold_out = add_product(conn, 0)
+    # One batch holds all four sales
+    writer = stock.SaleWriter(db_path, batch_size=4, max_wait=1, queue_size=10)
+    await writer.start()
+    try:
+        results = await asyncio.gather(
+            writer.submit(in_stock, 1, 2.5),
+            writer.submit(sold_out, 1, 2.5),
+            writer.submit(in_stock + sold_out, 1, 2.5),
+            writer.submit(in_stock, 2, 2.5),
+            return_exceptions=True,
+        )
+    finally:
+        await writer.stop()
+
+    assert results[0] == 4 and results[3] == 2
+    assert isinstance(results[1], stock.OutOfStock)
+    assert isinstance(results[2], stock.ProductNotFound)
+    assert sales_of(db_path, in_stock) == 2
+    assert sales_of(db_path, sold_out) == 0
+
+
+async def test_stop_commits_queued_sales(conn, db_path):
+    product_id = add_product(conn, 10)
+    # The first batch would wait a minute to fill; stop() must not
+    writer = stock.SaleWriter(db_path, batch_size=100, max_wait=60, queue_size=100)
+    await writer.start()
+    pending = [asyncio.ensure_future(writer.submit(product_id, 1, 2.5)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    assert not any(future.done() for future in pending)
+
+    stopping = asyncio.ensure_future(writer.stop())
+    await asyncio.sleep(0)
+    # Queued behind the stop marker, as a request racing the shutdown would be
+    pending.append(asyncio.ensure_future(writer.submit(product_id, 1, 2.5)))
+    await asyncio.wait_for(stopping, 5)
+    await asyncio.sleep(0)
+
+    assert all(future.done() for future in pending)
+    assert sorted(future.result() for future in pending) == [4, 5, 6, 7, 8, 9]
+    assert sales_of(db_path, product_id) == 6
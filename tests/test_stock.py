@@ -0,0 +1,70 @@
+"""The guarded decrement never sells stock that is not on hand."""
+import threading
+
+import pytest
+
+import stock
+from database import connect
+
+SELLERS = 8
+
+
+def add_product(conn, quantity):
+    return conn.execute(
+        "INSERT INTO products (sku_id, name, price, quantity, supplier_id) VALUES (1, 'widget', 2.5, ?, 1)",
+        (quantity,),
+    ).lastrowid
+
+
+def test_concurrent_sales_of_the_last_unit(conn, db_path):
+    product_id = add_product(conn, 1)
+    start = threading.Barrier(SELLERS)
+    outcomes = []
+
+    def seller():
+        own = connect(db_path)
+        try:
+            start.wait()
+            outcomes.append(stock.sell(own, product_id, 1, 2.5))
+        except stock.OutOfStock as exc:
+            outcomes.append(exc)
+        finally:
+            own.close()
+
+    threads = [threading.Thread(target=seller) for _ in range(SELLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count(0) == 1
+    assert sum(isinstance(outcome, stock.OutOfStock) for outcome in outcomes) == SELLERS - 1
+    assert conn.execute('SELECT quantity FROM products WHERE id = ?', (product_id,)).fetchone() == (0,)
+    assert conn.execute('SELECT COUNT(*) FROM sales WHERE product_id = ?', (product_id,)).fetchone() == (1,)
+
+
+def test_rejected_sale_writes_nothing(conn):
+    product_id = add_product(conn, 3)
+
+    with pytest.raises(stock.OutOfStock):
+        stock.sell(conn, product_id, 4, 2.5)
+    with pytest.raises(stock.ProductNotFound):
+        stock.sell(conn, product_id + 1, 1, 2.5)
+
+    assert conn.execute('SELECT quantity FROM products WHERE id = ?', (product_id,)).fetchone() == (3,)
+    assert conn.execute('SELECT COUNT(*) FROM sales').fetchone() == (0,)
+
+
+@pytest.mark.anyio
+async def test_sale_beyond_stock_is_a_400(client, create_products):
+    product_id, = await create_products(2)
+
+    response = await client.post('/sales/', json={'product_id': product_id, 'quantity': 3, 'price': 2.5})
+    assert response.status_code == 400
+    response = await client.post('/sales/', json={'product_id': product_id, 'quantity': 2, 'price': 2.5})
+    assert response.json()['quantity'] == 0
+    response = await client.post('/sales/', json={'product_id': product_id, 'quantity': 1, 'price': 2.5})
+    assert response.status_code == 400
+
+    response = await client.get(f'/products/{product_id}', headers={'X-Row-Format': 'dict'})
+    assert response.json()['quantity'] == 0
@@ -1,32 +1,529 @@
 # main.py
+import json
+import queue
+import sys
+import threading
+import time
 import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from tkinter import ttk, messagebox
-import requests
 from tkinter.simpledialog import askstring
+
+import api
 import matplotlib.pyplot as plt
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-BASE_URL = "http://localhost:8000"
+BASE_URL = api.BASE_URL
+# Ask for analytics as column vectors, which is what the charts plot
+COLUMNS_HEADERS = {"Accept": "application/vnd.inventory.columns+json"}
+# Ask list routes for rows as arrays, which is what a Treeview row takes
+TUPLE_HEADERS = {"X-Row-Format": "tuple"}
+# The view that shows each entity of the /events feed
+ENTITY_VIEWS = {"products": "Products", "skus": "SKUs", "orders": "Orders", "suppliers": "Suppliers"}
 
-class TableView(tk.Frame):
-    def __init__(self, parent, columns):
-        super().__init__(parent)
-        
-        self.tree = ttk.Treeview(self, columns=columns, show="headings")
-        for col in columns:
-            self.tree.heading(col, text=col)
-        self.tree.pack(side="left", fill="y")
-        
-        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.tree.configure(yscrollcommand=scrollbar.set)
 
-    def clear(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+def describe_error(error):
+    """A short message for a failed request; an api.APIError carries the API's detail."""
+    return str(error) or type(error).__name__
+
+
+class _Call:
+    __slots__ = ("key", "future", "waiters")
+
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        # (group, on_success, on_error) for everyone waiting on this request
+        self.waiters = []
+
 
-    def insert(self, data):
-        self.tree.insert("", "end", values=data)
+class BackgroundClient:
+    """Runs HTTP requests on worker threads so the Tk main loop never waits on the network.
+
+    Every request goes through one api.Client, which pools connections,
+    retries and answers unchanged pages from its ETag cache. Finished
+    requests are queued and handed back on the Tk thread by a root.after()
+    tick, so callbacks may touch widgets. Identical GETs in flight share one
+    request, and requests tagged with a group (the tab that asked for them)
+    can be cancelled together when the user moves elsewhere. listen()
+    follows a server-sent event stream on a thread of its own.
+    """
+
+    # Milliseconds between checks for finished requests, about a frame at 60 fps
+    POLL_MS = 16
+    # Seconds a tick may spend in callbacks before handing control back to Tk
+    TICK_BUDGET = 0.008
+
+    def __init__(self, root, base_url, workers=4, timeout=(3.05, 30)):
+        self.root = root
+        self.client = api.Client(base_url, timeout=timeout, pool_size=workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gui-io")
+        self._calls = {}
+        # Finished _Calls, and event callbacks from listen(), for the Tk thread
+        self._finished = queue.SimpleQueue()
+        self._after_id = root.after(self.POLL_MS, self._drain)
+
+    def request(self, method, path, on_success=None, on_error=None, group=None, with_headers=False, **kwargs):
+        """Send a request in the background and call on_success(json) or on_error(exc) on the Tk thread.
+
+        With with_headers, on_success gets (json, response headers) instead.
+        """
+        # Only reads are merged; two identical writes are two writes
+        key = (method, path, with_headers, repr(sorted(kwargs.items()))) if method == "GET" else object()
+        return self._submit(key, partial(self._send, method, path, with_headers, kwargs), on_success, on_error, group)
+
+    def get(self, path, on_success=None, on_error=None, group=None, **kwargs):
+        return self.request("GET", path, on_success, on_error, group, **kwargs)
+
+    def list(self, entity, on_success=None, on_error=None, group=None, headers=None, **params):
+        """Every row of entity, following the list route's pages, as one background request."""
+        key = ("LIST", entity, repr(headers), repr(sorted(params.items())))
+        return self._submit(key, partial(self.client.list, entity, headers=headers, **params),
+                            on_success, on_error, group)
+
+    def _submit(self, key, fn, on_success, on_error, group):
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(key)
+            call.future = self._executor.submit(fn)
+            call.future.add_done_callback(lambda future, call=call: self._finished.put(call))
+        call.waiters.append((group, on_success, on_error))
+        return call
+
+    def _send(self, method, path, with_headers, kwargs):
+        # Runs on a worker thread; decoding JSON here keeps big bodies off the Tk thread
+        reply = self.client.send(method, path, **kwargs)
+        return (reply.data, reply.headers) if with_headers else reply.data
+
+    def cancel(self, group):
+        """Drop the callbacks of a group; requests nobody else waits for are cancelled.
+
+        A request already on the wire still completes, but its result is discarded.
+        """
+        for call in list(self._calls.values()):
+            call.waiters = [waiter for waiter in call.waiters if waiter[0] != group]
+            if not call.waiters:
+                call.future.cancel()
+                del self._calls[call.key]
+
+    def listen(self, on_event, entities=None):
+        """Follow GET /events, calling on_event(event, data) on the Tk thread.
+
+        api.Client.events() reconnects when the stream drops, resuming after
+        the last event received.
+        """
+        thread = threading.Thread(target=self._listen, args=(on_event, entities), name="gui-events", daemon=True)
+        thread.start()
+
+    def _listen(self, on_event, entities):
+        for event, data, _ in self.client.events(entities=entities):
+            self._finished.put(partial(on_event, event, data))
+
+    def _complete(self, call):
+        if self._calls.get(call.key) is call:
+            del self._calls[call.key]
+        if call.future.cancelled():
+            return
+        error = call.future.exception()
+        for _, on_success, on_error in call.waiters:
+            try:
+                if error is not None:
+                    (on_error or self.show_error)(error)
+                elif on_success is not None:
+                    on_success(call.future.result())
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+    def _drain(self):
+        deadline = time.perf_counter() + self.TICK_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                item = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Call):
+                self._complete(item)
+                continue
+            try:
+                item()
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+        self._after_id = self.root.after(self.POLL_MS, self._drain)
+
+    def show_error(self, error):
+        messagebox.showerror("Error", f"Request failed: {describe_error(error)}")
+
+    def close(self):
+        self.root.after_cancel(self._after_id)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+
+class TableView(tk.Frame):
+    """A Treeview over a server-side list that holds only the rows on screen.
+
+    Rows are fetched a page at a time with offset/limit as the user scrolls,
+    sorted by the last clicked heading and filtered by the server. The
+    Treeview has one item per visible row, keyed by the row's id, and the
+    last few pages fetched are kept in memory as plain tuples. Every redraw
+    is a diff against what is on screen, so only rows that moved or changed
+    cost a Tk call, and selection and scroll position survive a refresh.
+    """
+
+    PAGE_SIZE = 200
+    # Pages kept in memory, enough for the window and a page either side
+    CACHED_PAGES = 8
+    # Milliseconds scrolling must pause before missing pages are requested
+    FETCH_DELAY_MS = 40
+    # Milliseconds to gather inserts and deletes before refetching the window
+    REFRESH_DELAY_MS = 100
+    WHEEL_ROWS = 3
+    # Filter params not named after the column they test
+    FILTER_COLUMNS = {"quantity_lt": "quantity"}
+
+    def __init__(self, parent, io, endpoint, group, columns, fields, filters=()):
+        super().__init__(parent)
+        self.io = io
+        self.endpoint = endpoint
+        self.group = group
+        self.columns = columns
+        self.fields = fields
+        self.sort = None
+        self.filter = None
+        self.total = None
+        self.top = 0
+        self.visible = 1
+        self.selected_id = None
+        self._pages = OrderedDict()
+        # id -> page for every cached row, so a change finds its row directly
+        self._page_of = {}
+        # Cached pages shown until their refetch arrives
+        self._stale = set()
+        self._pending = set()
+        self._need_count = True
+        self._count_page = None
+        self._generation = 0
+        self._fetch_id = None
+        self._refresh_id = None
+        self._dirty = False
+        # What the Treeview shows: item ids in order, and their values
+        self._order = []
+        self._shown = {}
+
+        if filters:
+            filter_bar = tk.Frame(self)
+            filter_bar.pack(side="top", fill="x")
+            self.filter_field = ttk.Combobox(filter_bar, values=list(filters), state="readonly", width=16)
+            self.filter_field.set(filters[0])
+            self.filter_field.pack(side="left", padx=5, pady=5)
+            self.filter_value = ttk.Entry(filter_bar)
+            self.filter_value.pack(side="left", padx=5, pady=5)
+            self.filter_value.bind("<Return>", lambda event: self.apply_filter())
+            tk.Button(filter_bar, text="Filter", command=self.apply_filter).pack(side="left", padx=5)
+            tk.Button(filter_bar, text="Clear", command=self.clear_filter).pack(side="left", padx=5)
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse")
+        for col, field in zip(columns, fields):
+            self.tree.heading(col, text=col, command=lambda field=field: self.sort_by(field))
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", expand=True, fill="both")
+
+        self.tree.bind("<Configure>", self._resized)
+        self.tree.bind("<Map>", self._mapped)
+        self.tree.bind("<<TreeviewSelect>>", self._selected)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS))
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-self.WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(self.WHEEL_ROWS))
+        self.tree.bind("<Up>", lambda event: self.step(-1))
+        self.tree.bind("<Down>", lambda event: self.step(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.visible))
+        self.tree.bind("<Home>", lambda event: self.scroll_to(0))
+        self.tree.bind("<End>", lambda event: self.scroll_to(self.total or 0))
+
+    def reload(self, keep_position=True):
+        """Forget every row and fetch the window again, counting the rows afresh."""
+        self._generation += 1
+        self._pages.clear()
+        self._page_of.clear()
+        self._stale.clear()
+        self._pending.clear()
+        self._need_count = True
+        self._count_page = None
+        self.total = None
+        if not keep_position:
+            self.top = 0
+            self.selected_id = None
+        self.fetch()
+
+    def refresh(self):
+        """Refetch the window, keeping it on screen until the new rows arrive.
+
+        The new rows are diffed into the Treeview, so only what changed is
+        redrawn. Pages away from the window are dropped rather than refetched.
+        """
+        self._refresh_id = None
+        self._dirty = False
+        self._generation += 1
+        first, last = self._window_pages()
+        for page in [page for page in self._pages if not first <= page <= last]:
+            self._drop_page(page)
+        self._stale = set(self._pages)
+        self._pending.clear()
+        self._need_count = True
+        self._count_page = None
+        self.fetch()
+
+    def _ordering_columns(self):
+        """Columns whose change can move a row into, out of or within the list."""
+        columns = {self.sort.lstrip("-")} if self.sort else set()
+        if self.filter:
+            columns.add(self.FILTER_COLUMNS.get(self.filter[0], self.filter[0]))
+        return columns
+
+    def apply_change(self, op, entity_id, fields):
+        """Apply one change from the /events feed.
+
+        An update to a cached row is patched in place, unless it touches the
+        sort or filter column and so may move the row. An update to a row
+        that is not cached only matters if it touches one of those columns,
+        as it may bring the row into the window. Anything that can move rows
+        is gathered into one refresh of the window.
+        """
+        page = self._page_of.get(entity_id)
+        if op == "update" and not self._ordering_columns().intersection(fields):
+            if page is None:
+                return
+            rows = self._pages[page]
+            for offset, row in enumerate(rows):
+                if row[0] == entity_id:
+                    rows[offset] = tuple(fields.get(field, value) for field, value in zip(self.fields, row))
+                    break
+            if str(entity_id) in self._shown:
+                self._render()
+            return
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        if not self.winfo_viewable():
+            # Hidden; refresh when shown again
+            self._dirty = True
+        elif self._refresh_id is None:
+            self._refresh_id = self.after(self.REFRESH_DELAY_MS, self.refresh)
+
+    def fetch(self):
+        """Request the pages around the window that are neither cached nor on their way."""
+        self._fetch_id = None
+        first, last = self._window_pages()
+        # The window, then a page either side so short scrolls find their rows ready
+        for page in (*range(first, last + 1), last + 1, first - 1):
+            if page < 0 or page in self._pending:
+                continue
+            if page in self._pages and page not in self._stale:
+                self._pages.move_to_end(page)
+                continue
+            if page in self._stale and not first <= page <= last:
+                continue
+            if self.total is not None and page * self.PAGE_SIZE >= self.total and page not in self._stale:
+                continue
+            self._request_page(page)
+
+    def forget_pending(self):
+        # The caller cancelled this view's requests; fetch() asks for them again
+        self._pending.clear()
+        self._count_page = None
+
+    def sort_by(self, field):
+        # Ascending first, then toggle
+        self.sort = f"-{field}" if self.sort == field else field
+        for col, name in zip(self.columns, self.fields):
+            arrow = "" if self.sort.lstrip("-") != name else (" ▼" if self.sort.startswith("-") else " ▲")
+            self.tree.heading(col, text=col + arrow)
+        self.reload(keep_position=False)
+
+    def apply_filter(self):
+        value = self.filter_value.get().strip()
+        self.filter = (self.filter_field.get(), value) if value else None
+        self.reload(keep_position=False)
+
+    def clear_filter(self):
+        self.filter_value.delete(0, tk.END)
+        self.apply_filter()
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units" | "pages")."""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * (self.total or 0)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible if args[2] == "pages" else 1)
+            self.scroll(step)
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def scroll_to(self, top):
+        top = max(0, min(top, (self.total or 0) - self.visible))
+        if top != self.top:
+            self.top = top
+            self._render()
+            # Dragging the scrollbar passes thousands of rows; fetch where it settles
+            if self._fetch_id is not None:
+                self.after_cancel(self._fetch_id)
+            self._fetch_id = self.after(self.FETCH_DELAY_MS, self.fetch)
+        return "break"
+
+    def step(self, rows):
+        """Move the selection by rows, scrolling when it leaves the window.
+
+        Rows whose page has not arrived are only placeholders, so the selection
+        stops at the last loaded row short of them; the page is already on its
+        way, as fetch() asks for the pages either side of the window.
+        """
+        if self.selected_id not in self._shown or not self.total:
+            return None
+        current = self.top + self._order.index(self.selected_id)
+        index = max(0, min(current + rows, self.total - 1))
+        direction = 1 if index > current else -1
+        while index != current and self._row(index) is None:
+            index -= direction
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self.visible:
+            self.scroll_to(index - self.visible + 1)
+        if index != current:
+            self.selected_id = str(self._row(index)[0])
+        self._render()
+        return "break"
+
+    def _resized(self, event):
+        rows = self.tree.get_children()
+        # The first row's box gives both the heading height and the row height
+        box = self.tree.bbox(rows[0]) if rows else None
+        heading, row_height = (box[1], box[3]) if box else (24, 20)
+        visible = max(1, (event.height - heading) // max(1, row_height))
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
+            self.fetch()
+
+    def _mapped(self, event):
+        if self._dirty:
+            self.refresh()
+
+    def _selected(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self.selected_id = selection[0]
+
+    def _window_pages(self):
+        return self.top // self.PAGE_SIZE, (self.top + self.visible) // self.PAGE_SIZE
+
+    def _row(self, index):
+        page = self._pages.get(index // self.PAGE_SIZE)
+        if page is None:
+            return None
+        offset = index % self.PAGE_SIZE
+        return page[offset] if offset < len(page) else None
+
+    def _render(self):
+        total = self.total or 0
+        count = max(0, min(self.visible, total - self.top))
+        wanted = []
+        values = {}
+        for index in range(self.top, self.top + count):
+            row = self._row(index)
+            # Rows not fetched yet hold their place blank until their page arrives
+            item = str(row[0]) if row is not None else f"~{index}"
+            if item in values:
+                # A row seen twice across a stale page boundary; show its slot blank
+                item, row = f"~{index}", None
+            wanted.append(item)
+            values[item] = row if row is not None else ()
+
+        gone = [item for item in self._order if item not in values]
+        if gone:
+            self.tree.delete(*gone)
+        order = [item for item in self._order if item in values]
+        for position, item in enumerate(wanted):
+            if position < len(order) and order[position] == item:
+                pass
+            elif item in self._shown and item not in gone:
+                self.tree.move(item, "", position)
+                order.remove(item)
+                order.insert(position, item)
+            else:
+                self.tree.insert("", position, iid=item, values=values[item])
+                order.insert(position, item)
+                continue
+            if self._shown[item] != values[item]:
+                self.tree.item(item, values=values[item])
+        self._order = wanted
+        self._shown = values
+
+        selection = self.tree.selection()
+        if self.selected_id in values:
+            if selection != (self.selected_id,):
+                self.tree.selection_set(self.selected_id)
+        elif selection:
+            self.tree.selection_remove(*selection)
+        if total:
+            self.scrollbar.set(self.top / total, (self.top + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _request_page(self, page):
+        params = {"offset": page * self.PAGE_SIZE, "limit": self.PAGE_SIZE, "fields": ",".join(self.fields)}
+        if self.sort:
+            params["sort"] = self.sort
+        if self.filter:
+            params[self.filter[0]] = self.filter[1]
+        if self._need_count and self._count_page is None:
+            params["count"] = "true"
+            self._count_page = page
+        self._pending.add(page)
+        generation = self._generation
+        self.io.get(self.endpoint, lambda result: self._page_loaded(generation, page, *result), group=self.group,
+                    with_headers=True, params=params, headers=TUPLE_HEADERS,
+                    on_error=lambda error: self._page_failed(generation, page, error))
+
+    def _drop_page(self, page):
+        for row in self._pages.pop(page):
+            if self._page_of.get(row[0]) == page:
+                del self._page_of[row[0]]
+
+    def _page_loaded(self, generation, page, rows, headers):
+        if generation != self._generation:
+            return
+        self._pending.discard(page)
+        self._stale.discard(page)
+        if page in self._pages:
+            self._drop_page(page)
+        self._pages[page] = [tuple(row) for row in rows]
+        for row in self._pages[page]:
+            self._page_of[row[0]] = page
+        while len(self._pages) > self.CACHED_PAGES:
+            self._drop_page(next(iter(self._pages)))
+        if "X-Total-Count" in headers:
+            self.total = int(headers["X-Total-Count"])
+            self._need_count = False
+            self._count_page = None
+            self.top = max(0, min(self.top, self.total - self.visible))
+            self._render()
+            # Pages requested before the count was known may be needed now
+            self.fetch()
+        elif page * self.PAGE_SIZE < self.top + self.visible and (page + 1) * self.PAGE_SIZE > self.top:
+            self._render()
+
+    def _page_failed(self, generation, page, error):
+        if generation != self._generation:
+            return
+        self._pending.discard(page)
+        if self._count_page == page:
+            self._count_page = None
+        messagebox.showerror("Error", f"Failed to fetch data from the server ({describe_error(error)}).")
 
 from tkinter import simpledialog
 
@@ -37,6 +534,10 @@ class InventoryApp:
         self.root.geometry("800x600")
         root.option_add('*Font', 'Roboto 12')
 
+        # All network I/O runs in the background; see BackgroundClient
+        self.io = BackgroundClient(root, BASE_URL)
+        root.protocol("WM_DELETE_WINDOW", self.close)
+
         self.main_tab = ttk.Notebook(self.root)
         self.main_tab.pack(expand=1, fill="both")
 
@@ -46,6 +547,10 @@ class InventoryApp:
         # Create the "Analytics" tab
         self.analytics_tab = ttk.Frame(self.main_tab)
         self.main_tab.add(self.analytics_tab, text="Analytics")
+        self.main_tab.bind("<<NotebookTabChanged>>", self.on_main_tab_changed)
+
+        # Open tables follow every change made to their rows, by this client or any other
+        self.io.listen(self.on_event, entities=ENTITY_VIEWS)
 
         # Add a button to fetch and display sales and capacity analytics data
         generate_button = ttk.Button(self.analytics_tab, text="Generate Analytics", command=self.generate_analytics)
@@ -67,45 +572,37 @@ class InventoryApp:
         self.capacity_canvas = FigureCanvasTkAgg(self.capacity_fig, master=self.analytics_tab)
         self.capacity_canvas.draw()
         self.capacity_canvas.get_tk_widget().pack(expand=1, fill="both")   
-    def generate_analytics(self):
-        # Make GET requests to fetch sales and capacity analytics data
-        sales_url = "http://localhost:8000/sales-analytics"
-        capacity_url = "http://localhost:8000/capacity-analytics"
-
 
-        try:
-            # Fetch sales analytics data
-            sales_response = requests.get(sales_url)
-            sales_data = sales_response.json()
+    def close(self):
+        self.io.close()
+        self.root.destroy()
+
+    def on_event(self, event, data):
+        if event == "change":
+            change = json.loads(data)
+            table = self.tables.get(ENTITY_VIEWS[change["entity"]])
+            if table is not None:
+                table.apply_change(change["op"], change["id"], change["fields"] or {})
+        elif event == "reset":
+            # Changes were missed; the windows on screen are all that needs reloading
+            for table in self.tables.values():
+                table.schedule_refresh()
+
+    def on_main_tab_changed(self, event):
+        # Leaving the Analytics tab abandons charts still loading
+        if self.main_tab.select() != str(self.analytics_tab):
+            self.io.cancel("Analytics")
 
-            # Fetch capacity analytics data
-            capacity_response = requests.get(capacity_url)
-            capacity_data = capacity_response.json()
-
-            # # Display the JSON results in the text widget
-            # self.result_text.delete(1.0, tk.END)
-            # self.result_text.insert(tk.END, "Sales Analytics:\n")
-            # self.result_text.insert(tk.END, str(sales_data) + "\n\n")
-
-            # self.result_text.insert(tk.END, "Capacity Analytics:\n")
-            # self.result_text.insert(tk.END, str(capacity_data) + "\n")
-
-            # Visualize sales analytics data
-            self.plot_sales_analytics(sales_data)
-
-            # Visualize capacity analytics data
-            self.plot_capacity_analytics(capacity_data)
-
-        except requests.exceptions.RequestException as e:
-            # Handle any errors that occur during the request
-            self.result_text.delete(1.0, tk.END)
-            self.result_text.insert(tk.END, "Error fetching data: " + str(e))
+    def generate_analytics(self):
+        # Both requests run in parallel; each chart is drawn when its data arrives
+        self.io.get("/sales-analytics", self.plot_sales_analytics, group="Analytics", headers=COLUMNS_HEADERS)
+        self.io.get("/capacity-analytics", self.plot_capacity_analytics, group="Analytics", headers=COLUMNS_HEADERS)
 
     def plot_sales_analytics(self, data):
         self.sales_ax.clear()
 
-        products = [item[0] for item in data]
-        items_sold = [item[1] for item in data]
+        products = data['product_name']
+        items_sold = data['total_sold']
 
         self.sales_ax.bar(products, items_sold, color='skyblue')
         self.sales_ax.set_xlabel('Product')
@@ -118,9 +615,9 @@ class InventoryApp:
     def plot_capacity_analytics(self, data):
         self.capacity_ax.clear()
 
-        sku_names = [item[1] for item in data]
-        total_capacity = [item[2] for item in data]
-        remaining_capacity = [item[3] for item in data]
+        sku_names = data['sku_name']
+        total_capacity = data['total_capacity']
+        remaining_capacity = data['used_capacity']
 
         x = range(len(sku_names))
         width = 0.35
@@ -155,6 +652,7 @@ class InventoryApp:
 
         # Sub-tabs for different views
         self.sub_tabs = {}
+        self.tables = {}
         for option in view_options:
             self.sub_tabs[option] = ttk.Notebook(view_tab)
             self.sub_tabs[option].pack(expand=1, fill="both")
@@ -165,12 +663,18 @@ class InventoryApp:
     def switch_view(self, selected_view):
         selected_tab = self.sub_tabs[selected_view]
 
-        # Hide all sub-tabs except the selected one
+        # Hide all sub-tabs except the selected one, abandoning their pending loads
         for option, tab in self.sub_tabs.items():
             if tab == selected_tab:
                 tab.pack(expand=1, fill="both")
+                if option in self.tables:
+                    # Fetch whatever was cancelled while the view was hidden
+                    self.tables[option].fetch()
             else:
                 tab.pack_forget()
+                self.io.cancel(option)
+                if option in self.tables:
+                    self.tables[option].forget_pending()
 
         # Create the selected tab if it doesn't exist yet
         if selected_view == "Products" and not selected_tab.winfo_children():
@@ -187,8 +691,13 @@ class InventoryApp:
         parent.add(product_tab, text="Products")
 
         
-        self.product_table = TableView(product_tab, columns=["ID", "SKU ID", "Name", "Price", "Quantity", "Supplier ID"])
+        self.product_table = TableView(product_tab, self.io, "/products", "Products",
+                                       columns=["ID", "SKU ID", "Name", "Price", "Quantity", "Supplier ID"],
+                                       fields=["id", "sku_id", "name", "price", "quantity", "supplier_id"],
+                                       filters=["supplier_id", "sku_id", "quantity_lt"])
         self.product_table.pack(expand=True, fill="both")
+        self.product_table.reload()
+        self.tables["Products"] = self.product_table
         
         self.refresh_product_table_button = tk.Button(product_tab, text="Refresh Products", command=self.refresh_product_table)
         self.refresh_product_table_button.pack(side="right", padx=5)
@@ -206,8 +715,13 @@ class InventoryApp:
         sku_tab = tk.Frame(parent)
         parent.add(sku_tab, text="SKUs")
         
-        self.sku_table = TableView(sku_tab, columns=["ID", "Name", "Location", "Capacity"])
+        self.sku_table = TableView(sku_tab, self.io, "/skus", "SKUs",
+                                   columns=["ID", "Name", "Location", "Capacity"],
+                                   fields=["id", "name", "location", "capacity"],
+                                   filters=["location"])
         self.sku_table.pack(expand=True, fill="both")
+        self.sku_table.reload()
+        self.tables["SKUs"] = self.sku_table
         
         self.refresh_sku_table_button = tk.Button(sku_tab, text="Refresh SKUs", command=self.refresh_sku_table)
         self.refresh_sku_table_button.pack(side="right", padx=5)
@@ -225,8 +739,13 @@ class InventoryApp:
         order_tab = tk.Frame(parent)
         parent.add(order_tab, text="Orders")
         
-        self.order_table = TableView(order_tab, columns=["ID", "Product ID", "Quantity", "Customer Name", "Customer Email"])
+        self.order_table = TableView(order_tab, self.io, "/orders/", "Orders",
+                                     columns=["ID", "Product ID", "Quantity", "Customer Name", "Customer Email"],
+                                     fields=["id", "product_id", "quantity", "customer_name", "customer_email"],
+                                     filters=["customer_email", "product_id"])
         self.order_table.pack(expand=True, fill="both")
+        self.order_table.reload()
+        self.tables["Orders"] = self.order_table
         
         self.refresh_order_table_button = tk.Button(order_tab, text="Refresh Orders", command=self.refresh_order_table)
         self.refresh_order_table_button.pack(side="right", padx=5)
@@ -244,8 +763,13 @@ class InventoryApp:
         supplier_tab = tk.Frame(parent)
         parent.add(supplier_tab, text="Suppliers")
         
-        self.supplier_table = TableView(supplier_tab, columns=["ID", "Name", "Email"])
+        self.supplier_table = TableView(supplier_tab, self.io, "/suppliers/", "Suppliers",
+                                        columns=["ID", "Name", "Email"],
+                                        fields=["id", "name", "email"],
+                                        filters=["email"])
         self.supplier_table.pack(expand=True, fill="both")
+        self.supplier_table.reload()
+        self.tables["Suppliers"] = self.supplier_table
         
         self.refresh_supplier_table_button = tk.Button(supplier_tab, text="Refresh Suppliers", command=self.refresh_supplier_table)
         self.refresh_supplier_table_button.pack(side="right", padx=5)
@@ -260,36 +784,26 @@ class InventoryApp:
         self.add_supplier_button.pack(side="right", padx=5)
 
     def refresh_product_table(self):
-        self.product_table.clear()
-        products = self.get_data("/products")
-        for product in products:
-            self.product_table.insert(product)
+        self.product_table.refresh()
 
     def refresh_sku_table(self):
-        self.sku_table.clear()
-        skus = self.get_data("/skus")
-        for sku in skus:
-            self.sku_table.insert(sku)
+        self.sku_table.refresh()
 
     def refresh_order_table(self):
-        self.order_table.clear()
-        orders = self.get_data("/orders")
-        for order in orders:
-            self.order_table.insert(order)
+        self.order_table.refresh()
 
     def refresh_supplier_table(self):
-        self.supplier_table.clear()
-        suppliers = self.get_data("/suppliers")
-        for supplier in suppliers:
-            self.supplier_table.insert(supplier)
-
-    def get_data(self, endpoint):
-        response = requests.get(BASE_URL + endpoint)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            messagebox.showerror("Error", "Failed to fetch data from the server.")
-            return []
+        self.supplier_table.refresh()
+
+    def send(self, method, path, success, failure, on_done=None, **kwargs):
+        """Run a write in the background, then report it and call on_done on the Tk thread."""
+        def succeeded(_):
+            messagebox.showinfo("Success", success)
+            if on_done is not None:
+                on_done()
+
+        self.io.request(method, path, succeeded,
+                        lambda error: messagebox.showerror("Error", f"{failure} ({describe_error(error)})"), **kwargs)
 
     def delete_product(self):
         selected_item = self.product_table.tree.selection()
@@ -300,12 +814,8 @@ class InventoryApp:
         confirm = messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this product?")
         if confirm:
             product_id = self.product_table.tree.item(selected_item)['values'][0]
-            response = requests.delete(f"{BASE_URL}/products/{product_id}")
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Product deleted successfully.")
-                self.refresh_product_table()
-            else:
-                messagebox.showerror("Error", "Failed to delete product.")
+            self.send("DELETE", f"/products/{product_id}", "Product deleted successfully.",
+                      "Failed to delete product.", self.refresh_product_table)
 
     def delete_sku(self):
         selected_item = self.sku_table.tree.selection()
@@ -316,12 +826,8 @@ class InventoryApp:
         confirm = messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this SKU?")
         if confirm:
             sku_id = self.sku_table.tree.item(selected_item)['values'][0]
-            response = requests.delete(f"{BASE_URL}/skus/{sku_id}")
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "SKU deleted successfully.")
-                self.refresh_sku_table()
-            else:
-                messagebox.showerror("Error", "Failed to delete SKU.")
+            self.send("DELETE", f"/skus/{sku_id}", "SKU deleted successfully.",
+                      "Failed to delete SKU.", self.refresh_sku_table)
 
     def delete_order(self):
         selected_item = self.order_table.tree.selection()
@@ -332,12 +838,8 @@ class InventoryApp:
         confirm = messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this order?")
         if confirm:
             order_id = self.order_table.tree.item(selected_item)['values'][0]
-            response = requests.delete(f"{BASE_URL}/orders/{order_id}")
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Order deleted successfully.")
-                self.refresh_order_table()
-            else:
-                messagebox.showerror("Error", "Failed to delete order.")
+            self.send("DELETE", f"/orders/{order_id}", "Order deleted successfully.",
+                      "Failed to delete order.", self.refresh_order_table)
 
     def delete_supplier(self):
         selected_item = self.supplier_table.tree.selection()
@@ -348,12 +850,8 @@ class InventoryApp:
         confirm = messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this supplier?")
         if confirm:
             supplier_id = self.supplier_table.tree.item(selected_item)['values'][0]
-            response = requests.delete(f"{BASE_URL}/suppliers/{supplier_id}")
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Supplier deleted successfully.")
-                self.refresh_supplier_table()
-            else:
-                messagebox.showerror("Error", "Failed to delete supplier.")
+            self.send("DELETE", f"/suppliers/{supplier_id}", "Supplier deleted successfully.",
+                      "Failed to delete supplier.", self.refresh_supplier_table)
                 
     def update_product(self):
         # Create a dialog window
@@ -392,13 +890,9 @@ class InventoryApp:
             "supplier_id": int(input_fields["Supplier ID"].get())
         }
 
-        response = requests.put(f"{BASE_URL}/products/{updated_data['id']}", json=updated_data)
-        if response.status_code == 200:
-            messagebox.showinfo("Success", "Product updated successfully.")
-            self.refresh_product_table()
-            dialog.destroy()  # Close the dialog window after successful submission
-        else:
-            messagebox.showerror("Error", "Failed to update product.")
+        # Close the dialog window after successful submission
+        self.send("PUT", f"/products/{updated_data['id']}", "Product updated successfully.", "Failed to update product.",
+                  lambda: (self.refresh_product_table(), dialog.destroy()), json=updated_data)
 
     def _prompt_for_data(self, existing_data=None):
         # Create a dialog box
@@ -470,13 +964,9 @@ class InventoryApp:
             "capacity": int(input_fields["Capacity"].get())
         }
 
-        response = requests.post(f"{BASE_URL}/skus/", json=new_data)
-        if response.status_code == 200:
-            messagebox.showinfo("Success", "SKU added successfully.")
-            self.refresh_sku_table()
-            dialog.destroy()  # Close the dialog window after successful submission
-        else:
-            messagebox.showerror("Error", "Failed to add SKU.")
+        # Close the dialog window after successful submission
+        self.send("POST", "/skus/", "SKU added successfully.", "Failed to add SKU.",
+                  lambda: (self.refresh_sku_table(), dialog.destroy()), json=new_data)
 
     def update_order(self):
         # Create a dialog window
@@ -514,13 +1004,9 @@ class InventoryApp:
             "customer_email": input_fields["Customer Email"].get()
         }
 
-        response = requests.put(f"{BASE_URL}/orders/{updated_data['id']}", json=updated_data)
-        if response.status_code == 200:
-            messagebox.showinfo("Success", "Order updated successfully.")
-            self.refresh_order_table()
-            dialog.destroy()  # Close the dialog window after successful submission
-        else:
-            messagebox.showerror("Error", "Failed to update order.")
+        # Close the dialog window after successful submission
+        self.send("PUT", f"/orders/{updated_data['id']}", "Order updated successfully.", "Failed to update order.",
+                  lambda: (self.refresh_order_table(), dialog.destroy()), json=updated_data)
 
 
     def update_supplier(self):
@@ -530,68 +1016,56 @@ class InventoryApp:
             return
 
         supplier_id = self.supplier_table.tree.item(selected_item)['values'][0]
-        response = requests.get(f"{BASE_URL}/suppliers/{supplier_id}")
-        if response.status_code == 200:
-            supplier_data = response.json()
-            
-            # Create a dialog window for updating supplier details
-            dialog = tk.Toplevel(self.root)
-            dialog.title("Update Supplier")
-
-            # Create a frame to contain input fields
-            frame = tk.Frame(dialog)
-            frame.pack(padx=10, pady=10)
-
-            # Input fields for ID, email, and name
-            id_label = tk.Label(frame, text="ID:")
-            id_label.grid(row=0, column=0, sticky="w")
-            id_entry = tk.Entry(frame)
-            id_entry.insert(0, supplier_data['id'])
-            id_entry.grid(row=0, column=1, padx=5, pady=5)
-
-            email_label = tk.Label(frame, text="Email:")
-            email_label.grid(row=1, column=0, sticky="w")
-            email_entry = tk.Entry(frame)
-            email_entry.insert(0, supplier_data['email'])
-            email_entry.grid(row=1, column=1, padx=5, pady=5)
-
-            name_label = tk.Label(frame, text="Name:")
-            name_label.grid(row=2, column=0, sticky="w")
-            name_entry = tk.Entry(frame)
-            name_entry.insert(0, supplier_data['name'])
-            name_entry.grid(row=2, column=1, padx=5, pady=5)
-
-            # Function to submit updated supplier data
-            def submit_update():
-                updated_data = {
-                    "id": int(id_entry.get()),
-                    "email": email_entry.get(),
-                    "name": name_entry.get()
-                }
-                response = requests.put(f"{BASE_URL}/suppliers/{supplier_id}", json=updated_data)
-                if response.status_code == 200:
-                    messagebox.showinfo("Success", "Supplier updated successfully.")
-                    self.refresh_supplier_table()
-                    dialog.destroy()
-                else:
-                    messagebox.showerror("Error", "Failed to update supplier.")
-
-            # Submit button
-            submit_button = tk.Button(frame, text="Submit", command=submit_update)
-            submit_button.grid(row=3, columnspan=2, pady=10)
+        self.io.get(f"/suppliers/{supplier_id}", lambda supplier_data: self.show_supplier_dialog(supplier_id, supplier_data),
+                    group="Suppliers", on_error=lambda error: messagebox.showerror("Error", "Failed to fetch supplier data."))
 
-        else:
-            messagebox.showerror("Error", "Failed to fetch supplier data.")
+    def show_supplier_dialog(self, supplier_id, supplier_data):
+        # Create a dialog window for updating supplier details
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Update Supplier")
+
+        # Create a frame to contain input fields
+        frame = tk.Frame(dialog)
+        frame.pack(padx=10, pady=10)
+
+        # Input fields for ID, email, and name
+        id_label = tk.Label(frame, text="ID:")
+        id_label.grid(row=0, column=0, sticky="w")
+        id_entry = tk.Entry(frame)
+        id_entry.insert(0, supplier_data['id'])
+        id_entry.grid(row=0, column=1, padx=5, pady=5)
+
+        email_label = tk.Label(frame, text="Email:")
+        email_label.grid(row=1, column=0, sticky="w")
+        email_entry = tk.Entry(frame)
+        email_entry.insert(0, supplier_data['email'])
+        email_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        name_label = tk.Label(frame, text="Name:")
+        name_label.grid(row=2, column=0, sticky="w")
+        name_entry = tk.Entry(frame)
+        name_entry.insert(0, supplier_data['name'])
+        name_entry.grid(row=2, column=1, padx=5, pady=5)
+
+        # Function to submit updated supplier data
+        def submit_update():
+            updated_data = {
+                "id": int(id_entry.get()),
+                "email": email_entry.get(),
+                "name": name_entry.get()
+            }
+            self.send("PUT", f"/suppliers/{supplier_id}", "Supplier updated successfully.", "Failed to update supplier.",
+                      lambda: (self.refresh_supplier_table(), dialog.destroy()), json=updated_data)
+
+        # Submit button
+        submit_button = tk.Button(frame, text="Submit", command=submit_update)
+        submit_button.grid(row=3, columnspan=2, pady=10)
 
     def add_supplier(self):
         new_data = self._prompt_for_data()
         if new_data:
-            response = requests.post(f"{BASE_URL}/suppliers/", json=new_data)
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Supplier added successfully.")
-                self.refresh_supplier_table()
-            else:
-                messagebox.showerror("Error", "Failed to add supplier.")
+            self.send("POST", "/suppliers/", "Supplier added successfully.", "Failed to add supplier.",
+                      self.refresh_supplier_table, json=new_data)
 
 
     def _prompt_for_data(self, existing_data=None):
@@ -662,13 +1136,9 @@ class InventoryApp:
             "supplier_id": int(input_fields["Supplier ID"].get())
         }
         
-        response = requests.post(f"{BASE_URL}/products/", json=new_data)
-        if response.status_code == 200:
-            messagebox.showinfo("Success", "Product added successfully.")
-            self.refresh_product_table()
-            dialog.destroy()  # Close the dialog window after successful submission
-        else:
-            messagebox.showerror("Error", "Failed to add product.")
+        # Close the dialog window after successful submission
+        self.send("POST", "/products/", "Product added successfully.", "Failed to add product.",
+                  lambda: (self.refresh_product_table(), dialog.destroy()), json=new_data)
     def update_sku(self):
         # Create a dialog window
         dialog = tk.Toplevel(self.root)
@@ -686,7 +1156,6 @@ class InventoryApp:
             label.grid(row=index, column=0, sticky="w")
             input_fields[param] = tk.Entry(frame)
             input_fields[param].grid(row=index, column=1, padx=5, pady=5)
-        print(input_fields)
         # Add a Submit button
         submit_button = tk.Button(frame, text="Submit", command=lambda: self.submit_updated_sku(dialog, input_fields))
         submit_button.grid(row=len(parameters), columnspan=2, pady=10)
@@ -704,75 +1173,62 @@ class InventoryApp:
             "capacity": int(input_fields["Capacity"].get())
         }
 
-        response = requests.put(f"{BASE_URL}/skus/{updated_data['id']}", json=updated_data)
-        if response.status_code == 200:
-            messagebox.showinfo("Success", "Product updated successfully.")
-            self.refresh_product_table()
-            dialog.destroy()  # Close the dialog window after successful submission
-        else:
-            messagebox.showerror("Error", "Failed to update product.")
+        # Close the dialog window after successful submission
+        self.send("PUT", f"/skus/{updated_data['id']}", "SKU updated successfully.", "Failed to update SKU.",
+                  lambda: (self.refresh_sku_table(), dialog.destroy()), json=updated_data)
     def add_order(self):
-        # Fetch all products
-        response = requests.get(f"{BASE_URL}/products")
-        if response.status_code == 200:
-            products = response.json()
-            
-            # Convert the response format to the desired structure
-            mapped_products = []
-            for product in products:
-                mapped_product = {
-                    "ID": product[0],
-                    "SKU ID": product[1],
-                    "Name": product[2],
-                    "Price": product[3],
-                    "Quantity": product[4],
-                    "Supplier ID": product[5]
-                }
-                mapped_products.append(mapped_product)
-
-            # Create a dialog window
-            dialog = tk.Toplevel(self.root)
-            dialog.title("Add Order")
-
-            # Create a frame to contain input fields
-            frame = tk.Frame(dialog)
-            frame.pack(padx=10, pady=10)
-
-            # Dropdown menu for selecting the product
-            product_label = tk.Label(frame, text="Select Product:")
-            product_label.grid(row=0, column=0, sticky="w")
-            product_var = tk.StringVar(dialog)
-            product_var.set(mapped_products[0]["Name"])  # Default to the first product
-            product_dropdown = tk.OptionMenu(frame, product_var, *[product["Name"] for product in mapped_products])
-            product_dropdown.grid(row=0, column=1, padx=5, pady=5)
-
-            # Input field for quantity
-            quantity_label = tk.Label(frame, text="Quantity:")
-            quantity_label.grid(row=1, column=0, sticky="w")
-            quantity_entry = tk.Entry(frame)
-            quantity_entry.grid(row=1, column=1, padx=5, pady=5)
-
-            # Input field for customer name
-            name_label = tk.Label(frame, text="Customer Name:")
-            name_label.grid(row=2, column=0, sticky="w")
-            name_entry = tk.Entry(frame)
-            name_entry.grid(row=2, column=1, padx=5, pady=5)
-
-            # Input field for customer email
-            email_label = tk.Label(frame, text="Customer Email:")
-            email_label.grid(row=3, column=0, sticky="w")
-            email_entry = tk.Entry(frame)
-            email_entry.grid(row=3, column=1, padx=5, pady=5)
-
-            # Add a Submit button
-            submit_button = tk.Button(frame, text="Submit", command=lambda: self.submit_order(dialog, mapped_products, product_var.get(), quantity_entry.get(), name_entry.get(), email_entry.get()))
-            submit_button.grid(row=4, columnspan=2, pady=10)
-
-            # Add a Cancel button
-            cancel_button = tk.Button(frame, text="Cancel", command=dialog.destroy)
-            cancel_button.grid(row=5, columnspan=2, pady=10)
-        else:
-            messagebox.showerror("Error", "Failed to fetch products.")
+        # Fetch every product's id and name, page by page; the dialog opens once they arrive
+        self.io.list("products", self.show_order_dialog, group="Orders", headers=TUPLE_HEADERS, fields="id,name",
+                     on_error=lambda error: messagebox.showerror("Error", "Failed to fetch products."))
+
+    def show_order_dialog(self, products):
+        # Rows are [id, name], whatever the server's default row format
+        mapped_products = [{"ID": product_id, "Name": name} for product_id, name in products]
+        if not mapped_products:
+            messagebox.showerror("Error", "Add a product before adding an order.")
+            return
+
+        # Create a dialog window
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Add Order")
+
+        # Create a frame to contain input fields
+        frame = tk.Frame(dialog)
+        frame.pack(padx=10, pady=10)
+
+        # Dropdown menu for selecting the product
+        product_label = tk.Label(frame, text="Select Product:")
+        product_label.grid(row=0, column=0, sticky="w")
+        product_var = tk.StringVar(dialog)
+        product_var.set(mapped_products[0]["Name"])  # Default to the first product
+        product_dropdown = tk.OptionMenu(frame, product_var, *[product["Name"] for product in mapped_products])
+        product_dropdown.grid(row=0, column=1, padx=5, pady=5)
+
+        # Input field for quantity
+        quantity_label = tk.Label(frame, text="Quantity:")
+        quantity_label.grid(row=1, column=0, sticky="w")
+        quantity_entry = tk.Entry(frame)
+        quantity_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        # Input field for customer name
+        name_label = tk.Label(frame, text="Customer Name:")
+        name_label.grid(row=2, column=0, sticky="w")
+        name_entry = tk.Entry(frame)
+        name_entry.grid(row=2, column=1, padx=5, pady=5)
+
+        # Input field for customer email
+        email_label = tk.Label(frame, text="Customer Email:")
+        email_label.grid(row=3, column=0, sticky="w")
+        email_entry = tk.Entry(frame)
+        email_entry.grid(row=3, column=1, padx=5, pady=5)
+
+        # Add a Submit button
+        submit_button = tk.Button(frame, text="Submit", command=lambda: self.submit_order(dialog, mapped_products, product_var.get(), quantity_entry.get(), name_entry.get(), email_entry.get()))
+        submit_button.grid(row=4, columnspan=2, pady=10)
+
+        # Add a Cancel button
+        cancel_button = tk.Button(frame, text="Cancel", command=dialog.destroy)
+        cancel_button.grid(row=5, columnspan=2, pady=10)
 
     def submit_order(self, dialog, products, selected_product_name, quantity, customer_name, customer_email):
         # Find the selected product ID
@@ -801,16 +1257,9 @@ class InventoryApp:
             "customer_email": customer_email
         }
 
-        print("New order data:", new_order_data)  # Debugging print statement
-
-        # Send the POST request to add the new order
-        response = requests.post(f"{BASE_URL}/orders/", json=new_order_data)
-        if response.status_code == 200:
-            messagebox.showinfo("Success", "Order added successfully.")
-            self.refresh_order_table()
-            dialog.destroy()  # Close the dialog window after successful submission
-        else:
-            messagebox.showerror("Error", "Failed to add order.")
+        # Send the POST request to add the new order, closing the dialog once it succeeds
+        self.send("POST", "/orders/", "Order added successfully.", "Failed to add order.",
+                  lambda: (self.refresh_order_table(), dialog.destroy()), json=new_order_data)
 
 if __name__ == "__main__":
     root = tk.Tk()
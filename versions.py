@@ -0,0 +1,41 @@
+import zlib
+
+from fastapi import Response
+
+# Every write to a table bumps its row in table_versions (see migration 5), so a
+# list or analytics response is fully described by the versions of the tables
+# it reads plus the query string.
+
+
+def make_etag(versions, query):
+    tag = '.'.join(f'{name}{version}' for name, version in versions)
+    return f'W/"{tag}-{zlib.crc32(query.encode()):08x}"'
+
+
+def _matches(etag, if_none_match):
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+async def check_etag(db, request, response, *tables):
+    """Tag the response with an ETag and short-circuit unchanged requests.
+
+    Returns a 304 response when the client's If-None-Match is current, so the
+    caller can return it without running its query; otherwise sets the ETag on
+    response and returns None. The versions are read before the data, so an
+    ETag can only ever be older than the body it labels, never newer.
+    """
+    placeholders = ', '.join('?' for _ in tables)
+    versions = await db.fetchall(
+        f'SELECT name, version FROM table_versions WHERE name IN ({placeholders}) ORDER BY name', tables
+    )
+    # The row format is part of the representation
+    representation = request.headers.get('x-row-format', '') + request.headers.get('accept', '')
+    etag = make_etag(versions, request.url.query + representation)
+    headers = {'ETag': etag, 'Vary': 'Accept, X-Row-Format'}
+    if _matches(etag, request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None